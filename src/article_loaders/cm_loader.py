@@ -2,8 +2,13 @@ import requests
 from bs4 import BeautifulSoup
 import json
 import os
+import sys
 from urllib.parse import urljoin
 
+# src/ is not on sys.path when a loader is run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from persistence import merge_new_articles
+
 def load_existing_articles(filepath):
     if os.path.exists(filepath):
         with open(filepath, "r", encoding="utf-8") as f:
@@ -70,12 +75,8 @@ def refresh_cm():
     # Fetch new until first known article
     new_articles = fetch_new_articles(base_url, known_urls=existing_urls)
 
-    # Prepend new articles (to keep chronological order)
-    all_articles = new_articles + existing_articles
-
-    # Save
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    # Prepend new articles (to keep chronological order) and save
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"Found {len(new_articles)} new articles. Total stored: {len(all_articles)}")
     base_url = "https://cyprus-mail.com/category/crime"
@@ -88,12 +89,8 @@ def refresh_cm():
     # Fetch new until first known article
     new_articles = fetch_new_articles(base_url, known_urls=existing_urls)
 
-    # Prepend new articles (to keep chronological order)
-    all_articles = new_articles + existing_articles
-
-    # Save
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    # Prepend new articles (to keep chronological order) and save
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"Found {len(new_articles)} new articles. Total stored: {len(all_articles)}")
 if __name__ == "__main__":
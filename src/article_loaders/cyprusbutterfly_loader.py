@@ -1,9 +1,15 @@
 import json
 import os
 import re
+import sys
 from datetime import datetime, timedelta
 from playwright.sync_api import sync_playwright
 
+# src/ is not on sys.path when a loader is run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_policy import install_request_policy, launch_browser, run_with_headless_fallback
+from persistence import merge_new_articles
+
 # Dates appear as:
 # - "Вчера в 15:47" (yesterday at 15:47)
 # - "16 февраля" (16 February, no year)
@@ -54,90 +60,63 @@ def load_existing_articles(filepath):
     return []
 
 
-def fetch_articles(base_url, known_urls=None):
-    known_urls = known_urls or set()
-    new_articles = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
-
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 800},
-        )
-
-        print(f"🌐 Navigating to {base_url}")
-
-        try:
-            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
-        except Exception as e:
-            print(f"❌ Failed to load page: {e}")
-            browser.close()
-            return []
-
-        page.wait_for_timeout(5000)
-
-        # JS-rendered site: extract via evaluate
-        # Structure: .blog-card__item2 contains a > .blog-card_title + .blog-card_date
-        # Also check the featured card: .blog-card__container
-        articles_data = page.evaluate("""() => {
-            const results = [];
-            const seen = new Set();
-
-            // Featured card
-            const featured = document.querySelector('.blog-card__container');
-            if (featured) {
-                const a = featured.querySelector('a');
-                const title = featured.querySelector('.blog-card_title');
-                const date = featured.querySelector('.blog-card_date');
-                if (a && title) {
-                    const href = a.getAttribute('href');
-                    if (!seen.has(href)) {
-                        seen.add(href);
-                        results.push({
-                            href: href,
-                            title: title.innerText.trim(),
-                            date: date ? date.innerText.trim() : null,
-                        });
-                    }
+SOURCE = "cyprusbutterfly"
+
+
+def extract_articles(page, base_url):
+    """Read article cards from the rendered page (JS-rendered site)."""
+    # Structure: .blog-card__item2 contains a > .blog-card_title + .blog-card_date
+    # Also check the featured card: .blog-card__container
+    articles_data = page.evaluate("""() => {
+        const results = [];
+        const seen = new Set();
+
+        // Featured card
+        const featured = document.querySelector('.blog-card__container');
+        if (featured) {
+            const a = featured.querySelector('a');
+            const title = featured.querySelector('.blog-card_title');
+            const date = featured.querySelector('.blog-card_date');
+            if (a && title) {
+                const href = a.getAttribute('href');
+                if (!seen.has(href)) {
+                    seen.add(href);
+                    results.push({
+                        href: href,
+                        title: title.innerText.trim(),
+                        date: date ? date.innerText.trim() : null,
+                    });
                 }
             }
-
-            // Regular cards
-            const cards = document.querySelectorAll('.blog-card__item2');
-            cards.forEach(card => {
-                const a = card.querySelector('a');
-                const title = card.querySelector('.blog-card_title');
-                const date = card.querySelector('.blog-card_date');
-                if (a && title) {
-                    const href = a.getAttribute('href');
-                    if (!seen.has(href)) {
-                        seen.add(href);
-                        results.push({
-                            href: href,
-                            title: title.innerText.trim(),
-                            date: date ? date.innerText.trim() : null,
-                        });
-                    }
+        }
+
+        // Regular cards
+        const cards = document.querySelectorAll('.blog-card__item2');
+        cards.forEach(card => {
+            const a = card.querySelector('a');
+            const title = card.querySelector('.blog-card_title');
+            const date = card.querySelector('.blog-card_date');
+            if (a && title) {
+                const href = a.getAttribute('href');
+                if (!seen.has(href)) {
+                    seen.add(href);
+                    results.push({
+                        href: href,
+                        title: title.innerText.trim(),
+                        date: date ? date.innerText.trim() : null,
+                    });
                 }
-            });
-
-            return results;
-        }""")
+            }
+        });
 
-        browser.close()
+        return results;
+    }""")
 
+    articles = []
     seen_urls = set()
     for item in articles_data:
         href = item.get("href", "")
-        if not href or href in known_urls or href in seen_urls:
+        if not href:
             continue
 
         # Ensure absolute URL
@@ -146,6 +125,8 @@ def fetch_articles(base_url, known_urls=None):
                 href = "/" + href
             href = "https://cyprusbutterfly.com.cy" + href
 
+        if href in seen_urls:
+            continue
         seen_urls.add(href)
 
         title = item.get("title", "")
@@ -156,14 +137,48 @@ def fetch_articles(base_url, known_urls=None):
         if item.get("date"):
             dt = parse_butterfly_date(item["date"])
 
-        new_articles.append({
+        articles.append({
             "title": title,
             "abstract": None,
             "datetime": dt,
             "url": href,
         })
 
-    return new_articles
+    return articles
+
+
+def _load_listing(base_url, headless):
+    with sync_playwright() as p:
+        browser = launch_browser(p, SOURCE, headless)
+
+        page = browser.new_page(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+            viewport={"width": 1280, "height": 800},
+        )
+        request_stats = install_request_policy(page, SOURCE)
+
+        print(f"🌐 Navigating to {base_url} (headless={headless})")
+
+        try:
+            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
+        except Exception as e:
+            print(f"❌ Failed to load page: {e}")
+            browser.close()
+            return []
+
+        page.wait_for_timeout(5000)
+
+        articles = extract_articles(page, base_url)
+        request_stats.log(url=base_url, headless=headless)
+        browser.close()
+
+    return articles
+
+
+def fetch_articles(base_url, known_urls=None):
+    known_urls = known_urls or set()
+    articles = run_with_headless_fallback(SOURCE, lambda headless: _load_listing(base_url, headless))
+    return [a for a in articles if a["url"] not in known_urls]
 
 
 def _refresh_category(base_url, json_path):
@@ -172,10 +187,7 @@ def _refresh_category(base_url, json_path):
     existing_urls = {a["url"] for a in existing_articles}
 
     new_articles = fetch_articles(base_url, known_urls=existing_urls)
-    all_articles = new_articles + existing_articles
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"🎉 {base_url}: {len(new_articles)} new, {len(all_articles)} total")
 
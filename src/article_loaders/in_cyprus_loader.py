@@ -1,9 +1,15 @@
 import json
 import os
+import sys
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+# src/ is not on sys.path when a loader is run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_policy import install_request_policy, launch_browser, run_with_headless_fallback
+from persistence import merge_new_articles
+
 def load_existing_articles(filepath):
     if os.path.exists(filepath):
         with open(filepath, "r", encoding="utf-8") as f:
@@ -17,37 +23,75 @@ def extract_background_image(style):
     end = style.find(")", start)
     return style[start:end].strip("'\"")
 
-def fetch_new_articles(base_url, known_urls=None, max_clicks=20):
-    known_urls = known_urls or set()
+SOURCE = "in_cyprus"
+
+
+def extract_articles(page, base_url):
+    """Parse the article blocks currently rendered on the listing page."""
+    soup = BeautifulSoup(page.content(), "html.parser")
+    article_blocks = soup.find_all("div", class_="td_module_flex")
+    print(f"🔎 Found {len(article_blocks)} article blocks on page")
+
+    articles = []
+    seen_urls = set()
+    for block in article_blocks:
+        link = block.find("a", rel="bookmark")
+        if not link or not link.has_attr("href"):
+            continue
+
+        full_url = link["href"]
+        if full_url in seen_urls:
+            continue
+        seen_urls.add(full_url)
+
+        title = link.get("title") or link.get_text(strip=True)
+        abstract_tag = block.find("div", class_="td-excerpt")
+        time_tag = block.find("time")
+        thumb_span = block.find("span", class_="entry-thumb")
+        style = thumb_span.get("style", "") if thumb_span else ""
+        image_url = extract_background_image(style)
+
+        articles.append({
+            "title": title,
+            "abstract": abstract_tag.get_text(strip=True) if abstract_tag else None,
+            "datetime": time_tag.get("datetime") if time_tag else None,
+            "url": full_url,
+            "image_url": image_url,
+        })
+
+    return articles
+
+
+def _load_listing(base_url, known_urls, max_clicks, headless):
+    """Scroll through the listing with 'Load more'.
+
+    Returns (new_articles, blocks_on_first_load) so the caller can tell an
+    empty shell apart from "nothing new since last run".
+    """
     new_articles = []
     seen_urls = set()
     click_count = 0
+    first_load_count = 0
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage"
-            ]
-        )
+        browser = launch_browser(p, SOURCE, headless)
         
         page = browser.new_page(
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
             viewport={"width": 1280, "height": 800}
         )
+        request_stats = install_request_policy(page, SOURCE)
 
-        print(f"🌐 Navigating to {base_url}")
+        print(f"🌐 Navigating to {base_url} (headless={headless})")
         page.on("console", lambda msg: print(f"[Console] {msg.type}: {msg.text}"))
-        page.on("response", lambda res: print(f"[Response] {res.status} - {res.url}"))
-        page.on("requestfailed", lambda req: print(f"[Request Failed] {req.url}"))
 
         try:
             page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
         except Exception as e:
             print(f"❌ Failed to load page: {e}")
             page.screenshot(path="goto_failed.png", full_page=True)
-            return []
+            browser.close()
+            return [], 0
 
         page.wait_for_timeout(2000)
         page.screenshot(path="after_goto.png", full_page=True)
@@ -66,39 +110,16 @@ def fetch_new_articles(base_url, known_urls=None, max_clicks=20):
         page.screenshot(path="debug2.png", full_page=True)
         while click_count < max_clicks:
             print(f"\n🔁 Scroll round {click_count+1}")
-            html = page.content()
-            soup = BeautifulSoup(html, "html.parser")
-            article_blocks = soup.find_all("div", class_="td_module_flex")
-
-            print(f"🔎 Found {len(article_blocks)} article blocks on page")
+            page_articles = extract_articles(page, base_url)
+            if click_count == 0:
+                first_load_count = len(page_articles)
 
             new_this_round = 0
-            for block in article_blocks:
-                link = block.find("a", rel="bookmark")
-                if not link or not link.has_attr("href"):
-                    continue
-
-                full_url = link["href"]
-                if full_url in known_urls or full_url in seen_urls:
+            for article in page_articles:
+                if article["url"] in known_urls or article["url"] in seen_urls:
                     continue  # Don't exit — just skip
 
-                seen_urls.add(full_url)
-
-                title = link.get("title") or link.get_text(strip=True)
-                abstract_tag = block.find("div", class_="td-excerpt")
-                time_tag = block.find("time")
-                thumb_span = block.find("span", class_="entry-thumb")
-                style = thumb_span.get("style", "") if thumb_span else ""
-                image_url = extract_background_image(style)
-
-                article = {
-                    "title": title,
-                    "abstract": abstract_tag.get_text(strip=True) if abstract_tag else None,
-                    "datetime": time_tag.get("datetime") if time_tag else None,
-                    "url": full_url,
-                    "image_url": image_url,
-                }
-
+                seen_urls.add(article["url"])
                 new_articles.append(article)
                 new_this_round += 1
 
@@ -124,7 +145,18 @@ def fetch_new_articles(base_url, known_urls=None, max_clicks=20):
                 print(f"⚠️ Error clicking 'Load more': {e}")
                 break
 
+        request_stats.log(url=base_url, headless=headless)
         browser.close()
+    return new_articles, first_load_count
+
+
+def fetch_new_articles(base_url, known_urls=None, max_clicks=20):
+    known_urls = known_urls or set()
+    new_articles, _ = run_with_headless_fallback(
+        SOURCE,
+        lambda headless: _load_listing(base_url, known_urls, max_clicks, headless),
+        is_empty=lambda result: result[1] == 0,
+    )
     return new_articles
 
 def refresh_ic():
@@ -136,10 +168,7 @@ def refresh_ic():
     existing_urls = {article["url"] for article in existing_articles}
 
     new_articles = fetch_new_articles(base_url, known_urls=existing_urls)
-    all_articles = new_articles + existing_articles
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"\n🎉 Done! Found {len(new_articles)} new articles.")
     print(f"📦 Total stored: {len(all_articles)}")
@@ -153,10 +182,7 @@ def refresh_ic():
     existing_urls = {article["url"] for article in existing_articles}
 
     new_articles = fetch_new_articles(base_url, known_urls=existing_urls)
-    all_articles = new_articles + existing_articles
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"\n🎉 Done! Found {len(new_articles)} new articles.")
     print(f"📦 Total stored: {len(all_articles)}")
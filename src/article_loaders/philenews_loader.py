@@ -1,10 +1,16 @@
 import json
 import os
 import re
+import sys
 from datetime import datetime, timedelta
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+# src/ is not on sys.path when a loader is run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_policy import install_request_policy, launch_browser, run_with_headless_fallback
+from persistence import merge_new_articles
+
 GREEK_MONTHS = {
     "Ιανουαρίου": 1, "Φεβρουαρίου": 2, "Μαρτίου": 3, "Απριλίου": 4,
     "Μαΐου": 5, "Ιουνίου": 6, "Ιουλίου": 7, "Αυγούστου": 8,
@@ -65,40 +71,13 @@ def load_existing_articles(filepath):
     return []
 
 
-def fetch_articles(base_url, known_urls=None):
-    known_urls = known_urls or set()
-    new_articles = []
+SOURCE = "philenews"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
 
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 800},
-        )
-
-        print(f"🌐 Navigating to {base_url}")
-
-        try:
-            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
-        except Exception as e:
-            print(f"❌ Failed to load page: {e}")
-            browser.close()
-            return []
-
-        page.wait_for_timeout(3000)
-
-        html = page.content()
-        browser.close()
-
-    soup = BeautifulSoup(html, "html.parser")
+def extract_articles(page, base_url):
+    """Parse article cards from the currently loaded listing page."""
+    soup = BeautifulSoup(page.content(), "html.parser")
+    articles = []
 
     # Structure: div.card-wrapper > a[href] > div.card > div.card-info
     card_wrappers = soup.find_all("div", class_="card-wrapper")
@@ -110,8 +89,6 @@ def fetch_articles(base_url, known_urls=None):
             continue
 
         full_url = link_tag["href"]
-        if full_url in known_urls:
-            continue
 
         card = link_tag.find("div", class_="card")
         if not card:
@@ -132,9 +109,43 @@ def fetch_articles(base_url, known_urls=None):
             "url": full_url,
             "author": author_tag.get_text(strip=True) if author_tag else None,
         }
-        new_articles.append(article)
+        articles.append(article)
+
+    return articles
 
-    return new_articles
+
+def _load_listing(base_url, headless):
+    with sync_playwright() as p:
+        browser = launch_browser(p, SOURCE, headless)
+
+        page = browser.new_page(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+            viewport={"width": 1280, "height": 800},
+        )
+        request_stats = install_request_policy(page, SOURCE)
+
+        print(f"🌐 Navigating to {base_url} (headless={headless})")
+
+        try:
+            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
+        except Exception as e:
+            print(f"❌ Failed to load page: {e}")
+            browser.close()
+            return []
+
+        page.wait_for_timeout(3000)
+
+        articles = extract_articles(page, base_url)
+        request_stats.log(url=base_url, headless=headless)
+        browser.close()
+
+    return articles
+
+
+def fetch_articles(base_url, known_urls=None):
+    known_urls = known_urls or set()
+    articles = run_with_headless_fallback(SOURCE, lambda headless: _load_listing(base_url, headless))
+    return [a for a in articles if a["url"] not in known_urls]
 
 
 def _refresh_category(base_url, json_path):
@@ -143,10 +154,7 @@ def _refresh_category(base_url, json_path):
     existing_urls = {a["url"] for a in existing_articles}
 
     new_articles = fetch_articles(base_url, known_urls=existing_urls)
-    all_articles = new_articles + existing_articles
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    all_articles = merge_new_articles(json_path, new_articles)
 
     print(f"🎉 {base_url}: {len(new_articles)} new, {len(all_articles)} total")
 
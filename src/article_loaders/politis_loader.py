@@ -1,11 +1,17 @@
 import json
 import os
 import re
+import sys
 import requests
 from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+# src/ is not on sys.path when a loader is run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from browser_policy import install_request_policy, launch_browser, run_with_headless_fallback
+from persistence import merge_new_articles
+
 # Politis dates come as "17.02.2026 13:31" in display text,
 # but the <time> element has a proper datetime attribute: "2026-02-17T11:31:00.000Z"
 POLITIS_DATE_RE = re.compile(
@@ -29,40 +35,13 @@ def load_existing_articles(filepath):
     return []
 
 
-def fetch_articles(base_url, known_urls=None):
-    known_urls = known_urls or set()
-    new_articles = []
+SOURCE = "politis"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage",
-            ],
-        )
 
-        page = browser.new_page(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 800},
-        )
-
-        print(f"🌐 Navigating to {base_url}")
-
-        try:
-            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
-        except Exception as e:
-            print(f"❌ Failed to load page: {e}")
-            browser.close()
-            return []
-
-        page.wait_for_timeout(3000)
-
-        html = page.content()
-        browser.close()
-
-    soup = BeautifulSoup(html, "html.parser")
+def extract_articles(page, base_url):
+    """Parse <article> cards from the currently loaded listing page."""
+    soup = BeautifulSoup(page.content(), "html.parser")
+    articles = []
 
     for article_tag in soup.find_all("article"):
         link_tag = article_tag.find("a", href=True)
@@ -70,8 +49,6 @@ def fetch_articles(base_url, known_urls=None):
             continue
 
         href = urljoin(base_url, link_tag["href"])
-        if href in known_urls:
-            continue
 
         title_tag = article_tag.find("h3")
         if not title_tag:
@@ -89,25 +66,62 @@ def fetch_articles(base_url, known_urls=None):
             "datetime": dt,
             "url": href,
         }
-        new_articles.append(article)
+        articles.append(article)
+
+    return articles
+
+
+def _load_listing(base_url, headless):
+    with sync_playwright() as p:
+        browser = launch_browser(p, SOURCE, headless)
+
+        page = browser.new_page(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+            viewport={"width": 1280, "height": 800},
+        )
+        request_stats = install_request_policy(page, SOURCE)
 
-    return new_articles
+        print(f"🌐 Navigating to {base_url} (headless={headless})")
+
+        try:
+            page.goto(base_url, wait_until="domcontentloaded", timeout=60000)
+        except Exception as e:
+            print(f"❌ Failed to load page: {e}")
+            browser.close()
+            return []
+
+        page.wait_for_timeout(3000)
+
+        articles = extract_articles(page, base_url)
+        request_stats.log(url=base_url, headless=headless)
+        browser.close()
+
+    return articles
+
+
+def fetch_articles(base_url, known_urls=None):
+    known_urls = known_urls or set()
+    articles = run_with_headless_fallback(SOURCE, lambda headless: _load_listing(base_url, headless))
+    return [a for a in articles if a["url"] not in known_urls]
+
+
+def _absolute_urls(articles, base_url):
+    """Fix any previously stored relative URLs."""
+    for a in articles:
+        if a.get("url") and not a["url"].startswith("http"):
+            a["url"] = urljoin(base_url, a["url"])
 
 
 def _refresh_category(base_url, json_path):
     os.makedirs(os.path.dirname(json_path), exist_ok=True)
     existing_articles = load_existing_articles(json_path)
-    # Fix any previously stored relative URLs
-    for a in existing_articles:
-        if a.get("url") and not a["url"].startswith("http"):
-            a["url"] = urljoin(base_url, a["url"])
+    _absolute_urls(existing_articles, base_url)
     existing_urls = {a["url"] for a in existing_articles}
 
     new_articles = fetch_articles(base_url, known_urls=existing_urls)
-    all_articles = new_articles + existing_articles
-
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(all_articles, f, ensure_ascii=False, indent=2)
+    all_articles = merge_new_articles(
+        json_path, new_articles, prepare=lambda existing: _absolute_urls(existing, base_url)
+    )
 
     print(f"🎉 {base_url}: {len(new_articles)} new, {len(all_articles)} total")
 
@@ -205,14 +219,12 @@ def refresh_en_politis():
     for base_url, json_path in categories:
         os.makedirs(os.path.dirname(json_path), exist_ok=True)
         existing = load_existing_articles(json_path)
-        for a in existing:
-            if a.get("url") and not a["url"].startswith("http"):
-                a["url"] = urljoin(base_url, a["url"])
+        _absolute_urls(existing, base_url)
         existing_urls = {a["url"] for a in existing}
         new_articles = fetch_en_politis_articles(base_url, known_urls=existing_urls)
-        all_articles = new_articles + existing
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(all_articles, f, ensure_ascii=False, indent=2)
+        all_articles = merge_new_articles(
+            json_path, new_articles, prepare=lambda existing, base_url=base_url: _absolute_urls(existing, base_url)
+        )
         print(f"🎉 {base_url}: {len(new_articles)} new, {len(all_articles)} total")
 
 
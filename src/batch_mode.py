@@ -0,0 +1,282 @@
+"""Regenerate summaries for a range of days through the OpenAI Batch API.
+
+Backfills don't need answers within seconds, and batch requests cost half
+as much. The usual summarize / link / translate functions run unchanged
+with a `CollectingClient` in place of `get_client()`:
+
+  - a request whose response is already stored for that day is answered
+    from the store;
+  - any other request is recorded and `BatchPending` is raised, which stops
+    that day's work for this round.
+
+Every round replays all days, submits the requests collected across all of
+them as one JSONL batch, waits for it, and stores each response under the
+day it belongs to (summaries/<day>/batch/responses.jsonl). Work that was
+waiting on a response moves forward one call per round; days finish when
+all their output files exist. Only transcripts and the article caches
+already on disk are used: no downloads, refreshes, topic detection, covers
+or posting.
+
+Usage:
+    python src/batch_mode.py 2025-06-01 2025-06-30
+    python src/batch_mode.py 2025-06-01 2025-06-30 --langs en ru uk
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from helpers import get_root_folder_for_day, get_text_folder_for_day
+from lang_config import (
+    get_native_summary_languages,
+    get_source_language,
+    get_translation_languages,
+    load_language_config,
+)
+from llm_cache import request_key, to_namespace
+from llm_client import get_client
+from timing import log_metric
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+POLL_INTERVAL_S = 60
+MAX_ROUNDS = 50
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchPending(Exception):
+    """Raised when a request has been queued for the next batch."""
+
+
+def responses_path(day):
+    return get_root_folder_for_day(day) / "batch" / "responses.jsonl"
+
+
+class ResponseStore:
+    """Chat completion bodies for one day, keyed by request hash."""
+
+    def __init__(self, day):
+        self.path = responses_path(day)
+        self.responses = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.responses[entry["key"]] = entry["body"]
+
+    def get(self, key):
+        return self.responses.get(key)
+
+    def add(self, key, body):
+        self.responses[key] = body
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "body": body}, ensure_ascii=False) + "\n")
+
+
+class CollectingClient:
+    """Stands in for get_client() in the summarize/translate functions.
+
+    Only `chat.completions.create` is supported, which is all those
+    functions use. The Batch API cannot stream, so `stream_completion`
+    sends plain requests through it.
+    """
+
+    supports_streaming = False
+
+    def __init__(self, day, store):
+        self.day = day
+        self.store = store
+        self.pending = {}
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **body):
+        key = request_key(body)
+        stored = self.store.get(key)
+        if stored is not None:
+            return to_namespace(stored)
+        with self._lock:
+            self.pending[key] = body
+        raise BatchPending(key)
+
+
+def day_chains(day, langs, config):
+    """Independent chains of steps that regenerate one day.
+
+    Each chain is (required input file, [(name, output file, callable(client)), ...]).
+    Steps within a chain run in order and are skipped once their output
+    exists, mirroring the pipeline stages; chains wait until their input
+    file exists.
+    """
+    # Imported here: main pulls in the Playwright loaders, which the
+    # batch mode itself never uses.
+    from main import link_translation_stage, translate_stage
+    from summarize import finalize_summary_for_day, generate_summary_for_day
+
+    txt = get_text_folder_for_day(day)
+    chains = []
+    summary_langs = {"en": config["en"], **get_native_summary_languages(config)}
+    for lang, cfg in summary_langs.items():
+        if lang not in langs:
+            continue
+        chains.append((txt / "transcript_gr.txt", [
+            (f"generate_{lang}", txt / cfg["summary_without_links_filename"],
+             lambda client, lang=lang: generate_summary_for_day(day, lang, client=client, sleep_time=0)),
+            (f"summarize_{lang}", txt / cfg["summary_filename"],
+             lambda client, lang=lang: finalize_summary_for_day(day, lang, client=client)),
+        ]))
+    for lang, cfg in get_translation_languages(config).items():
+        if lang not in langs:
+            continue
+        source_cfg = config[get_source_language(cfg)]
+        chains.append((txt / source_cfg["summary_without_links_filename"], [
+            (f"translate_{lang}", txt / cfg["summary_without_links_filename"],
+             lambda client, lang=lang, cfg=cfg: translate_stage(day, lang, cfg, config, client=client)),
+            (f"link_{lang}", txt / cfg["summary_filename"],
+             lambda client, lang=lang, cfg=cfg: link_translation_stage(day, lang, cfg, client=client)),
+        ]))
+    return chains
+
+
+def advance_day(day, langs, config):
+    """Run every step for `day` that can complete from stored responses.
+
+    Returns the requests still needed ({key: body}); empty means the day is
+    done or cannot progress further.
+    """
+    store = ResponseStore(day)
+    client = CollectingClient(day, store)
+    for requires, steps in day_chains(day, langs, config):
+        if not requires.exists():
+            continue
+        for name, output, step in steps:
+            if output.exists():
+                continue
+            try:
+                step(client)
+            except BatchPending:
+                # The rest of the chain depends on this step's output
+                break
+            except Exception as e:
+                print(f"❌ {day} {name} failed: {e}")
+                break
+    return client.pending
+
+
+def build_batch_jsonl(pending_by_day):
+    lines = []
+    for day, pending in pending_by_day.items():
+        for key, body in pending.items():
+            lines.append(json.dumps({
+                "custom_id": f"{day.isoformat()}:{key}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": body,
+            }, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+def submit_batch(api, jsonl):
+    upload = api.files.create(file=("requests.jsonl", io.BytesIO(jsonl.encode("utf-8"))), purpose="batch")
+    batch = api.batches.create(
+        input_file_id=upload.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+    )
+    print(f"📦 Submitted batch {batch.id}")
+    return batch.id
+
+
+def wait_for_batch(api, batch_id, poll_interval=POLL_INTERVAL_S):
+    while True:
+        batch = api.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        print(f"⏳ Batch {batch_id}: {batch.status}")
+        time.sleep(poll_interval)
+
+
+def store_batch_results(api, batch):
+    """Save each successful response into its day's store. Returns (stored, failed)."""
+    if batch.status != "completed" or not batch.output_file_id:
+        print(f"❌ Batch {batch.id} ended as {batch.status}")
+        return 0, 0
+    stores = {}
+    stored = failed = 0
+    for line in api.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        day_str, key = result["custom_id"].split(":", 1)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            print(f"⚠️ Request {result['custom_id']} failed: {result.get('error') or response.get('status_code')}")
+            failed += 1
+            continue
+        day = date.fromisoformat(day_str)
+        if day not in stores:
+            stores[day] = ResponseStore(day)
+        stores[day].add(key, response["body"])
+        stored += 1
+    return stored, failed
+
+
+def run_batches(days, langs, api=None, poll_interval=POLL_INTERVAL_S, max_rounds=MAX_ROUNDS):
+    """Replay all days, batch what they still need, repeat until nothing is pending."""
+    api = api or get_client("batch")
+    config = load_language_config()
+    days = [d for d in days if (get_text_folder_for_day(d) / "transcript_gr.txt").exists()]
+    if not days:
+        print("No days with a transcript in range.")
+        return
+
+    for round_number in range(1, max_rounds + 1):
+        pending_by_day = {}
+        for day in days:
+            pending = advance_day(day, langs, config)
+            if pending:
+                pending_by_day[day] = pending
+        total = sum(len(p) for p in pending_by_day.values())
+        if not total:
+            print(f"✅ All {len(days)} days complete after {round_number - 1} batch rounds.")
+            return
+
+        print(f"🔁 Round {round_number}: {total} requests across {len(pending_by_day)} days")
+        batch_id = submit_batch(api, build_batch_jsonl(pending_by_day))
+        batch = wait_for_batch(api, batch_id, poll_interval)
+        stored, failed = store_batch_results(api, batch)
+        log_metric("batch_round", round=round_number, batch_id=batch_id, requests=total,
+                   days=len(pending_by_day), stored=stored, failed=failed)
+        if not stored:
+            print("❌ No responses stored this round, stopping.")
+            return
+    print(f"⚠️ Stopped after {max_rounds} rounds with work still pending.")
+
+
+def date_range(start, end):
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate summaries for a range of days via the Batch API.")
+    parser.add_argument("start", type=date.fromisoformat, help="First day (YYYY-MM-DD)")
+    parser.add_argument("end", nargs="?", type=date.fromisoformat, help="Last day (defaults to start)")
+    parser.add_argument("--langs", nargs="+", help="Languages to regenerate (default: all enabled)")
+    parser.add_argument("--poll-interval", type=int, default=POLL_INTERVAL_S, help="Seconds between batch status checks")
+    args = parser.parse_args()
+
+    langs = set(args.langs or load_language_config())
+    run_batches(list(date_range(args.start, args.end or args.start)), langs, poll_interval=args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
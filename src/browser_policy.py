@@ -0,0 +1,220 @@
+"""Per-source browser policy for Playwright pages used by loaders and posters.
+
+Listing pages pull in images, fonts, video and a long tail of ad/analytics
+scripts that the scrapers never look at. Each source gets a policy naming the
+resource types and third-party domains to abort; `install_request_policy`
+wires it up via `page.route` and returns a stats object so the saving can be
+logged.
+
+The policy also says whether a source works in headless Chromium.
+`launch_browser` honours that flag, and `run_with_headless_fallback` retries
+headed (under xvfb) when a headless run comes back empty.
+"""
+
+import os
+import platform
+from urllib.parse import urlparse
+
+from timing import log_metric
+
+# Resource types that article loaders never read
+HEAVY_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Known ad / analytics / tracking hosts (matched as domain suffixes)
+TRACKER_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "adservice.google.com",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+    "facebook.net",
+    "hotjar.com",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "chartbeat.com",
+    "chartbeat.net",
+    "onesignal.com",
+    "pubmatic.com",
+    "rubiconproject.com",
+    "smartadserver.com",
+    "teads.tv",
+    "mc.yandex.ru",
+    "clarity.ms",
+    "cookiebot.com",
+)
+
+# Rough transfer sizes per aborted request, used to estimate bytes saved.
+# Aborted requests never report a size, so this is an estimate by design.
+ESTIMATED_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 80_000,
+    "stylesheet": 20_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+]
+
+DEFAULT_POLICY = {
+    "block_resource_types": HEAVY_RESOURCE_TYPES,
+    "block_trackers": True,
+    "headless": True,
+}
+
+# Per-source overrides. Loaders pass their source key; anything missing
+# falls back to DEFAULT_POLICY.
+SOURCE_POLICIES = {
+    "in_cyprus": DEFAULT_POLICY,
+    "philenews": DEFAULT_POLICY,
+    "sigmalive": DEFAULT_POLICY,
+    "politis": DEFAULT_POLICY,
+    "kibrispostasi": DEFAULT_POLICY,
+    "evropakipr": DEFAULT_POLICY,
+    "cyprusbutterfly": DEFAULT_POLICY,
+    # The Substack editor shows the uploaded cover as an <img>, and the
+    # image insertion flow waits for it — only drop fonts, media and trackers.
+    # Posting stays headed: the editor's link dialog and file chooser are
+    # only proven under xvfb.
+    "substack": {
+        "block_resource_types": {"media", "font"},
+        "block_trackers": True,
+        "headless": False,
+    },
+}
+
+
+def get_policy(source):
+    """Return the interception policy for a source key."""
+    return SOURCE_POLICIES.get(source, DEFAULT_POLICY)
+
+
+def is_tracker_host(host):
+    host = (host or "").lower()
+    return any(host == d or host.endswith("." + d) for d in TRACKER_DOMAINS)
+
+
+def should_block(resource_type, url, policy):
+    """Decide whether a request should be aborted under the given policy."""
+    if resource_type in policy.get("block_resource_types", ()):
+        return True
+    if policy.get("block_trackers") and is_tracker_host(urlparse(url).hostname):
+        return True
+    return False
+
+
+class RequestPolicyStats:
+    """Counters for one page's intercepted traffic."""
+
+    def __init__(self, source):
+        self.source = source
+        self.blocked = 0
+        self.allowed = 0
+        self.est_bytes_saved = 0
+        self.blocked_by_type = {}
+
+    def record_blocked(self, resource_type):
+        self.blocked += 1
+        self.est_bytes_saved += ESTIMATED_BYTES.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+        self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+
+    def record_allowed(self):
+        self.allowed += 1
+
+    def summary(self):
+        return (
+            f"blocked {self.blocked} requests (~{self.est_bytes_saved / 1024:.0f} KB saved), "
+            f"allowed {self.allowed}"
+        )
+
+    def log(self, **context):
+        """Print the counters and append them to the timings log."""
+        print(f"🚫 {self.source}: {self.summary()}")
+        log_metric(
+            "browser_request_policy",
+            source=self.source,
+            blocked=self.blocked,
+            allowed=self.allowed,
+            est_bytes_saved=self.est_bytes_saved,
+            blocked_by_type=self.blocked_by_type,
+            **context,
+        )
+
+
+def install_request_policy(page, source):
+    """Route all requests on `page` through the source's policy.
+
+    Returns a RequestPolicyStats that callers should `.log()` once the page
+    is done with.
+    """
+    policy = get_policy(source)
+    stats = RequestPolicyStats(source)
+
+    def handle(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, policy):
+            stats.record_blocked(request.resource_type)
+            route.abort()
+        else:
+            stats.record_allowed()
+            route.continue_()
+
+    page.route("**/*", handle)
+    return stats
+
+
+def resolve_headless(source, headless=None):
+    """Headless flag for a source: explicit arg, then BROWSER_HEADLESS, then policy."""
+    if headless is not None:
+        return headless
+    env = os.getenv("BROWSER_HEADLESS")
+    if env:
+        return env.strip().lower() not in ("0", "false", "no")
+    return get_policy(source).get("headless", False)
+
+
+def can_run_headed():
+    """True when a headed browser can open (a display exists, e.g. under xvfb-run)."""
+    if platform.system() != "Linux":
+        return True
+    return bool(os.getenv("DISPLAY"))
+
+
+def launch_browser(p, source, headless=None):
+    """Launch Chromium for `source` with the shared args and its headless flag."""
+    return p.chromium.launch(headless=resolve_headless(source, headless), args=BROWSER_ARGS)
+
+
+def run_with_headless_fallback(source, attempt, is_empty=None):
+    """Run `attempt(headless)`; retry headed if a headless run looks empty.
+
+    Sites that sniff headless Chromium tend to serve an empty shell rather
+    than fail outright, so an empty result is treated as the signal.
+    """
+    is_empty = is_empty or (lambda result: not result)
+    headless = resolve_headless(source)
+    result = attempt(headless)
+    if not (headless and is_empty(result)):
+        return result
+
+    if not can_run_headed():
+        print(f"⚠️ {source}: headless run found nothing and no display is available for a headed retry.")
+        return result
+
+    print(f"↩️ {source}: headless run found nothing, retrying headed...")
+    log_metric("browser_headless_fallback", source=source)
+    return attempt(False)
@@ -0,0 +1,127 @@
+"""Check that each loader extracts the same articles headless and headed.
+
+Each source's live listing page is loaded twice, once in headless and once
+in headed Chromium (with the loader's request policy), the loader's
+`extract_articles` runs on each, and the URL sets are compared. A site that
+serves headless clients an empty shell or a bot wall shows up as articles
+found only headed. Headed runs need a display, so run this under xvfb-run
+on the server.
+
+With --save, both rendered pages are kept in
+data/saved_pages/<source>.<mode>.html for inspecting a mismatch.
+
+Usage:
+    xvfb-run -a python src/check_headless.py              # compare modes
+    xvfb-run -a python src/check_headless.py --save       # ... and keep the pages
+    xvfb-run -a python src/check_headless.py philenews sigmalive
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from playwright.sync_api import sync_playwright
+
+from article_loaders import (
+    cyprusbutterfly_loader,
+    evropakipr_loader,
+    in_cyprus_loader,
+    kibrispostasi_loader,
+    philenews_loader,
+    politis_loader,
+    sigmalive_loader,
+)
+from browser_policy import can_run_headed, install_request_policy, launch_browser
+
+SAVED_PAGES_DIR = Path("data/saved_pages")
+# Articles published between the headless and headed loads can legitimately differ
+MAX_MISSING_HEADLESS = 2
+
+# source key -> (loader module, listing URL used for relative links)
+LISTINGS = {
+    "in_cyprus": (in_cyprus_loader, "https://in-cyprus.philenews.com/category/local/"),
+    "philenews": (philenews_loader, "https://www.philenews.com/kipros/"),
+    "sigmalive": (sigmalive_loader, "https://www.sigmalive.com/news/local"),
+    "politis": (politis_loader, "https://www.politis.com.cy/politis-news/cyprus"),
+    "kibrispostasi": (kibrispostasi_loader, "https://www.kibrispostasi.com/c35-KIBRIS_HABERLERI"),
+    "evropakipr": (evropakipr_loader, "https://evropakipr.com/novosti"),
+    "cyprusbutterfly": (cyprusbutterfly_loader, "https://cyprusbutterfly.com.cy/news/"),
+}
+
+
+def saved_page_path(source, headless):
+    mode = "headless" if headless else "headed"
+    return SAVED_PAGES_DIR / f"{source}.{mode}.html"
+
+
+def load_listing(source, headless, save=False):
+    """Render the live listing page in one mode and return the set of extracted URLs."""
+    module, url = LISTINGS[source]
+    with sync_playwright() as p:
+        browser = launch_browser(p, source, headless)
+        try:
+            page = browser.new_page(viewport={"width": 1280, "height": 800})
+            install_request_policy(page, source)
+            page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            page.wait_for_timeout(5000)
+            articles = module.extract_articles(page, url)
+            html = page.content()
+        finally:
+            browser.close()
+
+    if save:
+        path = saved_page_path(source, headless)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(html, encoding="utf-8")
+        print(f"💾 {source}: saved {len(html)} chars to {path}")
+    return {a["url"] for a in articles}
+
+
+def check_source(source, save=False):
+    """Compare live headless and headed extraction. Returns True when they agree."""
+    try:
+        headless_urls = load_listing(source, headless=True, save=save)
+        headed_urls = load_listing(source, headless=False, save=save)
+    except Exception as e:
+        print(f"⚠️ {source}: failed to load listing: {e}")
+        return False
+
+    if not headed_urls:
+        print(f"❌ {source}: no articles found even headed")
+        return False
+    # Listings change between the two loads, so only the count of articles
+    # missing headless matters, not exact equality of the newest entries
+    missing = headed_urls - headless_urls
+    if len(missing) <= MAX_MISSING_HEADLESS:
+        print(f"✅ {source}: {len(headless_urls)} headless / {len(headed_urls)} headed articles")
+        return True
+
+    print(f"❌ {source}: headless={len(headless_urls)} headed={len(headed_urls)}")
+    for url in sorted(missing)[:10]:
+        print(f"   only headed:   {url}")
+    for url in sorted(headless_urls - headed_urls)[:10]:
+        print(f"   only headless: {url}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare loader extraction in headless and headed Chromium.")
+    parser.add_argument("sources", nargs="*", help=f"Sources to check (default: all of {', '.join(LISTINGS)})")
+    parser.add_argument("--save", action="store_true", help="Also keep both rendered listing pages")
+    args = parser.parse_args()
+
+    sources = args.sources or list(LISTINGS)
+    unknown = [s for s in sources if s not in LISTINGS]
+    if unknown:
+        parser.error(f"Unknown sources: {', '.join(unknown)}")
+
+    if not can_run_headed():
+        print("❌ No display available for the headed run — use xvfb-run.")
+        return 2
+
+    results = [check_source(source, save=args.save) for source in sources]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
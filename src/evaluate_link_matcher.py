@@ -0,0 +1,125 @@
+"""Compare the local link matcher against archived LLM link assignments.
+
+Every archived `summary.txt` (or the language's summary file) was linked by
+the LLM. Its links are taken as the reference; the links are stripped, the
+local matcher runs on the same bullets against the articles from the same
+±1-day window, and the results are compared for a grid of thresholds.
+
+For each (min_score, min_margin) pair it reports:
+  local     share of bullets the matcher would link without the LLM
+  precision local links that point at the same URL as the LLM's
+  recall    LLM links on locally linked bullets that the matcher found too
+
+Usage:
+    python src/evaluate_link_matcher.py
+    python src/evaluate_link_matcher.py --lang el --since 2025-06-01
+    python src/evaluate_link_matcher.py --scores 6 8 10 --margins 2 3 5
+"""
+
+import argparse
+import re
+from datetime import date, timedelta
+
+import link_matcher
+from helpers import SUMMARIES_ROOT
+from lang_config import load_language_config
+from link_candidates import strip_links
+from summarize import get_article_sources, load_articles
+
+DEFAULT_SCORES = [4.0, 6.0, 8.0, 10.0, 12.0]
+DEFAULT_MARGINS = [1.0, 2.0, 3.0, 5.0]
+
+_TAG_LINK_RE = re.compile(r"\[\((\w+)\)\]\((https?://[^\)]+)\)")
+
+
+def reference_links(summary_text):
+    """[(bullet text without links, {tag: url}), ...] for every bullet."""
+    bullets = []
+    for line in summary_text.splitlines():
+        if not link_matcher.is_bullet(line):
+            continue
+        body = line.strip()[2:]
+        links = {}
+        for tag, url in _TAG_LINK_RE.findall(body):
+            links.setdefault(tag, url)
+        bullets.append((strip_links(body), links))
+    return bullets
+
+
+def archived_days(summary_filename, since=None):
+    """(day, summary path) for every archived day folder that has the file."""
+    days = []
+    for folder in sorted(SUMMARIES_ROOT.glob("????-??-??")):
+        try:
+            day = date.fromisoformat(folder.name)
+        except ValueError:
+            continue
+        if since and day < since:
+            continue
+        path = folder / "txt" / summary_filename
+        if path.exists():
+            days.append((day, path))
+    return days
+
+
+def load_cases(lang, since=None):
+    """Reference bullets and article windows for each archived day."""
+    config = load_language_config()
+    summary_filename = config.get(lang, config["en"])["summary_filename"]
+    article_sources = get_article_sources(lang)
+    cases = []
+    for day, path in archived_days(summary_filename, since):
+        bullets = reference_links(path.read_text(encoding="utf-8"))
+        articles = load_articles(day - timedelta(days=1), day + timedelta(days=1), article_sources)
+        if bullets and articles:
+            cases.append((day, bullets, articles))
+    return cases
+
+
+def evaluate(cases, min_score, min_margin):
+    totals = {"bullets": 0, "local": 0, "local_links": 0, "correct": 0, "reference_links": 0}
+    for _, bullets, articles in cases:
+        summary_text = "\n".join(f"- {text}" for text, _ in bullets)
+        matches = link_matcher.match_bullets(summary_text, articles, min_score=min_score, min_margin=min_margin)
+        for match, (_, reference) in zip(matches, bullets):
+            totals["bullets"] += 1
+            if match["ambiguous"]:
+                continue
+            totals["local"] += 1
+            totals["local_links"] += len(match["links"])
+            totals["reference_links"] += len(reference)
+            totals["correct"] += sum(1 for tag, url in match["links"].items() if reference.get(tag) == url)
+    return totals
+
+
+def _ratio(numerator, denominator):
+    return f"{numerator / denominator:.0%}" if denominator else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate local link matching against archived LLM links.")
+    parser.add_argument("--lang", default="en", help="Language whose summaries to evaluate (default: en)")
+    parser.add_argument("--since", type=date.fromisoformat, help="Only days on or after YYYY-MM-DD")
+    parser.add_argument("--scores", type=float, nargs="+", default=DEFAULT_SCORES, help="min_score values to try")
+    parser.add_argument("--margins", type=float, nargs="+", default=DEFAULT_MARGINS, help="min_margin values to try")
+    args = parser.parse_args()
+
+    cases = load_cases(args.lang, args.since)
+    if not cases:
+        print(f"No archived {args.lang} summaries with articles found under {SUMMARIES_ROOT}.")
+        return
+    print(f"📚 {len(cases)} days, {sum(len(b) for _, b, _ in cases)} bullets "
+          f"(current: min_score={link_matcher.MIN_SCORE}, min_margin={link_matcher.MIN_MARGIN})\n")
+
+    print(f"{'min_score':>9} {'margin':>6} {'local':>6} {'precision':>9} {'recall':>6}")
+    for min_score in args.scores:
+        for min_margin in args.margins:
+            t = evaluate(cases, min_score, min_margin)
+            print(f"{min_score:>9.1f} {min_margin:>6.1f} "
+                  f"{_ratio(t['local'], t['bullets']):>6} "
+                  f"{_ratio(t['correct'], t['local_links']):>9} "
+                  f"{_ratio(t['correct'], t['reference_links']):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-import os, base64, textwrap, logging
+import io, os, base64, textwrap, logging
+
+from PIL import Image
+
+from persistence import atomic_write_bytes
+from timing import log_metric
 
 IMAGE_LOG_FILENAME = "image_generation.log"
 
@@ -53,9 +58,8 @@ def generate_ai_image_from_headlines(client, day, top_stories_md, out_path,
         logger.info("Submitting image generation request.")
         img = client.images.generate(model=model, prompt=prompt, size="1536x1024", n=1)
         b64 = img.data[0].b64_json
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        with open(out_path, "wb") as f:
-            f.write(base64.b64decode(b64))
+        # Written via a temp file: posting may look for the cover while it is being saved
+        atomic_write_bytes(out_path, base64.b64decode(b64))
         logger.info("Image generated successfully: %s", out_path)
         return out_path
     except Exception as e:
@@ -185,10 +189,9 @@ def generate_cover_from_md(client, day, markdown: str, out_dir: str | os.PathLik
         print(f"🖼️ Generating cover with prompt: {prompt}")
         img = client.images.generate(model=model, prompt=prompt, size="1536x1024", n=1)
         b64 = img.data[0].b64_json
-        os.makedirs(out_dir, exist_ok=True)
         out_path = os.path.join(out_dir, "cover.png")
-        with open(out_path, "wb") as f:
-            f.write(base64.b64decode(b64))
+        # Written via a temp file: posting may look for the cover while it is being saved
+        atomic_write_bytes(out_path, base64.b64decode(b64))
         print(f"🖼️ Cover generated: {out_path}")
         logger.info("Cover generated successfully: %s", out_path)
         return out_path
@@ -212,3 +215,66 @@ def get_image_logger(log_path: str) -> logging.Logger:
         handler.setFormatter(formatter)
         logger.addHandler(handler)
     return logger
+
+
+# Substack shows post images at most 728 CSS px wide; 1456 stays sharp on 2x screens
+COVER_VARIANT_WIDTH = 1456
+COVER_VARIANTS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def _variant_paths(png_path):
+    base, _ = os.path.splitext(str(png_path))
+    return {ext: f"{base}.{ext}" for ext in COVER_VARIANTS}
+
+
+def best_cover_variant(png_path) -> str:
+    """
+    Smallest of the PNG and its variants that are at least as new as it.
+    Only looks at what is on disk; optimize_cover does the encoding.
+    """
+    png_path = str(png_path)
+    source_mtime = os.path.getmtime(png_path)
+    candidates = [png_path] + [p for p in _variant_paths(png_path).values()
+                               if os.path.exists(p) and os.path.getmtime(p) >= source_mtime]
+    return min(candidates, key=os.path.getsize)
+
+
+def optimize_cover(png_path, width: int = COVER_VARIANT_WIDTH) -> str:
+    """
+    Writes web-sized, metadata-free variants next to the cover (cover.webp, cover.jpg)
+    and returns the smallest file to upload. Variants newer than the PNG are reused.
+    Falls back to the PNG itself if encoding fails.
+    """
+    png_path = str(png_path)
+    variants = _variant_paths(png_path)
+    source_mtime = os.path.getmtime(png_path)
+    if all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in variants.values()):
+        return best_cover_variant(png_path)
+    try:
+        with Image.open(png_path) as src:
+            img = src.convert("RGB")
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        # Re-encoding without exif/icc_profile arguments drops all metadata
+        img.info = {}
+        sizes = {}
+        for ext, options in COVER_VARIANTS.items():
+            buffer = io.BytesIO()
+            img.save(buffer, **options)
+            atomic_write_bytes(variants[ext], buffer.getvalue())
+            sizes[ext] = buffer.tell()
+    except Exception as e:
+        print(f"⚠️ Cover optimization failed, posting the PNG: {e}")
+        return png_path
+
+    source_bytes = os.path.getsize(png_path)
+    best = min(sizes, key=sizes.get)
+    if sizes[best] >= source_bytes:
+        return png_path
+    log_metric("cover_optimized", cover_path=png_path, source_bytes=source_bytes,
+               variant_bytes=sizes, chosen=best, saved_bytes=source_bytes - sizes[best])
+    print(f"🖼️ Cover optimized: {source_bytes // 1024} KB → {sizes[best] // 1024} KB ({best})")
+    return variants[best]
@@ -28,3 +28,12 @@ def get_native_summary_languages(config=None):
 def get_source_language(lang_config):
     """Parse 'translate_from:en' -> 'en'."""
     return lang_config["summary_source"].split(":", 1)[1]
+
+PUBLISH_BACKENDS = ("browser", "api")
+
+def get_publish_backend(lang_config):
+    """'browser' (Playwright editor, the default) or 'api' (Substack JSON endpoints)."""
+    backend = lang_config.get("publish_backend", "browser")
+    if backend not in PUBLISH_BACKENDS:
+        raise ValueError(f"Unknown publish_backend {backend!r}; expected one of {PUBLISH_BACKENDS}")
+    return backend
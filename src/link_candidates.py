@@ -0,0 +1,250 @@
+"""Local candidate retrieval for article linking.
+
+The linker used to receive every article from the ±1-day window. This module
+scores articles against each summary bullet with BM25 over title + abstract
+and keeps only the best few per bullet (per source tag), so the LLM sees a
+short candidate list instead of the whole archive.
+
+Summaries and articles are often in different languages (a Ukrainian summary
+is linked to English Cyprus Mail articles, a Greek one to Philenews), so
+tokens are reduced to a script-independent key: Greek and Cyrillic are
+transliterated, diacritics dropped, common spelling variants folded
+("ch"/"kh"/"h", "ou"/"u", ...), and a small lexicon maps place and
+institution names that differ across languages (Nicosia / Λευκωσία /
+Lefkoşa) onto one key.
+"""
+
+import math
+import re
+import unicodedata
+from collections import Counter
+
+# Keep the top N candidates per source tag for every bullet
+DEFAULT_TOP_K = 3
+KEY_LENGTH = 6
+# Below this share of bullets with any match, skip prefiltering altogether
+MIN_BULLET_COVERAGE = 0.5
+MAX_ABSTRACT_CHARS = 240
+
+GREEK_TO_LATIN = {
+    "α": "a", "β": "v", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "i",
+    "θ": "th", "ι": "i", "κ": "k", "λ": "l", "μ": "m", "ν": "n", "ξ": "x",
+    "ο": "o", "π": "p", "ρ": "r", "σ": "s", "ς": "s", "τ": "t", "υ": "y",
+    "φ": "f", "χ": "ch", "ψ": "ps", "ω": "o",
+}
+
+CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ґ": "g", "д": "d", "е": "e",
+    "ё": "e", "є": "ie", "ж": "zh", "з": "z", "и": "i", "і": "i", "ї": "i",
+    "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "", "э": "e",
+    "ю": "iu", "я": "ia",
+}
+
+TRANSLITERATION = {**GREEK_TO_LATIN, **CYRILLIC_TO_LATIN, "ı": "i"}
+
+# Spelling variants that differ between transliteration conventions
+PHONETIC_FOLDS = [
+    ("kh", "h"), ("ch", "h"), ("ph", "f"), ("th", "t"), ("ou", "u"),
+    ("ck", "k"), ("c", "k"), ("q", "k"), ("y", "i"), ("w", "v"),
+    ("j", "i"), ("x", "ks"), ("h", ""),
+]
+
+# Names that are not transliterations of each other. The first entry of
+# each group is the canonical form; variants are matched by their key.
+CROSS_LINGUAL_LEXICON = [
+    ["nicosia", "lefkosia", "λευκωσία", "никосия", "нікосія", "lefkoşa", "ניקוסיה"],
+    ["limassol", "lemesos", "λεμεσός", "лимассол", "лімасол", "limasol", "לימסול"],
+    ["paphos", "pafos", "πάφος", "пафос", "baf", "פאפוס"],
+    ["famagusta", "ammochostos", "αμμόχωστος", "фамагуста", "gazimağusa", "mağusa"],
+    ["kyrenia", "keryneia", "κερύνεια", "кирения", "кіренія", "girne"],
+    ["larnaca", "larnaka", "λάρνακα", "ларнака", "לרנקה"],
+    ["cyprus", "kypros", "κύπρος", "кипр", "кіпр", "kıbrıs", "קפריסין"],
+    ["turkey", "türkiye", "τουρκία", "турция", "туреччина", "טורקיה"],
+    ["greece", "ελλάδα", "греция", "греція", "yunanistan", "יוון"],
+    ["israel", "ισραήλ", "израиль", "ізраїль", "israil", "ישראל"],
+    ["iran", "ιράν", "иран", "іран", "איראן"],
+    ["police", "αστυνομία", "полиция", "поліція", "polis", "משטרה"],
+    ["president", "πρόεδρος", "президент", "cumhurbaşkanı", "נשיא"],
+    ["parliament", "βουλή", "парламент", "meclis", "פרלמנט"],
+    ["hospital", "νοσοκομείο", "больница", "лікарня", "hastane"],
+    ["fire", "πυρκαγιά", "пожар", "пожежа", "yangın", "שריפה"],
+    ["water", "νερό", "вода", "מים"],
+    ["court", "δικαστήριο", "суд", "mahkeme"],
+    ["minister", "υπουργός", "министр", "міністр", "bakan"],
+    ["budget", "προϋπολογισμός", "бюджет", "bütçe", "תקציב"],
+    ["election", "εκλογές", "выборы", "вибори", "seçim", "בחירות"],
+    ["university", "πανεπιστήμιο", "университет", "університет", "üniversite", "אוניברסיטה"],
+]
+
+STOPWORDS = {
+    # English
+    "the", "and", "for", "with", "that", "this", "from", "was", "were", "has",
+    "have", "had", "are", "his", "her", "their", "its", "will", "after", "over",
+    "into", "about", "said", "says", "also", "been", "which", "who", "new",
+    # Greek
+    "και", "του", "της", "των", "στο", "στη", "στην", "στον", "για", "από",
+    "με", "που", "ότι", "οι", "τα", "το", "τον", "την", "μια", "ένα", "είναι",
+    # Russian / Ukrainian
+    "и", "в", "на", "по", "что", "для", "как", "из", "от", "не", "это",
+    "года", "году", "та", "що", "від", "який", "яка",
+    # Turkish
+    "ve", "bir", "ile", "için", "bu", "da", "de", "olarak", "daha",
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_LINK_RE = re.compile(r"\[([^\]]*)\]\((https?://[^\)]+)\)")
+
+
+def _strip_diacritics(text):
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def token_key(token):
+    """Reduce one word to a script-independent matching key."""
+    word = _strip_diacritics(token.lower())
+    if word.isdigit():
+        return word
+    latin = "".join(TRANSLITERATION.get(ch, ch) for ch in word)
+    for old, new in PHONETIC_FOLDS:
+        latin = latin.replace(old, new)
+    latin = re.sub(r"(.)\1+", r"\1", latin)
+    return latin[:KEY_LENGTH]
+
+
+def _build_lexicon():
+    lexicon = {}
+    for group in CROSS_LINGUAL_LEXICON:
+        canonical = token_key(group[0])
+        for variant in group:
+            lexicon[token_key(variant)] = canonical
+    return lexicon
+
+
+_LEXICON = _build_lexicon()
+_STOP_KEYS = {_strip_diacritics(w) for w in STOPWORDS}
+
+
+def tokenize(text):
+    """Turn free text in any of the newsletter languages into matching keys."""
+    keys = []
+    for token in _TOKEN_RE.findall(text or ""):
+        lowered = _strip_diacritics(token.lower())
+        if lowered in _STOP_KEYS:
+            continue
+        if len(lowered) < 3 and not lowered.isdigit():
+            continue
+        key = token_key(token)
+        keys.append(_LEXICON.get(key, key))
+    return keys
+
+
+def strip_links(text):
+    """Remove markdown links (and the commas separating them) from a line."""
+    return re.sub(r"[\s,]+$", "", _LINK_RE.sub("", text)).strip()
+
+
+def extract_bullets(summary_text):
+    """Return the text of each `- ` bullet, with any existing links removed."""
+    bullets = []
+    for line in summary_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("- ") or stripped.startswith("• "):
+            bullets.append(strip_links(stripped[2:]))
+    return bullets
+
+
+class BM25Index:
+    """Minimal BM25 over pre-tokenized documents."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in documents]
+        self.doc_lens = [len(doc) for doc in documents]
+        self.avg_len = (sum(self.doc_lens) / len(documents)) if documents else 0.0
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query_terms, index):
+        tf = self.term_freqs[index]
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lens[index] / (self.avg_len or 1))
+        total = 0.0
+        for term in set(query_terms):
+            freq = tf.get(term)
+            if not freq:
+                continue
+            total += self.idf[term] * freq * (self.k1 + 1) / (freq + length_norm)
+        return total
+
+    def scores(self, query_terms):
+        return [self.score(query_terms, i) for i in range(len(self.term_freqs))]
+
+
+def article_text(article):
+    return f"{article.get('t') or ''} {article.get('a') or ''}"
+
+
+def rank_articles_for_bullets(bullets, articles, top_k=DEFAULT_TOP_K):
+    """For each bullet, return [(article_index, score), ...] best first.
+
+    At most `top_k` articles are kept per source tag, and only articles
+    sharing at least one key with the bullet are returned.
+    """
+    index = BM25Index([tokenize(article_text(a)) for a in articles])
+    ranked = []
+    for bullet in bullets:
+        query = tokenize(bullet)
+        scored = [(i, s) for i, s in enumerate(index.scores(query)) if s > 0]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        per_tag = Counter()
+        kept = []
+        for i, s in scored:
+            tag = articles[i].get("tag")
+            if per_tag[tag] >= top_k:
+                continue
+            per_tag[tag] += 1
+            kept.append((i, s))
+        ranked.append(kept)
+    return ranked
+
+
+def select_candidates(summary_text, articles, top_k=DEFAULT_TOP_K, min_coverage=MIN_BULLET_COVERAGE):
+    """Union of the top candidates for every bullet, in original article order.
+
+    If too few bullets match anything (e.g. a Hebrew summary against English
+    articles, where only lexicon names and numbers overlap), retrieval is not
+    trustworthy and the full article list is returned instead.
+    """
+    bullets = extract_bullets(summary_text)
+    if not bullets or not articles:
+        return list(articles)
+    ranked = rank_articles_for_bullets(bullets, articles, top_k=top_k)
+    covered = sum(1 for r in ranked if r)
+    if covered < min_coverage * len(bullets):
+        print(f"⚠️ Candidate retrieval matched only {covered}/{len(bullets)} bullets; sending all articles.")
+        return list(articles)
+    keep = set()
+    for r in ranked:
+        keep.update(i for i, _ in r)
+    return [a for i, a in enumerate(articles) if i in keep]
+
+
+def compact_articles(articles, max_abstract_chars=MAX_ABSTRACT_CHARS):
+    """Drop empty fields and trim long abstracts before sending to the model."""
+    compact = []
+    for a in articles:
+        entry = {"t": a.get("t"), "u": a.get("u"), "tag": a.get("tag")}
+        abstract = a.get("a")
+        if abstract:
+            entry["a"] = abstract[:max_abstract_chars]
+        compact.append(entry)
+    return compact
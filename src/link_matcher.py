@@ -0,0 +1,252 @@
+"""Deterministic bullet ↔ article matching for the linking step.
+
+Most bullets have one obvious article per source: the same names, the same
+place, the same figures. This module scores every bullet against every
+candidate article and inserts the `[(TAG)](url)` links itself when the best
+article for a source is both strong and clearly ahead of the runner-up.
+Only the remaining (ambiguous) bullets are sent to the LLM linker.
+
+A bullet's score against an article is the BM25 score of their shared
+keys (see link_candidates), plus a bonus for every shared named entity
+(capitalised word) and every shared number (dates, amounts, counts).
+
+Per source tag a bullet is either:
+  - "confident": best score >= min_score and >= min_margin ahead of the
+    next article from the same source,
+  - "none": best score below min_candidate_score, nothing plausible,
+  - "unsure": anything in between.
+
+A bullet is linked locally when it has at least one confident tag and no
+unsure ones; every other bullet is ambiguous and goes to the LLM.
+Thresholds are tuned with src/evaluate_link_matcher.py.
+"""
+
+import re
+
+from link_candidates import BM25Index, article_text, strip_links, tokenize
+
+MIN_SCORE = 8.0
+MIN_MARGIN = 3.0
+MIN_CANDIDATE_SCORE = 3.0
+ENTITY_WEIGHT = 2.0
+NUMBER_WEIGHT = 2.0
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_NUMBER_RE = re.compile(r"\d[\d.,]*\d|\d")
+_SENTENCE_START_RE = re.compile(r"(?:^|[.!?:]\s+)(\w+)", re.UNICODE)
+
+
+def extract_entities(text):
+    """Keys of capitalised words that do not just start a sentence."""
+    text = text or ""
+    sentence_starts = {m.start(1) for m in _SENTENCE_START_RE.finditer(text)}
+    entities = set()
+    for match in _WORD_RE.finditer(text):
+        word = match.group(0)
+        if match.start() in sentence_starts or not word[0].isupper():
+            continue
+        entities.update(tokenize(word))
+    return entities
+
+
+def extract_numbers(text):
+    """Numbers with separators removed; single digits are too common to count."""
+    numbers = set()
+    for raw in _NUMBER_RE.findall(text or ""):
+        digits = re.sub(r"[.,]", "", raw)
+        if len(digits) >= 2:
+            numbers.add(digits)
+    return numbers
+
+
+class ArticleMatcher:
+    """Scores free text against a fixed list of articles."""
+
+    def __init__(self, articles):
+        self.articles = articles
+        texts = [article_text(a) for a in articles]
+        self.index = BM25Index([tokenize(t) for t in texts])
+        self.entities = [extract_entities(a.get("t")) for a in articles]
+        self.numbers = [extract_numbers(t) for t in texts]
+        # Tags in first-seen order, which follows the configured source order
+        self.tags = list(dict.fromkeys(a.get("tag") for a in articles))
+
+    def scores(self, text):
+        keys = tokenize(text)
+        entities = extract_entities(text)
+        numbers = extract_numbers(text)
+        scores = []
+        for i, bm25 in enumerate(self.index.scores(keys)):
+            bonus = (ENTITY_WEIGHT * len(entities & self.entities[i])
+                     + NUMBER_WEIGHT * len(numbers & self.numbers[i]))
+            scores.append(bm25 + bonus)
+        return scores
+
+    def match(self, text, min_score=MIN_SCORE, min_margin=MIN_MARGIN,
+              min_candidate_score=MIN_CANDIDATE_SCORE):
+        """Per tag: (status, best article index or None, best score)."""
+        scores = self.scores(text)
+        by_tag = {}
+        for i, score in enumerate(scores):
+            by_tag.setdefault(self.articles[i].get("tag"), []).append((score, i))
+
+        result = {}
+        for tag in self.tags:
+            ranked = sorted(by_tag.get(tag, []), reverse=True)
+            best, best_idx = ranked[0] if ranked else (0.0, None)
+            runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+            if best < min_candidate_score:
+                result[tag] = ("none", None, best)
+            elif best >= min_score and best - runner_up >= min_margin:
+                result[tag] = ("confident", best_idx, best)
+            else:
+                result[tag] = ("unsure", best_idx, best)
+        return result
+
+
+def is_bullet(line):
+    stripped = line.strip()
+    return stripped.startswith("- ") or stripped.startswith("• ")
+
+
+def match_bullets(summary_text, articles, min_score=MIN_SCORE, min_margin=MIN_MARGIN,
+                  min_candidate_score=MIN_CANDIDATE_SCORE):
+    """Match every bullet line of `summary_text`.
+
+    Returns one dict per bullet: line index, bullet text (links removed),
+    `links` as {tag: url} for confident tags, and `ambiguous` when the
+    bullet should be left to the LLM.
+    """
+    matcher = ArticleMatcher(articles)
+    matches = []
+    for line_idx, line in enumerate(summary_text.splitlines()):
+        if not is_bullet(line):
+            continue
+        text = strip_links(line.strip()[2:])
+        per_tag = matcher.match(text, min_score, min_margin, min_candidate_score)
+        statuses = [status for status, _, _ in per_tag.values()]
+        links = {
+            tag: articles[idx]["u"]
+            for tag, (status, idx, _) in per_tag.items()
+            if status == "confident"
+        }
+        matches.append({
+            "line": line_idx,
+            "text": text,
+            "links": links,
+            "ambiguous": not links or "unsure" in statuses,
+        })
+    return matches
+
+
+def format_links(links):
+    return ", ".join(f"[({tag})]({url})" for tag, url in links.items())
+
+
+def apply_local_links(summary_text, matches):
+    """Append the links of every non-ambiguous bullet to its line."""
+    lines = summary_text.splitlines()
+    for m in matches:
+        if m["ambiguous"] or not m["links"]:
+            continue
+        lines[m["line"]] = lines[m["line"]].rstrip() + " " + format_links(m["links"])
+    return "\n".join(lines)
+
+
+def build_ambiguous_summary(summary_text, matches):
+    """Reduced summary with only the ambiguous bullets under their headers.
+
+    Returns (text, line indices of those bullets in the full summary).
+    """
+    ambiguous_lines = {m["line"] for m in matches if m["ambiguous"]}
+    reduced = []
+    pending_header = None
+    for line_idx, line in enumerate(summary_text.splitlines()):
+        if line.startswith("### "):
+            pending_header = line
+        elif line_idx in ambiguous_lines:
+            if pending_header:
+                if reduced:
+                    reduced.append("")
+                reduced.append(pending_header)
+                pending_header = None
+            reduced.append(line)
+    return "\n".join(reduced), sorted(ambiguous_lines)
+
+
+def merge_linked_bullets(summary_text, line_indices, linked_text):
+    """Put the LLM-linked bullets back in place, in order.
+
+    If the linker returned a different number of bullets they cannot be
+    matched up reliably, so the summary is returned unchanged.
+    """
+    linked_bullets = [line for line in linked_text.splitlines() if is_bullet(line)]
+    if len(linked_bullets) != len(line_indices):
+        print(f"⚠️ Linker returned {len(linked_bullets)} bullets for {len(line_indices)} ambiguous ones, "
+              "leaving them unlinked.")
+        return summary_text
+    lines = summary_text.splitlines()
+    for line_idx, linked in zip(line_indices, linked_bullets):
+        indent = lines[line_idx][: len(lines[line_idx]) - len(lines[line_idx].lstrip())]
+        lines[line_idx] = indent + linked.strip()
+    return "\n".join(lines)
+
+
+def number_bullets(summary_text):
+    """Replace each bullet marker with a [n] id so the linker can refer to it.
+
+    Returns (numbered text, line index of bullet n at position n - 1).
+    """
+    lines = summary_text.splitlines()
+    numbered = []
+    bullet_lines = []
+    for line_idx, line in enumerate(lines):
+        if is_bullet(line):
+            bullet_lines.append(line_idx)
+            numbered.append(f"[{len(bullet_lines)}] {line.strip()[2:]}")
+        else:
+            numbered.append(line)
+    return "\n".join(numbered), bullet_lines
+
+
+def existing_tags(line):
+    return set(re.findall(r"\[\((\w+)\)\]\(", line))
+
+
+def apply_link_assignments(summary_text, assignments, candidates):
+    """Append linker-chosen links to their bullets after validating them.
+
+    `assignments` is the linker's list of {"bullet", "tag", "url"}. An
+    assignment is dropped when the bullet id does not exist, the URL is not
+    one of the candidate articles, the tag is not that article's tag, or the
+    bullet already links that source. Returns (text, applied, rejected).
+    """
+    url_tags = {a["u"]: a["tag"] for a in candidates}
+    lines = summary_text.splitlines()
+    _, bullet_lines = number_bullets(summary_text)
+    new_links = {}
+    rejected = 0
+    for assignment in assignments:
+        if not isinstance(assignment, dict):
+            rejected += 1
+            continue
+        bullet, tag, url = assignment.get("bullet"), assignment.get("tag"), assignment.get("url")
+        if not isinstance(bullet, int) or not 1 <= bullet <= len(bullet_lines):
+            rejected += 1
+            continue
+        if url not in url_tags or (tag and tag != url_tags[url]):
+            rejected += 1
+            continue
+        line_idx = bullet_lines[bullet - 1]
+        links = new_links.setdefault(line_idx, {})
+        tag = url_tags[url]
+        if tag in links or tag in existing_tags(lines[line_idx]):
+            rejected += 1
+            continue
+        links[tag] = url
+
+    for line_idx, links in new_links.items():
+        if links:
+            lines[line_idx] = lines[line_idx].rstrip() + " " + format_links(links)
+    applied = sum(len(links) for links in new_links.values())
+    return "\n".join(lines), applied, rejected
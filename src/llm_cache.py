@@ -0,0 +1,133 @@
+"""Content-addressed disk cache for deterministic chat completions.
+
+A rerun of a day after a failure repeats chat completions whose inputs have
+not changed (cleanup, linking, topic detection, ...). Responses to
+temperature-0 requests are stored on disk under a hash of the request
+(model, messages, temperature, response_format and any other parameters),
+so an identical request is answered from disk.
+
+Each entry is one JSON file. Reading an entry refreshes its mtime, and
+once the directory grows past `max_bytes` the least recently used entries
+are deleted.
+
+Set LLM_CACHE_BYPASS=1 (or pass --no-cache to main.py) to skip the cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", "data/llm_cache"))
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+
+def cache_bypassed():
+    return os.getenv("LLM_CACHE_BYPASS", "").strip().lower() in ("1", "true", "yes")
+
+
+def to_namespace(value):
+    """Turn a stored response dict back into attribute access like the SDK objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(v) for v in value]
+    return value
+
+
+def request_key(body):
+    """Stable hash of a request body; identical requests share a response."""
+    encoded = json.dumps(body, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def is_cacheable(body):
+    return body.get("temperature") == 0 and not body.get("stream")
+
+
+class ResponseCache:
+    """Directory of `<key>.json` response bodies with LRU eviction."""
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                body = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by another thread after the read; the body is still good
+            pass
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(body, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+
+class _CachedCompletions:
+    def __init__(self, completions, cache):
+        self._completions = completions
+        self._cache = cache
+
+    def create(self, **body):
+        if cache_bypassed() or not is_cacheable(body):
+            return self._completions.create(**body)
+        key = request_key(body)
+        stored = self._cache.get(key)
+        if stored is not None:
+            print(f"💾 LLM cache hit ({body.get('model')})")
+            return to_namespace(stored)
+        response = self._completions.create(**body)
+        self._cache.put(key, response.model_dump())
+        return response
+
+
+class CachedClient:
+    """Wraps an OpenAI client; only chat.completions.create goes through the cache."""
+
+    def __init__(self, client, cache=None):
+        self._client = client
+        self.cache = cache or ResponseCache()
+        self.chat = SimpleNamespace(completions=_CachedCompletions(client.chat.completions, self.cache))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
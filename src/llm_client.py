@@ -0,0 +1,259 @@
+"""Shared OpenAI client used across the pipeline.
+
+Every stage gets its client from `get_client(operation)`. All of them share
+one connection pool:
+
+  - chat completions go through a single `AsyncOpenAI` client running on a
+    background event loop, so requests from the pipeline's worker threads
+    reuse the same keep-alive connections;
+  - everything else (images, audio, files, batches) uses one shared
+    synchronous `OpenAI` client.
+
+The operation name picks the request timeout from OPERATION_TIMEOUTS.
+Chat completions that fail with a timeout, connection error, rate limit or
+5xx are retried with exponential backoff and full jitter. Streamed requests
+for operations listed in HEDGE_AFTER_S are hedged: if the first request has
+not produced a token after that many seconds, a second identical request is
+sent and whichever streams first is used.
+"""
+
+import asyncio
+import random
+import threading
+from types import SimpleNamespace
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from llm_cache import CachedClient, ResponseCache
+from timing import log_metric
+
+DEFAULT_TIMEOUT_S = 120
+OPERATION_TIMEOUTS = {
+    "summarize": 180,
+    "finalize": 120,
+    "link": 90,
+    "topics": 90,
+    "translate": 180,
+    "cover": 180,
+    "transcribe": 900,
+    "batch": 120,
+}
+# Streamed operations on the critical path: seconds without a first token
+# before a duplicate request is raced against the original
+HEDGE_AFTER_S = {
+    "summarize": 30,
+    "translate": 20,
+}
+MAX_RETRIES = 3
+RETRY_BASE_DELAY_S = 1.0
+RETRY_MAX_DELAY_S = 30.0
+POOL_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def retry_delay(attempt):
+    """Full-jitter exponential backoff for the given (0-based) retry."""
+    return random.uniform(0, min(RETRY_MAX_DELAY_S, RETRY_BASE_DELAY_S * 2 ** attempt))
+
+
+async def with_retries(call, operation, max_retries=MAX_RETRIES):
+    """Await `call()`, retrying transient API errors with jittered backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except RETRYABLE_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt)
+            print(f"⚠️ {operation} request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            log_metric("llm_retry", operation=operation, attempt=attempt + 1, error=e.__class__.__name__)
+            await asyncio.sleep(delay)
+
+
+async def hedged(attempt, hedge_after, operation, discard=None):
+    """Race a second `attempt()` if the first is not done after `hedge_after` seconds.
+
+    Returns the first successful result. A result that loses the race is
+    passed to `discard` (e.g. to close its stream).
+    """
+    first = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after)
+    if done:
+        return first.result()
+
+    print(f"⏱️ {operation}: no tokens after {hedge_after}s, sending a hedged request")
+    second = asyncio.ensure_future(attempt())
+    pending = {first, second}
+    winner = None
+    error = None
+    while pending and winner is None:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                error = task.exception()
+            elif winner is None:
+                winner = task
+            elif discard:
+                await discard(task.result())
+    for task in pending:
+        task.cancel()
+    if winner is None:
+        raise error
+    log_metric("llm_hedge", operation=operation, winner="hedge" if winner is second else "first")
+    return winner.result()
+
+
+class _LoopThread:
+    """Event loop on a daemon thread; `run` executes a coroutine from sync code."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="llm-client-loop", daemon=True).start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+class _SyncStream:
+    """Iterates an AsyncStream from a regular thread."""
+
+    _END = object()
+
+    def __init__(self, loop, stream, first_chunk):
+        self._loop = loop
+        self._stream = stream
+        self._first_chunk = first_chunk
+
+    async def _next(self):
+        try:
+            return await self._stream.__anext__()
+        except StopAsyncIteration:
+            return self._END
+
+    def __iter__(self):
+        if self._first_chunk is not None:
+            yield self._first_chunk
+        while True:
+            chunk = self._loop.run(self._next())
+            if chunk is self._END:
+                return
+            yield chunk
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._stream.close(), self._loop.loop)
+
+
+class ClientPool:
+    """The shared async and sync clients plus the loop the async one runs on."""
+
+    def __init__(self, async_client=None, sync_client=None):
+        self.loop = _LoopThread()
+        self.async_client = async_client or AsyncOpenAI(
+            max_retries=0,
+            http_client=openai.DefaultAsyncHttpxClient(limits=POOL_LIMITS),
+        )
+        self._sync_client = sync_client
+        self._lock = threading.Lock()
+
+    @property
+    def sync_client(self):
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = OpenAI(http_client=openai.DefaultHttpxClient(limits=POOL_LIMITS))
+            return self._sync_client
+
+
+class _OperationCompletions:
+    def __init__(self, pool, operation):
+        self._pool = pool
+        self._operation = operation
+
+    def create(self, **body):
+        timeout = OPERATION_TIMEOUTS.get(self._operation, DEFAULT_TIMEOUT_S)
+        create = self._pool.async_client.chat.completions.create
+        if not body.get("stream"):
+            return self._pool.loop.run(
+                with_retries(lambda: create(**body, timeout=timeout), self._operation))
+
+        async def open_stream():
+            stream = await create(**body, timeout=timeout)
+            try:
+                return stream, await stream.__anext__()
+            except StopAsyncIteration:
+                return stream, None
+            except BaseException:
+                # Includes cancellation when a hedged request wins
+                await stream.close()
+                raise
+
+        async def discard(result):
+            await result[0].close()
+
+        hedge_after = HEDGE_AFTER_S.get(self._operation)
+        if hedge_after:
+            call = lambda: hedged(open_stream, hedge_after, self._operation, discard)
+        else:
+            call = open_stream
+        stream, first_chunk = self._pool.loop.run(with_retries(call, self._operation))
+        return _SyncStream(self._pool.loop, stream, first_chunk)
+
+
+class OperationClient:
+    """Client view for one operation: chat goes async, the rest to the sync client."""
+
+    supports_streaming = True
+
+    def __init__(self, pool, operation=None):
+        self._pool = pool
+        self.operation = operation
+        self.chat = SimpleNamespace(completions=_OperationCompletions(pool, operation))
+
+    def __getattr__(self, name):
+        timeout = OPERATION_TIMEOUTS.get(self.operation, DEFAULT_TIMEOUT_S)
+        return getattr(self._pool.sync_client.with_options(timeout=timeout), name)
+
+
+_pool = None
+_cache = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool, _cache
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+            _cache = ResponseCache()
+        return _pool
+
+
+def get_client(operation=None):
+    """Shared client for `operation`; temperature-0 chat completions go through the disk cache."""
+    pool = get_pool()
+    return CachedClient(OperationClient(pool, operation), _cache)
+
+
+def cached_prompt_tokens(usage):
+    """Prompt tokens served from the provider's prompt cache (0 if not reported)."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def log_prompt_cache(label, usage, **context):
+    """Record prompt vs cached-prefix tokens for one response in the timings log."""
+    if usage is None:
+        return
+    log_metric(
+        label,
+        prompt_tokens=usage.prompt_tokens,
+        cached_tokens=cached_prompt_tokens(usage),
+        **context,
+    )
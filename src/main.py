@@ -1,14 +1,17 @@
 import argparse
 import os
+from contextlib import ExitStack
 import re
 from pathlib import Path
 import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 import requests
 from zoneinfo import ZoneInfo
 
-from openai import OpenAI
+from llm_client import get_client
 
 from article_loaders.cm_loader import refresh_cm
 from helpers import get_media_folder_for_day, get_root_folder_for_day, get_text_folder_for_day, make_folders
@@ -35,17 +38,27 @@ LANG_REFRESHERS = {
         ("Kıbrıs Postası", refresh_kibrispostasi),
     ],
 }
-from post_to_substack import post_to_substack
-from summarize import load_articles, summarize_for_day, link_articles_to_summary, strip_summary_marker, split_summary, get_article_sources, reorder_sections
+from post_to_substack import SubstackPoster, post_to_substack
+from substack_api import SubstackAPIError, publish_via_api
+from summarize import (
+    LINK_SECTION_WORKERS, load_articles, generate_headlines_for_day, headlines_path, generate_summary_for_day, finalize_summary_for_day, link_summary,
+    strip_summary_marker, split_summary, get_article_sources, reorder_sections, is_top_stories_section,
+)
 from ongoing_topics import (
-    load_ongoing_topics, save_ongoing_topics, expire_topics,
-    detect_ongoing_topics, update_topics, restructure_summary_with_topics,
+    load_ongoing_topics, save_ongoing_topics, topics_lock, expire_topics,
+    detect_ongoing_topics, update_topics, assign_bullets_to_topics, apply_topic_assignments,
+    EARLY_DETECT_MODEL,
 )
-from image import generate_cover_from_md
+from image import best_cover_variant, generate_cover_from_md, optimize_cover
 from transcribe import transcribe_for_day
 from timing import timing_step
-from lang_config import load_language_config, get_translation_languages, get_native_summary_languages, get_source_language
-from translate import translate_summary
+from pipeline import Journal, Pipeline, Stage, load_stage_durations
+from persistence import file_lock
+from lang_config import (
+    load_language_config, get_translation_languages, get_native_summary_languages, get_source_language,
+    get_publish_backend,
+)
+from translate import translate_summary, translate_summary_batch
 from date_heading import generate_date_heading
 
 
@@ -54,6 +67,20 @@ START_HOUR = 6  # Don't process until 6am — more articles available by then
 
 
 MIN_VIDEO_SIZE_MB = 100
+# Marker written once ongoing topics have been detected for the day
+TOPICS_FLAG_FILENAME = "topics_flag.txt"
+# Marker written once topics have been detected from the headlines
+EARLY_TOPICS_FLAG_FILENAME = "early_topics_flag.txt"
+# How long posting waits for a cover that is still being generated
+COVER_WAIT_TIMEOUT_S = 300
+# Completed stages of the day with output hashes (see pipeline.Journal)
+JOURNAL_FILENAME = "journal.jsonl"
+# Held for the whole run: <day>/run.lock
+RUN_LOCK_NAME = "run"
+# Link translated sections while the rest of the translation streams in
+STREAM_LINK_TRANSLATIONS = True
+# How long linking during a translation waits for the article refresh
+REFRESH_WAIT_TIMEOUT_S = 900
 
 def download_video(url, local_path):
     response = requests.get(url, stream=True)
@@ -103,9 +130,7 @@ def refresh_saved_articles():
     except Exception as e:
         print(f"⚠️ Failed to refresh English Politis: {e}")
 
-def generate_for_date(day: date):
-    make_folders(day)
-
+def video_urls_for_day(day: date):
     date_str = day.strftime('%d%m%y')  # e.g. 280625
     bases = [
         "https://v6.cloudskep.com/rikvod/idisisstisokto",
@@ -118,339 +143,617 @@ def generate_for_date(day: date):
         f"/8news_{date_str}.mp4?attachment=true",
         f"/d8news{date_str}.mp4?attachment=true",
     ]
-    video_urls = [b + s for s in suffixes for b in bases]
+    return [b + s for s in suffixes for b in bases]
+
 
-    # Target paths
+def day_paths(day: date):
     media = get_media_folder_for_day(day)
     txt = get_text_folder_for_day(day)
-
-    local_filename_video = media /  f"video.mp4"
-    local_filename_audio = media /  f"audio.mp3"
-    local_filename_audio_short_prefix = media /  f"split_audio"
-    text_gr = txt / f"transcript_gr.txt"
-    summary_md = txt /  f"summary.txt"
-    cover_file = txt /  f"cover.png"
-    log_context = {
-        "date": day.isoformat(),
-        "video_path": local_filename_video,
-        "audio_path": local_filename_audio,
-        "transcript_path": text_gr,
-        "summary_path": summary_md,
-        "cover_path": cover_file,
+    return {
+        "video": media / "video.mp4",
+        "audio": media / "audio.mp3",
+        "audio_short_prefix": media / "split_audio",
+        "transcript": txt / "transcript_gr.txt",
+        "summary": txt / "summary.txt",
+        "cover": txt / "cover.png",
+        "cover_failed": txt / "cover_failed.txt",
+        "topics_flag": txt / TOPICS_FLAG_FILENAME,
+        "early_topics_flag": txt / EARLY_TOPICS_FLAG_FILENAME,
     }
 
-    # Skip if text already exists
-    if os.path.exists(text_gr):
-        print(f"{text_gr} exists — skipping video download, audio extraction, and transcription.")
 
-    else:
-        # Download video if needed
-        if os.path.exists(local_filename_video):
-            print(f"{local_filename_video} exists.")
-        else:
-            print(f"Downloading video to {local_filename_video}...")
-            with timing_step(
-                "video_download",
-                **log_context,
-                urls=video_urls,
-            ):
-                errors = []
-                for i, url in enumerate(video_urls):
-                    try:
-                        download_video(url, local_filename_video)
-                        print(f"✅ Downloaded from: {url}")
-                        break
-                    except Exception as e:
-                        errors.append(f"  {url}: {e}")
-                        if i == len(video_urls) - 1:
-                            print("❌ All video URLs failed:\n" + "\n".join(errors))
-                            raise
-                
-                
-
-        # Extract audio if needed
-        if os.path.exists(local_filename_audio):
-            print(f"{local_filename_audio} exists.")
-        else:
-            print(f"Extracting audio to {local_filename_audio}...")
-            with timing_step("audio_extract_segment", **log_context):
-                extract_audio(local_filename_video, local_filename_audio, local_filename_audio_short_prefix)
-        
-        if os.path.exists(text_gr):
-            print(f"{text_gr} exists.")
-        else:
-            print(f"Transcribing text to {text_gr}...")
-            with timing_step("transcription", **log_context):
-                transcribe_for_day(day)
-        # if os.path.exists(text_gr):
-        #     try:
-        #         shutil.rmtree(media)
-        #         print(f"🗑️ Deleted media folder: {media}")
-        #     except Exception as e:
-        #         print(f"⚠️ Failed to delete media folder {media}: {e}")
-    if os.path.exists(summary_md):
-        print(f"{summary_md} exists.")
-    else:
-        print(f"Summarizing text to {summary_md}...")
-        with timing_step("summarization", **log_context):
-            refresh_saved_articles()
-            summarize_for_day(day)
-        
-    # NEW: load from file and generate cover.png in same folder
-    if os.path.exists(cover_file):
-        print(f"{cover_file} exists.")
-        return False
-    else:
-        try:
-            with timing_step("cover_generation", **log_context):
-                md_text = Path(summary_md).read_text(encoding="utf-8")
-                from openai import OpenAI
-                # Reuse your OpenAI client
-                client = OpenAI()
-                out_dir = Path(summary_md).parent
-                generate_cover_from_md(
-                    client=client,
-                    day=day,
-                    markdown=md_text,
-                    out_dir=str(out_dir),
-                    allow_faces=True,     # flip to False if needed on sensitive days
-                    lead_subject=None,    # or pass an explicit subject
-                    model="gpt-image-1"
-                )
-        except Exception as e:
-            print(f"⚠️ Failed to read {summary_md} for cover generation: {e}")
-    return True
+def download_stage(day: date):
+    paths = day_paths(day)
+    video_urls = video_urls_for_day(day)
+    print(f"Downloading video to {paths['video']}...")
+    with timing_step("video_download", date=day.isoformat(), video_path=paths["video"], urls=video_urls):
+        errors = []
+        for i, url in enumerate(video_urls):
+            try:
+                download_video(url, paths["video"])
+                print(f"✅ Downloaded from: {url}")
+                break
+            except Exception as e:
+                errors.append(f"  {url}: {e}")
+                if i == len(video_urls) - 1:
+                    print("❌ All video URLs failed:\n" + "\n".join(errors))
+                    raise
 
-def main():
-    parser = argparse.ArgumentParser(description="Generate and post Cyprus news summary.")
-    parser.add_argument("date", nargs="?", help="Date in YYYY-MM-DD format (defaults to yesterday)")
-    parser.add_argument("--draft", action="store_true", help="Save draft instead of publishing")
-    parser.add_argument("--no-post", action="store_true", help="Skip Substack posting entirely (generate summaries only)")
-    parser.add_argument("--lang", type=str, help="Run only a specific language pipeline (e.g. 'el'). English files must already exist for translation languages.")
 
-    args = parser.parse_args()
+def extract_stage(day: date):
+    paths = day_paths(day)
+    print(f"Extracting audio to {paths['audio']}...")
+    with timing_step("audio_extract_segment", date=day.isoformat(), video_path=paths["video"], audio_path=paths["audio"]):
+        extract_audio(paths["video"], paths["audio"], paths["audio_short_prefix"])
 
-    if args.date:
-        try:
-            day = datetime.strptime(args.date, "%Y-%m-%d").date()
-        except ValueError:
-            print("❌ Invalid date format. Use YYYY-MM-DD (e.g. 2025-06-01).")
-            return
-    else:
-        now_cy = datetime.now(CY_TZ)
-        if now_cy.hour < START_HOUR:
-            print(f"⏳ It's {now_cy.strftime('%H:%M')} in Cyprus — too early, waiting until {START_HOUR}:00.")
-            return
-        day = now_cy.date() - timedelta(days=1)
 
-    txt = get_text_folder_for_day(day)
-    cover_path = txt / "cover.png"
-    post = False if args.draft else True
-    no_post = args.no_post
-    run_lang = args.lang  # None means run all
+def transcribe_stage(day: date):
+    paths = day_paths(day)
+    print(f"Transcribing text to {paths['transcript']}...")
+    with timing_step("transcription", date=day.isoformat(), transcript_path=paths["transcript"]):
+        transcribe_for_day(day)
 
-    config = load_language_config()
-    native_langs = get_native_summary_languages(config)
-    translation_langs = get_translation_languages(config)
 
-    # Apply --lang filter
-    if run_lang and run_lang != "en":
-        if run_lang in native_langs:
-            native_langs = {run_lang: native_langs[run_lang]}
-        else:
-            native_langs = {}
-        if run_lang in translation_langs:
-            translation_langs = {run_lang: translation_langs[run_lang]}
-        else:
-            translation_langs = {}
+def generate_summary_stage(day: date, lang="en"):
+    print(f"Summarizing transcript in {lang}...")
+    with timing_step("summarization", date=day.isoformat(), lang=lang):
+        generate_summary_for_day(day, lang=lang)
 
-    # =========================================================
-    # PHASE 1: Generate all summaries
-    # =========================================================
 
-    # --- English ---
-    if run_lang is None or run_lang == "en":
-        generate_for_date(day)
+def finalize_summary_stage(day: date, lang="en"):
+    print(f"Cleaning up and linking {lang} summary...")
+    with timing_step("summarize_finalize", date=day.isoformat(), lang=lang):
+        finalize_summary_for_day(day, lang=lang)
 
-        # --- Ongoing topic detection (runs on English summary) ---
-        en_summary_without_links = txt / config["en"]["summary_without_links_filename"]
-        if en_summary_without_links.exists():
-            try:
-                with timing_step("detect_ongoing_topics", date=day.isoformat()):
-                    topics_data = load_ongoing_topics()
-                    topics_data = expire_topics(topics_data, day)
-
-                    summary_text = en_summary_without_links.read_text(encoding="utf-8")
-                    client = OpenAI()
-                    detected = detect_ongoing_topics(
-                        client, summary_text, topics_data["topics"], day
+
+class CoverHandoff:
+    """Hands this run's cover from the cover stage to the post stages.
+
+    Finished by the cover stage with the file to upload (None if it
+    failed), or up front by main() when the cover stage will not run.
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.path = None
+
+    def finish(self, path=None):
+        self.path = path
+        self._done.set()
+
+    def wait(self, timeout):
+        return self._done.wait(timeout)
+
+
+def cover_stage(day: date, cover=None):
+    """Generate the cover and its upload variants; returns the file to upload."""
+    paths = day_paths(day)
+    headlines_md = headlines_path(day)
+    chosen = None
+    try:
+        with timing_step("cover_generation", date=day.isoformat(), headlines_path=headlines_md, cover_path=paths["cover"]):
+            # The image only needs the Top stories, which the headline pass
+            # produces long before the summary is finished
+            md_text = headlines_md.read_text(encoding="utf-8")
+            client = get_client("cover")
+            out_dir = paths["cover"].parent
+            generated = generate_cover_from_md(
+                client=client,
+                day=day,
+                markdown=md_text,
+                out_dir=str(out_dir),
+                allow_faces=True,     # flip to False if needed on sensitive days
+                lead_subject=None,    # or pass an explicit subject
+                model="gpt-image-1"
+            )
+        if not generated:
+            raise RuntimeError("no image was generated")
+        # Encode the upload variants here, off the posting path
+        chosen = optimize_cover(generated)
+    except Exception as e:
+        # Posting goes ahead without a cover. The marker ends the stage for
+        # the day, so later hourly runs don't pay for another image.
+        print(f"⚠️ Cover generation failed: {e}")
+        paths["cover_failed"].write_text(f"{e}\n", encoding="utf-8")
+    finally:
+        if cover is not None:
+            cover.finish(chosen)
+    return chosen
+
+
+def headlines_stage(day: date):
+    print("Summarizing headlines...")
+    generate_headlines_for_day(day)
+
+
+def early_topics_stage(day: date):
+    """Detect today's ongoing topics from the headlines, before summarization.
+
+    New topics are saved right away, so the chunk prompts already include
+    their sections and the post-summary detection usually finds nothing
+    new to restructure. Non-fatal, like detect_topics_stage.
+    """
+    try:
+        headlines = generate_headlines_for_day(day)
+        with timing_step("detect_ongoing_topics_early", date=day.isoformat()), topics_lock():
+            topics_data = expire_topics(load_ongoing_topics(), day)
+            detected = detect_ongoing_topics(
+                get_client("topics"), headlines, topics_data["topics"], day, model=EARLY_DETECT_MODEL,
+            )
+            topics_data, topics_changed = update_topics(topics_data, detected, day)
+            save_ongoing_topics(topics_data)
+        (get_text_folder_for_day(day) / EARLY_TOPICS_FLAG_FILENAME).touch()
+    except Exception as e:
+        print(f"⚠️ Early ongoing topic detection failed (non-fatal): {e}")
+
+
+def detect_topics_stage(day: date, config):
+    """Detect ongoing topics on the English summary and restructure it if new ones appear.
+
+    Failures are non-fatal: the flag file is only written on success, so
+    detection is retried on the next run.
+    """
+    txt = get_text_folder_for_day(day)
+    en_summary_without_links = txt / config["en"]["summary_without_links_filename"]
+    if not en_summary_without_links.exists():
+        return
+    try:
+        with timing_step("detect_ongoing_topics", date=day.isoformat()):
+            summary_text = en_summary_without_links.read_text(encoding="utf-8")
+            client = get_client("topics")
+            with topics_lock():
+                topics_data = load_ongoing_topics()
+                topics_data = expire_topics(topics_data, day)
+                detected = detect_ongoing_topics(
+                    client, summary_text, topics_data["topics"], day
+                )
+                topics_data, topics_changed = update_topics(topics_data, detected, day)
+                save_ongoing_topics(topics_data)
+
+            if topics_changed:
+                print("🔄 New ongoing topics detected, restructuring English summary...")
+                # One assignment call; applied to the unlinked summary and,
+                # by bullet text (the closest bullet where cleanup reworded
+                # one), to the linked one
+                assignments = assign_bullets_to_topics(client, summary_text, topics_data["topics"], lang="en")
+                en_summary_final = txt / config["en"]["summary_filename"]
+                for path in (en_summary_without_links, en_summary_final):
+                    if not path.exists():
+                        continue
+                    restructured = apply_topic_assignments(
+                        path.read_text(encoding="utf-8"), assignments, topics_data["topics"], lang="en"
                     )
+                    path.write_text(restructured, encoding="utf-8")
+                    print(f"✅ Restructured summary saved to {path}")
+        (txt / TOPICS_FLAG_FILENAME).touch()
+    except Exception as e:
+        print(f"⚠️ Ongoing topic detection failed (non-fatal): {e}")
+        import traceback
+        traceback.print_exc()
 
-                    topics_data, topics_changed = update_topics(topics_data, detected, day)
-                    save_ongoing_topics(topics_data)
-
-                    if topics_changed:
-                        print("🔄 New ongoing topics detected, restructuring English summary...")
-                        restructured = restructure_summary_with_topics(
-                            client, summary_text, topics_data["topics"], lang="en"
-                        )
-                        en_summary_without_links.write_text(restructured, encoding="utf-8")
-                        print(f"✅ Restructured summary saved to {en_summary_without_links}")
-
-                        # Also restructure the final linked summary if it exists
-                        en_summary_final = txt / config["en"]["summary_filename"]
-                        if en_summary_final.exists():
-                            final_text = en_summary_final.read_text(encoding="utf-8")
-                            restructured_final = restructure_summary_with_topics(
-                                client, final_text, topics_data["topics"], lang="en"
-                            )
-                            en_summary_final.write_text(restructured_final, encoding="utf-8")
-                            print(f"✅ Restructured final summary saved to {en_summary_final}")
-            except Exception as e:
-                print(f"⚠️ Ongoing topic detection failed (non-fatal): {e}")
-                import traceback
-                traceback.print_exc()
 
-    # --- Native summary languages (e.g. Greek) ---
-    for lang, lang_cfg in native_langs.items():
+def refresh_sources(refreshers):
+    for name, refresher in refreshers:
         try:
-            target_output_file = txt / lang_cfg["summary_filename"]
-
-            if not target_output_file.exists():
-                for name, refresher in LANG_REFRESHERS.get(lang, []):
-                    try:
-                        refresher()
-                    except Exception as e:
-                        print(f"⚠️ Failed to refresh {name}: {e}")
-
-                print(f"Summarizing natively in {lang}...")
-                with timing_step("summarize_native", date=day.isoformat(), lang=lang):
-                    summarize_for_day(day, lang=lang)
-            else:
-                print(f"{target_output_file} exists — skipping {lang} native summarization.")
+            refresher()
         except Exception as e:
-            print(f"❌ Error generating native summary for '{lang}': {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"⚠️ Failed to refresh {name}: {e}")
 
-    # --- Translation languages ---
-    for lang, lang_config in translation_langs.items():
-        try:
-            source_lang = get_source_language(lang_config)
-            source_summary_file = txt / config[source_lang]["summary_without_links_filename"]
 
-            if not source_summary_file.exists():
-                print(f"⚠️ Source summary for {source_lang} not found, skipping {lang}")
-                continue
+def read_source_body(day: date, source_lang, config):
+    """Body (from the first ### header) of the summary translations start from."""
+    txt = get_text_folder_for_day(day)
+    source_summary_file = txt / config[source_lang]["summary_without_links_filename"]
+    if not source_summary_file.exists():
+        raise FileNotFoundError(f"Source summary for {source_lang} not found: {source_summary_file}")
+
+    source_text = source_summary_file.read_text(encoding="utf-8")
+    body_match = re.search(r'(### .+)', source_text, re.DOTALL)
+    return body_match.group(1) if body_match else source_text
+
+
+def save_translation(day: date, lang, lang_config, translated):
+    first_sections = lang_config.get("first_sections")
+    if first_sections:
+        translated = reorder_sections(translated, first_sections)
+
+    target_summary_file = get_text_folder_for_day(day) / lang_config["summary_without_links_filename"]
+    date_heading = generate_date_heading(day, lang)
+    target_summary_file.write_text(
+        date_heading + "\n\n" + translated, encoding="utf-8"
+    )
+    print(f"✅ Translated summary saved to {target_summary_file}")
+
+
+def translate_stage(day: date, lang, lang_config, config, client=None, link_as_streamed=False,
+                    wait_for_articles=None):
+    """Translate the source summary and save it (without links) for `lang`.
+
+    With `link_as_streamed`, each translated section is linked as soon as
+    the stream completes it, and the final linked summary is saved too, so
+    linking overlaps the rest of the translation instead of following it.
+    The articles are loaded once `wait_for_articles` returns (the refresh
+    stages finishing), on the linking threads, so the translation itself
+    never waits for the refresh.
+    """
+    source_body = read_source_body(day, get_source_language(lang_config), config)
+    article_sources = lang_config.get("article_sources", [])
+    link_as_streamed = link_as_streamed and bool(article_sources)
+
+    print(f"Translating summary to {lang}...")
+    client = client or get_client("translate")
+    on_section = None
+    if link_as_streamed:
+        link_prompt = Path("src/prompts/link_prompt.txt").read_text(encoding="utf-8").strip()
+        executor = ThreadPoolExecutor(max_workers=LINK_SECTION_WORKERS)
+        linked_sections = []
+
+        def refreshed_articles():
+            if wait_for_articles:
+                wait_for_articles()
+            return load_articles(day - timedelta(days=1), day + timedelta(days=1), article_sources)
+
+        # Submitted first, so it holds the first worker while sections queue up
+        articles = executor.submit(refreshed_articles)
+
+        def link_section(section):
+            if is_top_stories_section(section):
+                return section
+            linked, _ = link_summary(client, section, articles.result(), link_prompt, article_sources)
+            return linked.strip()
+
+        def on_section(section):
+            linked_sections.append(executor.submit(link_section, section))
 
-            target_summary_file = txt / lang_config["summary_without_links_filename"]
-            target_output_file = txt / lang_config["summary_filename"]
+    try:
+        with timing_step("translate_summary", date=day.isoformat(), lang=lang, link_as_streamed=link_as_streamed):
+            translated, usage = translate_summary(client, source_body, target_lang=lang, on_section=on_section)
+        # Save before waiting on the links, so a failed link call cannot lose the translation
+        save_translation(day, lang, lang_config, translated)
+        if not link_as_streamed:
+            return
+        try:
+            with timing_step("translate_link_articles_wait", date=day.isoformat(), lang=lang):
+                linked = "\n\n".join(f.result() for f in linked_sections)
+        except Exception as e:
+            # link_<lang> links the saved translation instead
+            print(f"⚠️ Linking {lang} sections while streaming failed, leaving it to the link stage: {e}")
+            return
+    finally:
+        if link_as_streamed:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    first_sections = lang_config.get("first_sections")
+    if first_sections:
+        linked = reorder_sections(linked, first_sections)
+    target_output_file = get_text_folder_for_day(day) / lang_config["summary_filename"]
+    final = strip_summary_marker(generate_date_heading(day, lang) + "\n\n" + linked)
+    target_output_file.write_text(final, encoding="utf-8")
+    print(f"✅ Final {lang} summary saved to {target_output_file}")
+
+
+def translate_batch_stage(day: date, source_lang, lang_configs, config, client=None):
+    """Translate one source summary into several languages with a single request."""
+    source_body = read_source_body(day, source_lang, config)
+    txt = get_text_folder_for_day(day)
+    langs = [lang for lang, c in lang_configs.items() if not (txt / c["summary_without_links_filename"]).exists()]
 
-            if not target_output_file.exists():
-                source_text = source_summary_file.read_text(encoding="utf-8")
-                body_match = re.search(r'(### .+)', source_text, re.DOTALL)
-                source_body = body_match.group(1) if body_match else source_text
+    print(f"Translating summary to {', '.join(langs)} in one request...")
+    client = client or get_client("translate")
+    with timing_step("translate_summary_batch", date=day.isoformat(), langs=langs):
+        translations, usages = translate_summary_batch(client, source_body, langs)
 
-                print(f"Translating summary to {lang}...")
-                client = OpenAI()
-                with timing_step("translate_summary", date=day.isoformat(), lang=lang):
-                    translated, usage = translate_summary(client, source_body, target_lang=lang)
+    for lang, translated in translations.items():
+        save_translation(day, lang, lang_configs[lang], translated)
 
-                first_sections = lang_config.get("first_sections")
-                if first_sections:
-                    translated = reorder_sections(translated, first_sections)
 
-                date_heading = generate_date_heading(day, lang)
-                target_summary_file.write_text(
-                    date_heading + "\n\n" + translated, encoding="utf-8"
-                )
-                print(f"✅ Translated summary saved to {target_summary_file}")
-
-                article_sources = lang_config.get("article_sources", [])
-                for name, refresher in LANG_REFRESHERS.get(lang, []):
-                    try:
-                        refresher()
-                    except Exception as e:
-                        print(f"⚠️ Failed to refresh {name}: {e}")
-
-                if article_sources:
-                    start_date = day - timedelta(days=1)
-                    end_date = day + timedelta(days=1)
-                    filtered_articles = load_articles(start_date, end_date, article_sources)
-                    top_stories, main_summary = split_summary(translated)
-                    with open("src/prompts/link_prompt.txt", "r", encoding="utf-8") as f:
-                        link_prompt = f.read().strip()
-                    linked, _ = link_articles_to_summary(client, main_summary, filtered_articles, link_prompt, article_sources)
-                    final = date_heading + "\n\n" + top_stories + "\n\n" + linked
-                else:
-                    final = date_heading + "\n\n" + translated
-
-                final = strip_summary_marker(final)
-                target_output_file.write_text(final, encoding="utf-8")
-                print(f"✅ Final {lang} summary saved to {target_output_file}")
-            else:
-                print(f"{target_output_file} exists — skipping {lang} translation.")
-        except Exception as e:
-            print(f"❌ Error generating translation for '{lang}': {e}")
-            import traceback
-            traceback.print_exc()
+def link_translation_stage(day: date, lang, lang_config, client=None):
+    """Add article links to a translated summary and save the final file."""
+    txt = get_text_folder_for_day(day)
+    target_summary_file = txt / lang_config["summary_without_links_filename"]
+    target_output_file = txt / lang_config["summary_filename"]
+
+    date_heading = generate_date_heading(day, lang)
+    translated = target_summary_file.read_text(encoding="utf-8").replace(date_heading + "\n\n", "", 1)
+
+    article_sources = lang_config.get("article_sources", [])
+    if article_sources:
+        start_date = day - timedelta(days=1)
+        end_date = day + timedelta(days=1)
+        filtered_articles = load_articles(start_date, end_date, article_sources)
+        top_stories, main_summary = split_summary(translated)
+        with open("src/prompts/link_prompt.txt", "r", encoding="utf-8") as f:
+            link_prompt = f.read().strip()
+        client = client or get_client("link")
+        with timing_step("translate_link_articles", date=day.isoformat(), lang=lang):
+            linked, _ = link_summary(client, main_summary, filtered_articles, link_prompt, article_sources)
+        final = date_heading + "\n\n" + top_stories + "\n\n" + linked
+    else:
+        final = date_heading + "\n\n" + translated
 
-    # =========================================================
-    # PHASE 2: Post all summaries to Substack
-    # =========================================================
+    final = strip_summary_marker(final)
+    target_output_file.write_text(final, encoding="utf-8")
+    print(f"✅ Final {lang} summary saved to {target_output_file}")
 
-    if no_post:
-        print("⏭️  --no-post specified, skipping all Substack posting.")
-        return
 
+def wait_for_cover(cover_path, cover=None, timeout=COVER_WAIT_TIMEOUT_S):
+    """File to upload as the cover, or None to post without one.
+
+    With this run's CoverHandoff, waits up to `timeout` seconds for the
+    cover stage to finish and never looks at a file it may still be
+    writing. Without one (e.g. --lang), no cover stage runs, so an
+    existing cover is used as is.
+    """
+    if cover is None:
+        path = best_cover_variant(cover_path) if cover_path.exists() else None
+    else:
+        if not cover.wait(0):
+            print(f"⏳ Waiting up to {timeout}s for the cover image...")
+        path = cover.path if cover.wait(timeout) else None
+    if path is None:
+        print("⚠️ No cover image, posting without one.")
+    return path
+
+
+def post_stage(day: date, summary_path, flag_file, publish, lang, substack_url=None, session_file=None,
+               cover=None, poster=None, backend="browser"):
+    if not summary_path.exists():
+        raise FileNotFoundError(f"Nothing to post: {summary_path} does not exist")
+    cover_path = wait_for_cover(day_paths(day)["cover"], cover)
+    log_context = {"date": day.isoformat(), "summary_path": summary_path, "cover_path": cover_path,
+                   "publish": publish, "lang": lang, "backend": backend}
+    with timing_step("post_to_substack", **log_context):
+        published = None
+        if backend == "api":
+            try:
+                published = publish_via_api(summary_path, publish, cover_path=cover_path, substack_url=substack_url,
+                                            session_file=session_file)
+            except SubstackAPIError as e:
+                # Once the publish request went out the post may be live; never post it twice
+                if not e.fallback_safe:
+                    raise
+                print(f"⚠️ Substack API posting failed, falling back to the browser: {e}")
+        if published is None:
+            published = post_to_substack(summary_path, publish, cover_path=cover_path, substack_url=substack_url,
+                                         session_file=session_file, lang=lang, poster=poster)
+        if published:
+            flag_file.touch()
+
+
+def build_stages(day: date, config, run_lang=None, publish=True, no_post=False, batch_translate=False,
+                 poster=None, cover=None):
+    """All pipeline stages for `day`, optionally limited to one language.
+
+    English stages cover download → transcript → headlines → topics →
+    summary → topics. Topics are detected from the headlines first so the
+    summary prompts include today's topic sections; the second detection
+    on the full summary only restructures for topics missed then. The
+    cover is drawn from the headlines while the summaries are written;
+    posting waits for it at most COVER_WAIT_TIMEOUT_S, then posts without.
+    Native languages summarize from the transcript; translation languages
+    translate the (topic-restructured) source summary. Refresh stages have
+    no dependencies, so article scraping starts with the pipeline and
+    overlaps download, ffmpeg, transcription and summarization; only the
+    linking stages wait for it (translate stages only on their linking
+    threads). Posting stages share the "substack" lock
+    so only one post is typed at a time; with a `poster` they all reuse
+    its browser instead of launching one each.
+
+    With `batch_translate`, languages translated from the same source share
+    one translate_batch_<source> stage instead of a stage each.
+    """
+    txt = get_text_folder_for_day(day)
+    paths = day_paths(day)
     secrets_root = Path(os.getenv("SECRETS_ROOT", "./data"))
+    en_cfg = config["en"]
+    stages = []
+    # Only this run's cover stage can finish the handoff
+    cover = cover if run_lang in (None, "en") else None
 
-    # --- English ---
-    if run_lang is None or run_lang == "en":
-        summary_md = txt / "summary.txt"
-        flag_file = txt / "flag.txt"
-        if summary_md.exists() and not flag_file.exists():
+    def add_post_stage(lang, lang_cfg, deps):
+        if no_post:
+            return
+        summary_path = txt / lang_cfg["summary_filename"]
+        if lang == "en":
+            flag_file = txt / "flag.txt"
+            kwargs = {"backend": get_publish_backend(lang_cfg)}
+        else:
+            flag_file = txt / lang_cfg["flag_filename"]
+            kwargs = {
+                "substack_url": lang_cfg["substack_url"],
+                "session_file": str(secrets_root / lang_cfg["substack_session_file"]),
+                "backend": get_publish_backend(lang_cfg),
+            }
+        stages.append(Stage(
+            f"post_{lang}",
+            lambda: post_stage(day, summary_path, flag_file, publish, lang, cover=cover, poster=poster,
+                               **kwargs),
+            outputs=[flag_file],
+            # Not on "cover": the post waits for it only up to COVER_WAIT_TIMEOUT_S
+            deps=deps,
+            lock="substack",
+        ))
+
+    # Set when a refresh stage finishes, for linking inside translate stages
+    refreshed = {}
+
+    def refresh_stage(name, func):
+        done = refreshed[name] = threading.Event()
+
+        def run():
             try:
-                log_context = {"date": day.isoformat(), "summary_path": summary_md, "cover_path": cover_path, "publish": post}
-                with timing_step("post_to_substack", **log_context):
-                    if post_to_substack(summary_md, post, cover_path=cover_path, lang="en"):
-                        flag_file.touch()
-            except Exception as e:
-                print(f"❌ Error posting English summary: {e}")
-                import traceback
-                traceback.print_exc()
+                func()
+            finally:
+                done.set()
+        return Stage(name, run)
+
+    def wait_for_refresh(lang):
+        for name in ("refresh_en", f"refresh_{lang}"):
+            if name in refreshed and not refreshed[name].wait(REFRESH_WAIT_TIMEOUT_S):
+                print(f"⚠️ {name} not finished after {REFRESH_WAIT_TIMEOUT_S}s, linking {lang} with the saved articles")
+
+    def add_refresh_stage(lang):
+        refreshers = LANG_REFRESHERS.get(lang)
+        if refreshers:
+            stages.append(refresh_stage(f"refresh_{lang}", lambda: refresh_sources(refreshers)))
+
+    if run_lang is None or run_lang == "en":
+        stages += [
+            Stage("download", lambda: download_stage(day), outputs=[paths["video"]]),
+            Stage("extract", lambda: extract_stage(day), outputs=[paths["audio"]], deps=["download"]),
+            Stage("transcribe", lambda: transcribe_stage(day), outputs=[paths["transcript"]], deps=["extract"]),
+            refresh_stage("refresh_en", refresh_saved_articles),
+            Stage("headlines", lambda: headlines_stage(day),
+                  outputs=[headlines_path(day)], deps=["transcribe"]),
+            Stage("early_topics", lambda: early_topics_stage(day),
+                  outputs=[paths["early_topics_flag"]], deps=["headlines"]),
+            Stage("generate_en", lambda: generate_summary_stage(day),
+                  outputs=[txt / en_cfg["summary_without_links_filename"]], deps=["early_topics"]),
+            Stage("detect_topics", lambda: detect_topics_stage(day, config),
+                  outputs=[paths["topics_flag"]], deps=["generate_en"]),
+            Stage("summarize_en", lambda: finalize_summary_stage(day),
+                  outputs=[txt / en_cfg["summary_filename"]], deps=["detect_topics", "refresh_en"]),
+            Stage("cover", lambda: cover_stage(day, cover), outputs=[paths["cover"]], deps=["headlines"],
+                  failure_markers=[paths["cover_failed"]]),
+        ]
+        add_post_stage("en", en_cfg, ["summarize_en"])
+
+    for lang, lang_cfg in get_native_summary_languages(config).items():
+        if run_lang not in (None, lang):
+            continue
+        add_refresh_stage(lang)
+        stages += [
+            Stage(f"generate_{lang}",
+                  lambda lang=lang: generate_summary_stage(day, lang),
+                  outputs=[txt / lang_cfg["summary_without_links_filename"]],
+                  # Native summaries pick up the ongoing topics detected on English
+                  deps=["transcribe", "detect_topics"]),
+            Stage(f"summarize_{lang}",
+                  lambda lang=lang: finalize_summary_stage(day, lang),
+                  outputs=[txt / lang_cfg["summary_filename"]],
+                  deps=[f"generate_{lang}", f"refresh_{lang}"]),
+        ]
+        add_post_stage(lang, lang_cfg, [f"summarize_{lang}"])
+
+    translation_langs = {
+        lang: lang_cfg for lang, lang_cfg in get_translation_languages(config).items()
+        if run_lang in (None, lang)
+    }
+    by_source = {}
+    for lang, lang_cfg in translation_langs.items():
+        by_source.setdefault(get_source_language(lang_cfg), {})[lang] = lang_cfg
+
+    translate_stage_names = {}
+    for source_lang, lang_cfgs in by_source.items():
+        source_stage = "detect_topics" if source_lang == "en" else f"generate_{source_lang}"
+        if batch_translate and len(lang_cfgs) > 1:
+            name = f"translate_batch_{source_lang}"
+            stages.append(Stage(
+                name,
+                lambda source_lang=source_lang, lang_cfgs=lang_cfgs: translate_batch_stage(day, source_lang, lang_cfgs, config),
+                outputs=[txt / c["summary_without_links_filename"] for c in lang_cfgs.values()],
+                deps=[source_stage],
+            ))
+            translate_stage_names.update({lang: name for lang in lang_cfgs})
+            continue
+        for lang, lang_cfg in lang_cfgs.items():
+            # Not on the refresh stages: linking while the translation
+            # streams waits for them itself, and the link stage then finds
+            # its output done
+            stages.append(Stage(
+                f"translate_{lang}",
+                lambda lang=lang, lang_cfg=lang_cfg: translate_stage(
+                    day, lang, lang_cfg, config, link_as_streamed=STREAM_LINK_TRANSLATIONS,
+                    wait_for_articles=lambda: wait_for_refresh(lang)),
+                outputs=[txt / lang_cfg["summary_without_links_filename"]],
+                deps=[source_stage],
+            ))
+            translate_stage_names[lang] = f"translate_{lang}"
+
+    for lang, lang_cfg in translation_langs.items():
+        add_refresh_stage(lang)
+        stages.append(Stage(
+            f"link_{lang}",
+            lambda lang=lang, lang_cfg=lang_cfg: link_translation_stage(day, lang, lang_cfg),
+            outputs=[txt / lang_cfg["summary_filename"]],
+            deps=[translate_stage_names[lang], "refresh_en", f"refresh_{lang}"],
+        ))
+        add_post_stage(lang, lang_cfg, [f"link_{lang}"])
+
+    return stages
 
-    # --- Native summary languages ---
-    for lang, lang_cfg in native_langs.items():
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and post Cyprus news summary.")
+    parser.add_argument("date", nargs="?", help="Date in YYYY-MM-DD format (defaults to yesterday)")
+    parser.add_argument("--draft", action="store_true", help="Save draft instead of publishing")
+    parser.add_argument("--no-post", action="store_true", help="Skip Substack posting entirely (generate summaries only)")
+    parser.add_argument("--lang", type=str, help="Run only a specific language pipeline (e.g. 'el'). English files must already exist for translation languages.")
+    parser.add_argument("--batch-translate", action="store_true", help="Translate into all languages with one request per source summary")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk LLM response cache")
+    parser.add_argument("--dry-run", action="store_true", help="Print the stage plan for the day without running anything")
+    parser.add_argument("--critical-path", action="store_true", help="Report the critical path from recorded stage timings for the day")
+
+    args = parser.parse_args()
+
+    if args.date:
         try:
-            target_output_file = txt / lang_cfg["summary_filename"]
-            target_flag_file = txt / lang_cfg["flag_filename"]
-            if target_output_file.exists() and not target_flag_file.exists():
-                session_path = secrets_root / lang_cfg["substack_session_file"]
-                substack_url = lang_cfg["substack_url"]
-                with timing_step("post_to_substack", date=day.isoformat(), lang=lang):
-                    if post_to_substack(target_output_file, post, cover_path=cover_path, substack_url=substack_url, session_file=str(session_path), lang=lang):
-                        target_flag_file.touch()
-        except Exception as e:
-            print(f"❌ Error posting native summary for '{lang}': {e}")
-            import traceback
-            traceback.print_exc()
+            day = datetime.strptime(args.date, "%Y-%m-%d").date()
+        except ValueError:
+            print("❌ Invalid date format. Use YYYY-MM-DD (e.g. 2025-06-01).")
+            return
+    else:
+        now_cy = datetime.now(CY_TZ)
+        if now_cy.hour < START_HOUR:
+            print(f"⏳ It's {now_cy.strftime('%H:%M')} in Cyprus — too early, waiting until {START_HOUR}:00.")
+            return
+        day = now_cy.date() - timedelta(days=1)
 
-    # --- Translation languages ---
-    for lang, lang_config in translation_langs.items():
+    if args.no_cache:
+        os.environ["LLM_CACHE_BYPASS"] = "1"
+
+    config = load_language_config()
+    # Started on the first post; every language posts through the same browser
+    poster = SubstackPoster()
+    cover = CoverHandoff()
+    stages = build_stages(day, config, run_lang=args.lang, publish=not args.draft, no_post=args.no_post,
+                          batch_translate=args.batch_translate, poster=poster, cover=cover)
+
+    def make_pipeline():
+        journal = Journal(get_root_folder_for_day(day) / JOURNAL_FILENAME)
+        return Pipeline(stages, log_context={"date": day.isoformat()}, journal=journal)
+
+    if args.critical_path:
+        make_pipeline().print_critical_path(load_stage_durations(day))
+        return
+    if args.dry_run:
+        make_pipeline().print_plan()
+        return
+    if args.no_post:
+        print("⏭️  --no-post specified, skipping all Substack posting.")
+
+    with ExitStack() as stack:
+        # The hourly cron can start while the previous run is still going
         try:
-            target_output_file = txt / lang_config["summary_filename"]
-            target_flag_file = txt / lang_config["flag_filename"]
-            if target_output_file.exists() and not target_flag_file.exists():
-                session_path = secrets_root / lang_config["substack_session_file"]
-                substack_url = lang_config["substack_url"]
-                with timing_step("post_to_substack", date=day.isoformat(), lang=lang):
-                    if post_to_substack(target_output_file, post, cover_path=cover_path, substack_url=substack_url, session_file=str(session_path), lang=lang):
-                        target_flag_file.touch()
-        except Exception as e:
-            print(f"❌ Error posting translation for '{lang}': {e}")
-            import traceback
-            traceback.print_exc()
+            stack.enter_context(file_lock(get_root_folder_for_day(day) / RUN_LOCK_NAME, blocking=False))
+        except BlockingIOError:
+            print(f"🔒 Another run is already processing {day.isoformat()}, exiting.")
+            return
+
+        # Read the journal only under the lock: a run that just finished
+        # may have recorded stages (e.g. posts) after we started
+        pipeline = make_pipeline()
+        if pipeline.plan().get("cover") != "run":
+            # No cover stage this run: post with the cover an earlier run made, if any
+            cover_path = day_paths(day)["cover"]
+            cover.finish(best_cover_variant(cover_path) if cover_path.exists() else None)
+        stack.enter_context(poster)
+        make_folders(day)
+        outcome = pipeline.run()
+        failed = [name for name, state in outcome.items() if state in ("failed", "skipped")]
+        if failed:
+            print(f"⚠️ Stages not completed: {', '.join(failed)}")
+        pipeline.print_critical_path()
 
 
 if __name__ == "__main__":
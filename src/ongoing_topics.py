@@ -1,14 +1,42 @@
 # ongoing_topics.py – Persistent top-level sections for major ongoing stories
 
 import json
+import math
 import os
+import re
+from collections import Counter
 from datetime import date
 
+from link_candidates import STOPWORDS, strip_links, tokenize
+from link_matcher import is_bullet, number_bullets
+from persistence import atomic_write_json, file_lock
+
 TOPICS_FILE = "data/ongoing_topics.json"
 DETECT_PROMPT_FILE = "src/prompts/detect_topics_prompt.txt"
-RESTRUCTURE_PROMPT_FILE = "src/prompts/restructure_summary_prompt.txt"
+ASSIGN_PROMPT_FILE = "src/prompts/assign_topics_prompt.txt"
 DETECT_MODEL = "gpt-4.1-mini"
-RESTRUCTURE_MODEL = "gpt-4.1-mini"
+# Pre-summary detection only sees the headlines, so the smallest model does
+EARLY_DETECT_MODEL = "gpt-4.1-nano"
+ASSIGN_MODEL = "gpt-4.1-mini"
+# Score (cosine plus name bonus) above which a detected topic is the same as
+# an existing one. Calibrated on renamed/distinct topic pairs: renames score
+# 0.37+, distinct topics sharing a word ("Israel Gas Deal") stay below 0.28.
+MATCH_THRESHOLD = 0.32
+# Added in proportion to how much of the shorter topic name the other covers
+NAME_OVERLAP_WEIGHT = 0.25
+# Words that recur across unrelated topics ("Disease Outbreak", "Housing
+# Crisis") count this much of their IDF and never as name overlap
+GENERIC_TOPIC_WORDS = {
+    "cyprus", "cypriot", "outbreak", "disease", "crisis", "conflict", "measures", "district",
+    "government", "impact", "impacts", "response", "responses", "ongoing", "situation", "issue",
+    "concerns", "efforts", "authorities", "affecting", "including", "involving", "requiring",
+}
+GENERIC_WEIGHT = 0.2
+MAX_VECTOR_TERMS = 24
+MAX_HISTORY_DAYS = 60
+# Token overlap (Dice) at which a bullet rewritten by cleanup or linking is
+# taken to be the assigned bullet it came from
+REWRITTEN_BULLET_MIN_SIMILARITY = 0.5
 
 
 def load_ongoing_topics():
@@ -16,13 +44,22 @@ def load_ongoing_topics():
     if not os.path.exists(TOPICS_FILE):
         return {"topics": [], "config": {"expiry_days": 7}}
     with open(TOPICS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+        data = json.load(f)
+    # Topics saved before vectors and history were stored
+    for topic in data["topics"]:
+        topic.setdefault("history", [topic["last_seen"]])
+        topic.setdefault("vector", topic_vector(topic))
+    return data
 
 
 def save_ongoing_topics(data):
     """Save ongoing_topics.json with pretty formatting for human editability."""
-    with open(TOPICS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    atomic_write_json(TOPICS_FILE, data)
+
+
+def topics_lock():
+    """Hold around load → update → save so overlapping runs don't lose updates."""
+    return file_lock(TOPICS_FILE)
 
 
 def expire_topics(data, today):
@@ -40,8 +77,8 @@ def expire_topics(data, today):
     return data
 
 
-def detect_ongoing_topics(client, summary_text, existing_topics, today):
-    """Use LLM to detect ongoing topics from today's summary.
+def detect_ongoing_topics(client, summary_text, existing_topics, today, model=DETECT_MODEL):
+    """Use LLM to detect ongoing topics from today's summary (or its headlines).
 
     Returns a list of detected topic dicts with keys:
       name_en, name_el, description, is_new (bool)
@@ -59,7 +96,7 @@ def detect_ongoing_topics(client, summary_text, existing_topics, today):
     prompt = detect_prompt.replace("[EXISTING_TOPICS]", existing_list).replace("[TODAY]", today.isoformat())
 
     response = client.chat.completions.create(
-        model=DETECT_MODEL,
+        model=model,
         messages=[
             {"role": "system", "content": prompt},
             {"role": "user", "content": summary_text},
@@ -79,25 +116,100 @@ def detect_ongoing_topics(client, summary_text, existing_topics, today):
         return []
 
 
-def _find_existing_match(name, existing_by_name):
-    """Find an existing topic by exact or fuzzy name match.
+def topic_vector(topic):
+    """Compact term-frequency vector of a topic's English name and description.
 
-    Returns the existing topic's name_en key if found, None otherwise.
+    Tokens go through link_candidates.tokenize (stopwords dropped, spelling
+    variants folded). Only the MAX_VECTOR_TERMS strongest terms are kept,
+    L2-normalized.
     """
-    # Exact match
+    counts = Counter(tokenize(topic.get("name_en", "")) + tokenize(topic.get("description", "")))
+    weights = {t: 1 + math.log(c) for t, c in counts.most_common(MAX_VECTOR_TERMS)}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {t: round(w / norm, 4) for t, w in weights.items()}
+
+
+def _cosine(a, b, idf):
+    dot = sum(w * b[t] * idf[t] ** 2 for t, w in a.items() if t in b)
+    norm_a = math.sqrt(sum((w * idf[t]) ** 2 for t, w in a.items()))
+    norm_b = math.sqrt(sum((w * idf[t]) ** 2 for t, w in b.items()))
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+_GENERIC_KEYS = set(tokenize(" ".join(GENERIC_TOPIC_WORDS)))
+
+
+def _name_words(name):
+    words = []
+    for word in re.findall(r"\w+", name.lower()):
+        if len(word) < 3 or word in STOPWORDS or word in GENERIC_TOPIC_WORDS:
+            continue
+        words.append(word[:-1] if word.endswith("s") and len(word) > 3 else word)
+    return words
+
+
+def _same_word(a, b):
+    # Compounds count: "fire" is part of "wildfire"
+    if a == b:
+        return True
+    shorter, longer = sorted((a, b), key=len)
+    return len(shorter) >= 4 and shorter in longer
+
+
+def name_overlap(name_a, name_b):
+    """Share of the shorter name's distinctive words found in the other (0..1)."""
+    words_a, words_b = _name_words(name_a), _name_words(name_b)
+    if not words_a or not words_b:
+        return 0.0
+    covered_a = sum(any(_same_word(a, b) for b in words_b) for a in words_a) / len(words_a)
+    covered_b = sum(any(_same_word(b, a) for a in words_a) for b in words_b) / len(words_b)
+    return max(covered_a, covered_b)
+
+
+def _find_existing_match(detected, existing_by_name):
+    """Find the existing topic a detected topic refers to.
+
+    Exact name first; otherwise the existing topic with the best score if
+    it reaches MATCH_THRESHOLD. The score is the TF-IDF cosine of the
+    vectors (document frequencies over the current topics, generic words
+    down-weighted) plus NAME_OVERLAP_WEIGHT times the name overlap, so a
+    renamed topic matches on its description and two topics sharing only
+    "Disease Outbreak" don't. Returns the existing name_en or None.
+    """
+    name = detected["name_en"].strip()
     if name in existing_by_name:
         return name
+    if not existing_by_name:
+        return None
+
+    vector = topic_vector(detected)
+    vectors = {n: t.get("vector") or topic_vector(t) for n, t in existing_by_name.items()}
+    df = Counter(term for v in [vector, *vectors.values()] for term in v)
+    total = len(vectors) + 1
+    idf = {
+        term: math.log(1 + total / count) * (GENERIC_WEIGHT if term in _GENERIC_KEYS else 1)
+        for term, count in df.items()
+    }
+
+    best_name, best_score = max(
+        ((n, _cosine(vector, v, idf) + NAME_OVERLAP_WEIGHT * name_overlap(name, n))
+         for n, v in vectors.items()),
+        key=lambda item: item[1],
+    )
+    if best_score >= MATCH_THRESHOLD:
+        print(f"📎 Matched detected topic '{name}' to existing '{best_name}' (similarity {best_score:.2f})")
+        return best_name
+    return None
 
-    # Fuzzy: check if one name contains the other (handles
-    # "Iran-Israel Conflict" matching "Iran-Israel-US Conflict")
-    name_lower = name.lower()
-    for existing_name in existing_by_name:
-        existing_lower = existing_name.lower()
-        if name_lower in existing_lower or existing_lower in name_lower:
-            print(f"📎 Fuzzy-matched detected topic '{name}' to existing '{existing_name}'")
-            return existing_name
 
-    return None
+def record_appearance(topic, today_str):
+    """Add today to the topic's appearance history and keep last_seen in sync."""
+    history = topic.setdefault("history", [topic["last_seen"]] if topic.get("last_seen") else [])
+    if today_str not in history:
+        history.append(today_str)
+        history.sort()
+    del history[:-MAX_HISTORY_DAYS]
+    topic["last_seen"] = history[-1]
 
 
 def update_topics(data, detected_topics, today):
@@ -114,12 +226,14 @@ def update_topics(data, detected_topics, today):
         if not name:
             continue
 
-        match = _find_existing_match(name, existing_by_name)
+        match = _find_existing_match(detected, existing_by_name)
         if match:
-            # Existing topic confirmed today - bump last_seen
-            if existing_by_name[match]["last_seen"] != today_str:
-                existing_by_name[match]["last_seen"] = today_str
+            # Existing topic confirmed today - record the appearance
+            topic = existing_by_name[match]
+            if topic["last_seen"] != today_str:
                 print(f"📌 Ongoing topic confirmed: {match}")
+            record_appearance(topic, today_str)
+            topic.setdefault("vector", topic_vector(topic))
         else:
             # New topic detected
             new_topic = {
@@ -128,8 +242,11 @@ def update_topics(data, detected_topics, today):
                 "description": detected.get("description", ""),
                 "first_seen": today_str,
                 "last_seen": today_str,
+                "history": [today_str],
             }
+            new_topic["vector"] = topic_vector(new_topic)
             data["topics"].append(new_topic)
+            existing_by_name[name] = new_topic
             topics_changed = True
             print(f"🆕 New ongoing topic detected: {name}")
 
@@ -159,34 +276,142 @@ def build_ongoing_topics_section_entries(topics, lang="en"):
     return "\n".join(lines)
 
 
-def restructure_summary_with_topics(client, summary_text, detected_topics, lang="en"):
-    """Use LLM to move bullets related to ongoing topics into dedicated sections.
+def _topic_names(topics, lang="en"):
+    name_key = f"name_{lang}" if lang != "en" else "name_en"
+    return [t.get(name_key, t["name_en"]) for t in topics]
+
+
+def bullet_identity(line):
+    """Key that matches a bullet in the linked and unlinked versions of a summary."""
+    return re.sub(r"\s+", " ", strip_links(line.strip()[2:])).strip()
 
-    Only called when new topics were detected (topics_changed=True).
-    Returns the restructured summary text.
+
+def _bullet_similarity(a, b):
+    tokens_a, tokens_b = set(tokenize(a)), set(tokenize(b))
+    if not tokens_a or not tokens_b:
+        return 0.0
+    return 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b))
+
+
+def assigned_topic(line, assignments):
+    """Topic for a bullet line, or None.
+
+    Exact bullet identity first. A bullet the assignment never saw (cleanup
+    or linking reworded it) goes where the most similar bullet it did see
+    went, topic or none, if they reach REWRITTEN_BULLET_MIN_SIMILARITY.
     """
-    name_key = f"name_{lang}" if lang != "en" else "name_en"
+    identity = bullet_identity(line)
+    if identity in assignments:
+        return assignments[identity]
+    best, score = max(
+        ((known, _bullet_similarity(identity, known)) for known in assignments),
+        key=lambda item: item[1], default=(None, 0.0),
+    )
+    return assignments[best] if score >= REWRITTEN_BULLET_MIN_SIMILARITY else None
+
 
-    topic_descriptions = []
-    for t in detected_topics:
-        name = t.get(name_key, t["name_en"])
-        desc = t.get("description", "")
-        topic_descriptions.append(f"- {name}: {desc}")
+def assign_bullets_to_topics(client, summary_text, topics, lang="en"):
+    """Ask the LLM which bullets belong under an ongoing topic section.
 
-    with open(RESTRUCTURE_PROMPT_FILE, "r", encoding="utf-8") as f:
-        restructure_prompt = f.read().strip()
+    Returns {bullet identity: topic section name, or None} for every bullet
+    of `summary_text`, so bullets rewritten later can still be told apart.
+    Assignments to unknown bullet ids or topic names are dropped.
+    """
+    names = _topic_names(topics, lang)
+    topic_descriptions = [f"- {name}: {t.get('description', '')}" for name, t in zip(names, topics)]
+
+    with open(ASSIGN_PROMPT_FILE, "r", encoding="utf-8") as f:
+        assign_prompt = f.read().strip()
 
-    prompt = restructure_prompt.replace("[TOPIC_LIST]", "\n".join(topic_descriptions))
+    prompt = assign_prompt.replace("[TOPIC_LIST]", "\n".join(topic_descriptions))
+    numbered, bullet_lines = number_bullets(summary_text)
 
     response = client.chat.completions.create(
-        model=RESTRUCTURE_MODEL,
+        model=ASSIGN_MODEL,
         messages=[
             {"role": "system", "content": prompt},
-            {"role": "user", "content": summary_text},
+            {"role": "user", "content": numbered},
         ],
         temperature=0.0,
+        response_format={"type": "json_object"},
     )
 
-    result = response.choices[0].message.content.strip()
-    print(f"🔄 Summary restructured with ongoing topic sections")
-    return result
+    raw = response.choices[0].message.content.strip()
+    try:
+        entries = json.loads(raw).get("assignments", [])
+    except json.JSONDecodeError:
+        print("⚠️ Failed to parse topic assignment response as JSON")
+        return {}
+
+    lines = summary_text.splitlines()
+    assignments = {bullet_identity(lines[i]): None for i in bullet_lines}
+    for entry in entries:
+        try:
+            bullet = int(entry.get("bullet"))
+        except (TypeError, ValueError, AttributeError):
+            continue
+        topic = entry.get("topic")
+        if not 1 <= bullet <= len(bullet_lines) or topic not in names:
+            print(f"⚠️ Ignoring topic assignment {entry}")
+            continue
+        assignments[bullet_identity(lines[bullet_lines[bullet - 1]])] = topic
+    assigned = sum(1 for topic in assignments.values() if topic)
+    print(f"🔄 {assigned} bullets assigned to ongoing topic sections")
+    return assignments
+
+
+def apply_topic_assignments(summary_text, assignments, topics, lang="en"):
+    """Move assigned bullets into topic sections right after Top stories.
+
+    Bullets are found by `assigned_topic`, so the same assignments apply
+    to the linked summary with its links intact, even where cleanup
+    reworded a bullet. Text before the first
+    section is kept, Top stories stays first, and sections left without
+    bullets are dropped.
+    """
+    # Imported here: summarize imports this module
+    from summarize import is_top_stories_section, split_sections
+
+    parts = split_sections(summary_text)
+    preamble = []
+    if parts and not parts[0].startswith("### "):
+        preamble = [parts.pop(0)]
+
+    topic_bullets = {name: [] for name in _topic_names(topics, lang)}
+    top_stories = []
+    kept = []
+    for section in parts:
+        lines = section.splitlines()
+        header = lines[0][4:].strip()
+        if is_top_stories_section(section):
+            top_stories.append(section)
+            continue
+        bullets = [l for l in lines[1:] if l.strip()]
+        if header in topic_bullets:
+            topic_bullets[header].extend(bullets)
+            continue
+        remaining = []
+        for line in bullets:
+            topic = assigned_topic(line, assignments) if is_bullet(line) else None
+            if topic:
+                topic_bullets[topic].append(line)
+            else:
+                remaining.append(line)
+        if remaining:
+            kept.append("\n".join([lines[0]] + remaining))
+
+    topic_sections = [
+        "\n".join([f"### {name}"] + bullets) for name, bullets in topic_bullets.items() if bullets
+    ]
+    return "\n\n".join(preamble + top_stories + topic_sections + kept).strip() + "\n"
+
+
+def restructure_summary_with_topics(client, summary_text, detected_topics, lang="en"):
+    """Move bullets related to ongoing topics into dedicated sections.
+
+    Convenience wrapper for a single file; to restructure several versions
+    of the same summary, call assign_bullets_to_topics once and
+    apply_topic_assignments to each.
+    """
+    assignments = assign_bullets_to_topics(client, summary_text, detected_topics, lang)
+    return apply_topic_assignments(summary_text, assignments, detected_topics, lang)
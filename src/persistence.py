@@ -0,0 +1,90 @@
+"""Crash- and concurrency-safe writes for the shared JSON files in data/.
+
+Files are written to a temporary file in the same directory, fsynced and
+renamed over the original, so a crash leaves either the old or the new
+contents, never a truncated file. Writers that read, modify and write a
+file hold an advisory lock (`<file>.lock`, flock) for the whole cycle, so
+two overlapping runs (cron fires hourly; a run can take longer) do not
+overwrite each other's updates.
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Exclusive advisory lock on `path` (via a sibling .lock file).
+
+    With blocking=False, raises BlockingIOError if another process holds it.
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        fcntl.flock(lock_file, flags)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def atomic_write_bytes(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    # Persist the rename itself
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_text(path, text):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path, data, indent=2):
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=indent))
+
+
+def read_json(path, default=None):
+    """Parsed contents of `path`, or `default` if it does not exist."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def merge_new_articles(json_path, new_articles, prepare=None):
+    """Prepend freshly scraped articles to an article file and save it.
+
+    The file is re-read under the lock, so articles another run saved while
+    this one was scraping are kept; new articles whose URL is already
+    stored are dropped. `prepare(existing)` can fix up the stored articles
+    first (e.g. make old relative URLs absolute). Returns the saved list.
+    """
+    with file_lock(json_path):
+        existing = read_json(json_path, default=[])
+        if prepare:
+            prepare(existing)
+        known = {a.get("url") for a in existing}
+        added = [a for a in new_articles if a.get("url") not in known]
+        all_articles = added + existing
+        atomic_write_json(json_path, all_articles)
+    return all_articles
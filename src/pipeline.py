@@ -0,0 +1,296 @@
+"""Small DAG runner for the daily pipeline.
+
+Each stage names the stages it depends on and the files it produces in the
+day folder. A stage whose outputs all exist is done. A stage with missing
+outputs only runs if something downstream still needs it (or nothing
+depends on it), the same way `make` decides, so an existing transcript
+means the video is never downloaded again.
+
+Stages start as soon as their dependencies finish and run concurrently
+on a thread pool. A stage whose outputs were written by an upstream stage
+during the run, before it started, is not run again. A stage that raises is reported as failed and everything
+downstream of it is skipped. Stages that must not overlap (e.g. several
+Substack browser sessions) share a `lock` name.
+
+Every stage run is logged to timings.log as `pipeline_stage`, which is what
+`load_stage_durations` reads back for the critical-path report.
+
+With a `Journal`, every completed stage is appended to the day's
+journal.jsonl together with the SHA-256 of its outputs. Output files
+without a journal entry were left by a run that crashed before the stage
+finished (e.g. a half-written audio.mp3), so that stage runs again. The
+first run with a journal adopts outputs that already exist, so days
+processed before the journal existed are not redone.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from timing import get_timings_log_path, timing_step
+
+PIPELINE_WORKERS = 6
+
+
+class Stage:
+    """One unit of pipeline work.
+
+    func:    callable with no arguments
+    outputs: files that exist once the stage has completed; a stage without
+             outputs always counts as not done
+    deps:    names of stages that must finish first (names not in the
+             pipeline are ignored, e.g. when running a single language)
+    lock:    stages with the same lock name never run at the same time
+    failure_markers: files that also count as done, written by a stage
+             that gave up (e.g. a refused paid request) and should not be
+             retried by later runs of the day
+    """
+
+    def __init__(self, name, func, outputs=(), deps=(), lock=None, failure_markers=()):
+        self.name = name
+        self.func = func
+        self.outputs = [Path(p) for p in outputs]
+        self.deps = list(deps)
+        self.lock = lock
+        self.failure_markers = [Path(p) for p in failure_markers]
+
+    def is_done(self):
+        if any(p.exists() for p in self.failure_markers):
+            return True
+        return bool(self.outputs) and all(p.exists() for p in self.outputs)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Journal:
+    """Append-only record of completed stages and their output hashes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line from a crash
+                        continue
+                    self.entries[entry["stage"]] = entry
+
+    def exists(self):
+        return self.path.exists()
+
+    def completed(self, name):
+        return name in self.entries
+
+    def record(self, stage, adopted=False):
+        entry = {
+            "stage": stage.name,
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "outputs": {str(p): file_sha256(p) for p in stage.outputs if p.exists()},
+        }
+        if adopted:
+            entry["adopted"] = True
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[stage.name] = entry
+
+    def changed_outputs(self, stage):
+        """Outputs whose contents differ from what the stage produced."""
+        recorded = self.entries.get(stage.name, {}).get("outputs", {})
+        return [p for p in stage.outputs
+                if str(p) in recorded and p.exists() and file_sha256(p) != recorded[str(p)]]
+
+
+class Pipeline:
+    def __init__(self, stages, max_workers=PIPELINE_WORKERS, log_context=None, journal=None):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in self.stages.values():
+            stage.deps = [d for d in stage.deps if d in self.stages]
+        self.order = self._topological_order()
+        self.max_workers = max_workers
+        self.log_context = log_context or {}
+        self.journal = journal
+        self.locks = {s.lock: threading.Lock() for s in self.stages.values() if s.lock}
+        self.durations = {}
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in pipeline: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def dependents(self, name):
+        return [s.name for s in self.stages.values() if name in s.deps]
+
+    def is_done(self, stage):
+        """Outputs exist and, once the day has a journal, the stage was recorded as finished."""
+        if not stage.is_done():
+            return False
+        if self.journal is None or not self.journal.exists():
+            return True
+        return self.journal.completed(stage.name)
+
+    def plan(self):
+        """{stage name: "done" | "run" | "not needed"} from the files on disk."""
+        status = {}
+        for name in reversed(self.order):
+            stage = self.stages[name]
+            if self.is_done(stage):
+                status[name] = "done"
+                continue
+            dependents = self.dependents(name)
+            if not dependents or any(status[d] == "run" for d in dependents):
+                status[name] = "run"
+            else:
+                status[name] = "not needed"
+        return {name: status[name] for name in self.order}
+
+    def print_plan(self, plan=None):
+        plan = plan or self.plan()
+        icons = {"done": "✅", "run": "▶️ ", "not needed": "⏭️ "}
+        for name, state in plan.items():
+            stage = self.stages[name]
+            deps = f" ← {', '.join(stage.deps)}" if stage.deps else ""
+            outputs = f" → {', '.join(p.name for p in stage.outputs)}" if stage.outputs else ""
+            changed = ""
+            if state == "done" and self.journal is not None:
+                modified = self.journal.changed_outputs(stage)
+                if modified:
+                    changed = f" (changed since: {', '.join(p.name for p in modified)})"
+            print(f"{icons[state]} {name:<22} {state:<11}{deps}{outputs}{changed}")
+
+    def _run_stage(self, stage, had_outputs):
+        if not had_outputs and stage.is_done():
+            # Outputs written early by an upstream stage during this run
+            print(f"✅ {stage.name}: outputs already written")
+            return
+        lock = self.locks.get(stage.lock)
+        if lock:
+            lock.acquire()
+        try:
+            start = time.perf_counter()
+            with timing_step("pipeline_stage", **self.log_context, stage=stage.name):
+                stage.func()
+            self.durations[stage.name] = time.perf_counter() - start
+        finally:
+            if lock:
+                lock.release()
+
+    def run(self):
+        """Run every stage the plan marks as "run". Returns {name: outcome}."""
+        if self.journal is not None and not self.journal.exists():
+            for name in self.order:
+                if self.stages[name].is_done():
+                    self.journal.record(self.stages[name], adopted=True)
+            # An empty journal still marks the day as journaled
+            self.journal.path.parent.mkdir(parents=True, exist_ok=True)
+            self.journal.path.touch()
+        outcome = {name: state for name, state in self.plan().items() if state != "run"}
+        # Outputs left by an unfinished earlier run don't count as written early
+        had_outputs = {name for name, stage in self.stages.items() if stage.is_done()}
+        pending = [name for name in self.order if name not in outcome]
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.stages[name].deps
+                    if any(outcome.get(d) in ("failed", "skipped") for d in deps):
+                        print(f"⏭️  {name}: skipped because a dependency failed")
+                        outcome[name] = "skipped"
+                        pending.remove(name)
+                    elif all(d in outcome for d in deps):
+                        print(f"▶️  {name}")
+                        running[executor.submit(self._run_stage, self.stages[name], name in had_outputs)] = name
+                        pending.remove(name)
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                        outcome[name] = "ok"
+                        if self.journal is not None:
+                            self.journal.record(self.stages[name])
+                    except Exception as e:
+                        print(f"❌ Stage '{name}' failed: {e}")
+                        traceback.print_exc()
+                        outcome[name] = "failed"
+
+        return {name: outcome[name] for name in self.order}
+
+    def critical_path(self, durations=None):
+        """Longest chain of dependent stages by duration: (names, seconds)."""
+        durations = self.durations if durations is None else durations
+        best = {}
+        for name in self.order:
+            deps = self.stages[name].deps
+            prev = max((best[d] for d in deps), key=lambda item: item[1], default=([], 0.0))
+            best[name] = (prev[0] + [name], prev[1] + durations.get(name, 0.0))
+        if not best:
+            return [], 0.0
+        return max(best.values(), key=lambda item: item[1])
+
+    def print_critical_path(self, durations=None):
+        durations = self.durations if durations is None else durations
+        names, total = self.critical_path(durations)
+        if not total:
+            print("No stage timings recorded.")
+            return
+        print(f"⏱️  Critical path: {total:.1f}s")
+        for name in names:
+            print(f"   {name:<22} {durations.get(name, 0.0):8.1f}s")
+
+
+def load_stage_durations(day):
+    """Latest recorded duration of each pipeline stage for `day`."""
+    durations = {}
+    log_path = get_timings_log_path()
+    if not log_path.exists():
+        return durations
+    with log_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("label") == "pipeline_stage" and entry.get("date") == day.isoformat():
+                durations[entry["stage"]] = entry["duration_s"]
+    return durations
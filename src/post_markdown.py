@@ -25,6 +25,8 @@ from pathlib import Path
 
 from playwright.sync_api import sync_playwright
 
+from browser_policy import install_request_policy, launch_browser
+
 LINK_MOD = "Meta" if platform.system() == "Darwin" else "Control"
 _markdown_link_re = re.compile(r"\[([^\]]+)\]\((https?://[^\)]+)\)")
 
@@ -59,11 +61,13 @@ def post_markdown(
     substack_url: str,
     session_file: Path,
     publish: bool = False,
+    headless: bool | None = None,
 ) -> bool:
     """Post *md_path* to Substack.
 
     Returns True if the post was published (publish=True and confirmed),
-    False otherwise (draft saved or publish unconfirmed).
+    False otherwise (draft saved or publish unconfirmed). *headless* overrides
+    the Substack browser policy (headed by default).
     """
     if not md_path.exists():
         raise FileNotFoundError(f"Markdown file not found: {md_path}")
@@ -192,12 +196,10 @@ def post_markdown(
 
     with sync_playwright() as p:
         log("Launching browser...")
-        browser = p.chromium.launch(
-            headless=False,
-            args=["--no-sandbox", "--disable-setuid-sandbox", "--disable-dev-shm-usage"],
-        )
+        browser = launch_browser(p, "substack", headless)
         context = browser.new_context(storage_state=session_file)
         page = context.new_page()
+        request_stats = install_request_policy(page, "substack")
 
         log(f"Opening editor: {substack_url}")
         page.goto(substack_url)
@@ -250,6 +252,7 @@ def post_markdown(
                 if publish_with_retry(page, max_attempts=3):
                     log(f"Published. Final URL: {page.url}")
                     print("✅ Post published.")
+                    request_stats.log(md_path=md_path)
                     browser.close()
                     return True
                 else:
@@ -264,6 +267,7 @@ def post_markdown(
             log(f"Draft saved. URL: {page.url}")
             print("✅ Draft saved.")
 
+        request_stats.log(md_path=md_path)
         browser.close()
         return False
 
@@ -291,5 +295,11 @@ if __name__ == "__main__":
         action="store_true",
         help="Publish immediately instead of saving as draft",
     )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        default=None,
+        help="Run Chromium headless (default: headed, needs a display or xvfb-run)",
+    )
     args = parser.parse_args()
-    post_markdown(args.md_path, args.substack_url, args.session, publish=args.publish)
+    post_markdown(args.md_path, args.substack_url, args.session, publish=args.publish, headless=args.headless)
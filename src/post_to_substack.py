@@ -1,11 +1,17 @@
 import argparse
+from concurrent.futures import Future
 from pathlib import Path
+import queue
 import re
+import threading
 import time
 import os
 from playwright.sync_api import sync_playwright
 import platform
 
+from browser_policy import install_request_policy, launch_browser
+from substack_markup import MARKDOWN_LINK_RE, markdown_to_html
+
 # --- CONFIG ---
 
 SECRETS_ROOT = Path(os.getenv("SECRETS_ROOT", "./data"))
@@ -13,8 +19,10 @@ DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
 SESSION_FILE = SECRETS_ROOT / "substack_session.json"
 SUBSTACK_NEW_POST_URL = "https://cyprusnews.substack.com/publish/post?type=newsletter&back=%2Fpublish%2Fhome"
 TOP_STORIES_H3_RE = re.compile(r'(?im)^\s*#{3}\s*(?:Top\s*stories|Κύριες\s*Ειδήσεις|Главные\s*новости|Головні\s*новини|כותרות\s*ראשיות|Manşetler)\b.*$')
-markdown_link_pattern = re.compile(r"\[([^\]]+)\]\((https?://[^\)]+)\)")
+markdown_link_pattern = MARKDOWN_LINK_RE
 LINK_MOD = "Meta" if platform.system() == "Darwin" else "Control"
+# Paste the body as HTML in one go; typing it line by line is the fallback
+PASTE_BODY = True
 
 def extract_title_and_body(markdown_text):
     lines = markdown_text.strip().splitlines()
@@ -37,8 +45,80 @@ def extract_title_and_body(markdown_text):
 
 RTL_LANGUAGES = {"he"}
 
+
+class SubstackPoster:
+    """Launches one browser per run and posts every language with it.
+
+    Playwright's sync API must be used from the thread that started it, so
+    a worker thread owns the browser and posts run on it one at a time;
+    `run()` blocks the calling (pipeline) thread until its post is done.
+    Each post gets a fresh context with its publication's session file, so
+    only the browser launch is shared. The browser starts on the first post
+    and is relaunched if it crashes.
+    """
+
+    def __init__(self, headless=None):
+        self.headless = headless
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    def run(self, post):
+        """Call `post(browser)` on the worker thread and return its result."""
+        future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError("Substack browser worker has stopped") from self._error
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._work, name="substack-poster", daemon=True)
+                self._thread.start()
+            self._jobs.put((post, future))
+        return future.result()
+
+    def _work(self):
+        browser = None
+        try:
+            with sync_playwright() as p:
+                while (job := self._jobs.get()) is not None:
+                    post, future = job
+                    try:
+                        if browser is None or not browser.is_connected():
+                            print("SUBSTACK: Launching shared browser for Substack editor...")
+                            browser = launch_browser(p, "substack", self.headless)
+                        future.set_result(post(browser))
+                    except BaseException as e:
+                        future.set_exception(e)
+                if browser is not None:
+                    browser.close()
+        except BaseException as e:
+            # Playwright failed to start or stop: fail whatever is still queued
+            with self._lock:
+                self._error = e
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        job[1].set_exception(e)
+            raise
+
+    def close(self):
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 def post_to_substack(md_path, publish=False, cover_path="cover.png",
-                     substack_url=None, session_file=None, lang=None):
+                     substack_url=None, session_file=None, lang=None, headless=None, poster=None,
+                     paste=PASTE_BODY):
     actual_url = substack_url or SUBSTACK_NEW_POST_URL
     actual_session = Path(session_file) if session_file else SESSION_FILE
     is_rtl = lang in RTL_LANGUAGES
@@ -179,6 +259,127 @@ def post_to_substack(md_path, publish=False, cover_path="cover.png",
         log_info(f"Placed caret after image block: {result}")
         return result
 
+    def insert_cover(page):
+        print("🪄 Found '### Top stories' — inserting cover image just before it...")
+
+        # 1) Insert the image at current caret position
+        insert_image_via_toolbar(page, cover_path)
+
+        # 2) Wait for image to fully upload (not just appear in DOM)
+        log_info("Waiting for image upload to complete...")
+        time.sleep(10)
+
+        # 3) Place caret after the image using JS
+        result = place_caret_after_last_image(page)
+        time.sleep(1)
+
+        # 4) If JS placement worked, just press Enter to create new line for content
+        if result == "ok":
+            page.keyboard.press("End")  # ensure we're at end of line
+            page.keyboard.press("Enter")
+        else:
+            # Fallback: click below image and navigate
+            log_info(f"Caret placement returned {result}, using fallback")
+            get_editor_locator(page).click()
+            page.keyboard.press("End")
+            page.keyboard.press("Enter")
+
+        time.sleep(1)
+
+    def type_body(page, text, cover_pending):
+        """Type the markdown line by line; links go through the Cmd/Ctrl+K dialog."""
+        for paragraph in text.split("\n\n"):
+            for raw_line in paragraph.splitlines():
+                line = raw_line.strip()
+
+                # Insert image immediately BEFORE typing the "### Top stories" header
+                if cover_pending and TOP_STORIES_H3_RE.match(line):
+                    insert_cover(page)
+                    cover_pending = False
+                    # (now typing continues and the very next line you type will be the H3 header)
+
+                # Bullets -> dot
+                if line.startswith("- "):
+                    fast_type(page, "• ")
+                    line = line[2:].strip()
+
+                # Type text with labeled links
+                pos = 0
+                for m in markdown_link_pattern.finditer(line):
+                    start, end = m.span()
+                    before = line[pos:start]
+                    label = m.group(1)
+                    url   = m.group(2)
+                    print(f"Typing link: label={label}, url={url}")
+                    if before:
+                        fast_type(page, before)
+
+                    # Your old, working popup flow
+
+                    page.keyboard.down(LINK_MOD)
+                    page.keyboard.press("KeyK")
+                    page.keyboard.up(LINK_MOD)
+                    time.sleep(0.2)
+                    fast_type(page, label)
+                    page.keyboard.press("Tab")
+                    time.sleep(0.2)
+                    fast_type(page, url)
+                    time.sleep(0.2)
+                    page.keyboard.press("Enter")
+                    time.sleep(0.2)
+                    page.keyboard.press(arrow_after_link)
+
+                    pos = end
+
+
+                if pos < len(line):
+                    remaining = line[pos:]
+                    if remaining.startswith("#"):
+                        rule_type(page, remaining)
+                    else:
+                        fast_type(page, remaining)
+
+                page.keyboard.press("Enter")
+
+    def paste_html(page, html_text):
+        # ProseMirror parses the HTML from a synthetic paste like a real one
+        result = page.evaluate(
+            """(html) => {
+                const editor = document.querySelector("[data-testid='editor'].ProseMirror, [data-testid='editor'] .ProseMirror")
+                    || document.querySelector("div.ProseMirror");
+                if (!editor) return "editor-missing";
+                editor.focus();
+                const data = new DataTransfer();
+                data.setData("text/html", html);
+                data.setData("text/plain", html.replace(/<[^>]+>/g, "\\n"));
+                const event = new ClipboardEvent("paste", {clipboardData: data, bubbles: true, cancelable: true});
+                editor.dispatchEvent(event);
+                return event.defaultPrevented ? "ok" : "not-handled";
+            }""",
+            html_text,
+        )
+        if result != "ok":
+            raise RuntimeError(f"Editor did not accept pasted HTML: {result}")
+        page.wait_for_timeout(500)
+
+    def paste_body(page, text, cover_pending):
+        """Paste the body as HTML, uploading the cover just before Top stories."""
+        top = TOP_STORIES_H3_RE.search(text) if cover_pending else None
+        before, after = (text[:top.start()], text[top.start():]) if top else (text, "")
+        if before.strip():
+            paste_html(page, markdown_to_html(before))
+        if after:
+            if before.strip():
+                page.keyboard.press("Enter")
+            insert_cover(page)
+            paste_html(page, markdown_to_html(after))
+
+    def clear_editor(page):
+        get_editor_locator(page).click()
+        page.keyboard.press(f"{LINK_MOD}+A")
+        page.keyboard.press("Backspace")
+        page.wait_for_timeout(500)
+
     def strip_bidi(text: str) -> str:
         return re.sub(r"[\u200E\u200F\u200B\u202A-\u202E\u2066-\u2069\uFEFF]", "", text)
 
@@ -328,187 +529,132 @@ def post_to_substack(md_path, publish=False, cover_path="cover.png",
     title, body = extract_title_and_body(markdown)
 
     print_header_once = True  # optional: just here if you want to debug the match
-    image_inserted = False
+    # Without a cover (generation failed or timed out) the post goes out as text only
+    has_cover = bool(cover_path and Path(cover_path).exists())
     log_info(f"Preparing to post. publish={publish}, md_path={md_path}, cover_path={cover_path}")
     log_info(f"Parsed title length={len(title)}, body length={len(body)}")
 
-    with sync_playwright() as p:
-        log_info("Launching browser for Substack editor...")
-        browser = p.chromium.launch(headless=False,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox",
-                "--disable-dev-shm-usage"
-            ]
-        )
+    def post_in_browser(browser):
         if not actual_session.exists():
             raise RuntimeError(f"Substack session file not found: {actual_session}")
         log_info(f"Using session file: {actual_session}")
+        # One context per post, so each publication keeps its own session
         context = browser.new_context(storage_state=actual_session)
-        page = context.new_page()
-
-        log_info(f"Opening editor URL: {actual_url}")
         try:
-            page.goto(actual_url, timeout=60000)
-        except Exception as e:
-            log_info(f"page.goto timed out: {e}")
-            screenshot_path = str(DATA_DIR / "substack_goto_timeout.png")
-            page.screenshot(path=screenshot_path, full_page=True)
-            log_info(f"Screenshot saved to {screenshot_path}")
-            raise RuntimeError(f"Could not load Substack editor (network issue?): {e}") from e
-        try:
-            page.wait_for_selector("textarea[placeholder='Title']", timeout=15000)
-        except Exception as e:
-            current_url = page.url
-            page_title = page.title()
-            log_info(f"Failed to find title field. Current URL: {current_url}, Page title: {page_title}")
-            screenshot_path = str(DATA_DIR / "substack_title_missing.png")
-            page.screenshot(path=screenshot_path, full_page=True)
-            log_info(f"Screenshot saved to {screenshot_path}")
-            if "sign" in current_url.lower() or "sign" in page_title.lower() or "login" in current_url.lower():
-                raise RuntimeError(
-                    f"SESSION EXPIRED: Substack redirected to login page ({current_url}). "
-                    f"Re-run login_to_ss.py and copy the session file to the secrets mount."
-                ) from e
-            raise
-        log_info(f"Editor loaded. Current URL: {page.url}")
-        log_info(f"Writing title: {title}")
-        page.fill("textarea[placeholder='Title']", title)
-
-        log_info("Writing body...")
-        get_editor_locator(page).click()
-        for paragraph in body.split("\n\n"):
-            for raw_line in paragraph.splitlines():
-                line = raw_line.strip()
-
-                # Insert image immediately BEFORE typing the "### Top stories" header
-                if (not image_inserted) and TOP_STORIES_H3_RE.match(line):
-                    print("🪄 Found '### Top stories' — inserting cover image just before it...")
-
-                    # 1) Insert the image at current caret position
-                    insert_image_via_toolbar(page, cover_path)
-
-                    # 2) Wait for image to fully upload (not just appear in DOM)
-                    log_info("Waiting for image upload to complete...")
-                    time.sleep(10)
-
-                    # 3) Place caret after the image using JS
-                    result = place_caret_after_last_image(page)
-                    time.sleep(1)
-
-                    # 4) If JS placement worked, just press Enter to create new line for content
-                    if result == "ok":
-                        page.keyboard.press("End")  # ensure we're at end of line
-                        page.keyboard.press("Enter")
-                    else:
-                        # Fallback: click below image and navigate
-                        log_info(f"Caret placement returned {result}, using fallback")
-                        get_editor_locator(page).click()
-                        page.keyboard.press("End")
-                        page.keyboard.press("Enter")
-
-                    time.sleep(1)
-                    image_inserted = True
-                    # (now typing continues and the very next line you type will be the H3 header)
-
-                # Bullets -> dot
-                if line.startswith("- "):
-                    fast_type(page, "• ")
-                    line = line[2:].strip()
-
-                # Type text with labeled links
-                pos = 0
-                for m in markdown_link_pattern.finditer(line):
-                    start, end = m.span()
-                    before = line[pos:start]
-                    label = m.group(1)
-                    url   = m.group(2)
-                    print(f"Typing link: label={label}, url={url}")
-                    if before:
-                        fast_type(page, before)
-
-                    # Your old, working popup flow
-                    
-                    page.keyboard.down(LINK_MOD)
-                    page.keyboard.press("KeyK")
-                    page.keyboard.up(LINK_MOD)
-                    time.sleep(0.2)
-                    fast_type(page, label)
-                    page.keyboard.press("Tab")
-                    time.sleep(0.2)
-                    fast_type(page, url)
-                    time.sleep(0.2)
-                    page.keyboard.press("Enter")
-                    time.sleep(0.2)
-                    page.keyboard.press(arrow_after_link)
-
-                    pos = end
-
-
-                if pos < len(line):
-                    remaining = line[pos:]
-                    if remaining.startswith("#"):
-                        rule_type(page, remaining)
-                    else:
-                        fast_type(page, remaining)
+            page = context.new_page()
+            request_stats = install_request_policy(page, "substack")
 
-                page.keyboard.press("Enter")
-        page.keyboard.press("Enter")
-        log_info("Body entry complete.")
-        log_info("Validating editor content...")
-        try:
-            validate_editor_content(page, title, body)
-            log_info("Editor content validated.")
-        except Exception as e:
-            log_info(f"Editor content validation failed: {e}")
-            page.screenshot(path=str(DATA_DIR / "substack_content_validation_failed.png"), full_page=True)
-            raise
-        # If we never saw the header, you can optionally insert at top/end:
-        # if not image_inserted:
-        #     print("ℹ️ '### Top stories' not found — inserting image at top.")
-        #     page.keyboard.press("Home")
-        #     insert_image_via_toolbar(page, cover_path)
-
-        # Add a short delay before UI interaction
-        page.wait_for_timeout(1000)
-        try:
-            # Open the Button dropdown
-            page.click("button:has-text('Button')")
-            # Click "Subscribe with caption"
-            page.click("text=Subscribe w/ caption")
-            log_info("Subscribe button inserted.")
-        except Exception as e:
-            log_info(f"Subscribe button insertion failed: {e}")
+            log_info(f"Opening editor URL: {actual_url}")
+            try:
+                page.goto(actual_url, timeout=60000)
+            except Exception as e:
+                log_info(f"page.goto timed out: {e}")
+                screenshot_path = str(DATA_DIR / "substack_goto_timeout.png")
+                page.screenshot(path=screenshot_path, full_page=True)
+                log_info(f"Screenshot saved to {screenshot_path}")
+                raise RuntimeError(f"Could not load Substack editor (network issue?): {e}") from e
+            try:
+                page.wait_for_selector("textarea[placeholder='Title']", timeout=15000)
+            except Exception as e:
+                current_url = page.url
+                page_title = page.title()
+                log_info(f"Failed to find title field. Current URL: {current_url}, Page title: {page_title}")
+                screenshot_path = str(DATA_DIR / "substack_title_missing.png")
+                page.screenshot(path=screenshot_path, full_page=True)
+                log_info(f"Screenshot saved to {screenshot_path}")
+                if "sign" in current_url.lower() or "sign" in page_title.lower() or "login" in current_url.lower():
+                    raise RuntimeError(
+                        f"SESSION EXPIRED: Substack redirected to login page ({current_url}). "
+                        f"Re-run login_to_ss.py and copy the session file to the secrets mount."
+                    ) from e
+                raise
+            log_info(f"Editor loaded. Current URL: {page.url}")
+            log_info(f"Writing title: {title}")
+            page.fill("textarea[placeholder='Title']", title)
+
+            log_info("Writing body...")
+            get_editor_locator(page).click()
+            pasted = False
+            if paste:
+                try:
+                    paste_body(page, body, cover_pending=has_cover)
+                    validate_editor_content(page, title, body)
+                    pasted = True
+                    log_info("Pasted body validated.")
+                except Exception as e:
+                    log_info(f"Pasting body failed ({e}); clearing editor and typing it instead.")
+                    clear_editor(page)
+            if not pasted:
+                type_body(page, body, cover_pending=has_cover)
+            page.keyboard.press("Enter")
+            log_info("Body entry complete.")
+            log_info("Validating editor content...")
+            try:
+                validate_editor_content(page, title, body)
+                log_info("Editor content validated.")
+            except Exception as e:
+                log_info(f"Editor content validation failed: {e}")
+                page.screenshot(path=str(DATA_DIR / "substack_content_validation_failed.png"), full_page=True)
+                raise
+            # If we never saw the header, you can optionally insert at top/end:
+            # if not image_inserted:
+            #     print("ℹ️ '### Top stories' not found — inserting image at top.")
+            #     page.keyboard.press("Home")
+            #     insert_image_via_toolbar(page, cover_path)
 
-        if publish:
-            log_info("Publish requested; waiting for editor to stabilize before publish...")
-            page.wait_for_timeout(5000)
+            # Add a short delay before UI interaction
+            page.wait_for_timeout(1000)
             try:
-                if publish_with_retry(page, max_attempts=3):
-                    log_info(f"Publish flow complete. Current URL: {page.url}")
-                    print("✅ Post published.")
-                    browser.close()
-                    return True
-                else:
-                    raise RuntimeError("Publish flow did not confirm success after all retries.")
+                # Open the Button dropdown
+                page.click("button:has-text('Button')")
+                # Click "Subscribe with caption"
+                page.click("text=Subscribe w/ caption")
+                log_info("Subscribe button inserted.")
             except Exception as e:
-                log_info(f"Publish flow failed: {e}")
-                page.screenshot(path=str(DATA_DIR / "substack_publish_failed.png"), full_page=True)
-                print("⚠️ Could not publish — post might already be published or require manual intervention.")
-        else:
-            log_info("Draft mode: waiting for auto-save (including image upload)...")
-            page.wait_for_timeout(10000)
-            log_info(f"Draft saved (not published). Current URL: {page.url}")
-            print("✅ Draft saved (not published).")
+                log_info(f"Subscribe button insertion failed: {e}")
 
-        browser.close()
-        return False
+            if publish:
+                log_info("Publish requested; waiting for editor to stabilize before publish...")
+                page.wait_for_timeout(5000)
+                try:
+                    if publish_with_retry(page, max_attempts=3):
+                        log_info(f"Publish flow complete. Current URL: {page.url}")
+                        print("✅ Post published.")
+                        request_stats.log(md_path=md_path)
+                        return True
+                    else:
+                        raise RuntimeError("Publish flow did not confirm success after all retries.")
+                except Exception as e:
+                    log_info(f"Publish flow failed: {e}")
+                    page.screenshot(path=str(DATA_DIR / "substack_publish_failed.png"), full_page=True)
+                    print("⚠️ Could not publish — post might already be published or require manual intervention.")
+            else:
+                log_info("Draft mode: waiting for auto-save (including image upload)...")
+                page.wait_for_timeout(10000)
+                log_info(f"Draft saved (not published). Current URL: {page.url}")
+                print("✅ Draft saved (not published).")
+
+            request_stats.log(md_path=md_path)
+            return False
+        finally:
+            context.close()
+
+    if poster is not None:
+        return poster.run(post_in_browser)
+    with sync_playwright() as p:
+        log_info("Launching browser for Substack editor...")
+        browser = launch_browser(p, "substack", headless)
+        try:
+            return post_in_browser(browser)
+        finally:
+            browser.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Post a markdown file to Substack.")
     parser.add_argument("md_path", type=Path, help="Path to the markdown file")
     parser.add_argument("--publish", action="store_true", help="Actually publish instead of saving as draft")
-    
+    parser.add_argument("--type", action="store_true", help="Type the body line by line instead of pasting it")
+
     args = parser.parse_args()
-    post_to_substack(args.md_path, publish=args.publish)
+    post_to_substack(args.md_path, publish=args.publish, paste=not args.type)
@@ -0,0 +1,207 @@
+"""Streamed chat completions with an inactivity watchdog and section parsing.
+
+`stream_completion` is a drop-in for `client.chat.completions.create` that
+streams the reply. A call that stops producing tokens for
+`inactivity_timeout` seconds is abandoned and the request is sent again,
+up to MAX_RETRIES times with the client's jittered backoff, before
+StreamTimeout is raised. Long answers are not cut off just for being long,
+and a stalled connection is noticed quickly instead of after the SDK's
+whole-request timeout.
+
+While the reply streams, `SectionParser` splits it into `### ` sections and
+calls `on_section(section_text)` as soon as each one is complete (when the
+next header starts, or when the stream ends), so callers can start work on
+early sections before the rest has arrived.
+
+The returned object mirrors the parts of a ChatCompletion the pipeline
+reads: `choices[0].message.content`, `choices[0].finish_reason` and `usage`.
+"""
+
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+from llm_cache import cache_bypassed, is_cacheable, request_key, to_namespace
+from llm_client import MAX_RETRIES, retry_delay
+from timing import log_metric
+
+STREAM_INACTIVITY_TIMEOUT_S = 60
+
+_DONE = object()
+
+
+class StreamTimeout(Exception):
+    """No tokens arrived within the inactivity timeout."""
+
+
+class SectionParser:
+    """Incrementally splits streamed markdown into completed `### ` sections."""
+
+    def __init__(self, on_section=None):
+        self.on_section = on_section
+        self.sections = []
+        self._buffer = ""
+        self._current = []
+
+    def _emit_current(self):
+        text = "\n".join(self._current).strip()
+        self._current = []
+        if not text:
+            return
+        self.sections.append(text)
+        if self.on_section:
+            self.on_section(text)
+
+    def _add_line(self, line):
+        if line.startswith("### ") and any(l.strip() for l in self._current):
+            self._emit_current()
+        self._current.append(line)
+
+    def feed(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._add_line(line)
+
+    def finish(self):
+        if self._buffer:
+            self._add_line(self._buffer)
+            self._buffer = ""
+        self._emit_current()
+        return self.sections
+
+
+def _response(content, finish_reason, usage):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+        usage=usage,
+    )
+
+
+def _usage_dict(usage):
+    if usage is None:
+        return None
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    return dict(vars(usage))
+
+
+def _iterate_with_watchdog(stream, inactivity_timeout):
+    """Yield stream chunks, raising StreamTimeout if the gap between them is too long."""
+    chunks = queue.Queue()
+
+    def reader():
+        try:
+            for chunk in stream:
+                chunks.put(chunk)
+        except Exception as e:
+            chunks.put(e)
+        chunks.put(_DONE)
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        try:
+            item = chunks.get(timeout=inactivity_timeout)
+        except queue.Empty:
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+            raise StreamTimeout(f"No tokens for {inactivity_timeout}s")
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _consume(stream, inactivity_timeout, parser):
+    """Read a stream to the end; returns (content, finish_reason, usage)."""
+    parts = []
+    finish_reason = None
+    usage = None
+    for chunk in _iterate_with_watchdog(stream, inactivity_timeout):
+        if getattr(chunk, "usage", None):
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        delta = getattr(choice.delta, "content", None)
+        if delta:
+            parts.append(delta)
+            parser.feed(delta)
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+    parser.finish()
+    return "".join(parts), finish_reason, usage
+
+
+def stream_completion(client, on_section=None, inactivity_timeout=STREAM_INACTIVITY_TIMEOUT_S,
+                      max_restarts=MAX_RETRIES, **body):
+    """Stream a chat completion, reporting completed sections as they arrive.
+
+    A stalled stream is restarted from scratch. Sections already passed to
+    `on_section` by an abandoned attempt are not reported again; the
+    restarted attempt only reports the sections after them.
+    """
+    parser = SectionParser(on_section)
+
+    # Clients that cannot stream (the batch collector) get a plain request
+    if not getattr(client, "supports_streaming", True):
+        response = client.chat.completions.create(**body)
+        parser.feed(response.choices[0].message.content or "")
+        parser.finish()
+        return response
+
+    cache = getattr(client, "cache", None)
+    key = None
+    if cache is not None and is_cacheable(body) and not cache_bypassed():
+        key = request_key(body)
+        stored = cache.get(key)
+        if stored is not None:
+            print(f"💾 LLM cache hit ({body.get('model')})")
+            response = to_namespace(stored)
+            parser.feed(response.choices[0].message.content or "")
+            parser.finish()
+            return response
+
+    reported = 0
+
+    def report_after(skip):
+        seen = 0
+
+        def report(section):
+            nonlocal seen, reported
+            seen += 1
+            if seen > skip:
+                reported += 1
+                if on_section:
+                    on_section(section)
+        return report
+
+    for attempt in range(max_restarts + 1):
+        parser = SectionParser(report_after(reported))
+        stream = client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **body)
+        if hasattr(stream, "choices"):
+            # Not actually streamed (e.g. a test double); treat as a full response
+            parser.feed(stream.choices[0].message.content or "")
+            parser.finish()
+            return stream
+        try:
+            content, finish_reason, usage = _consume(stream, inactivity_timeout, parser)
+            break
+        except StreamTimeout:
+            if attempt == max_restarts:
+                raise
+            delay = retry_delay(attempt)
+            print(f"⚠️ Stream stalled for {inactivity_timeout}s ({body.get('model')}), restarting in {delay:.1f}s")
+            log_metric("llm_stream_restart", model=body.get("model"), attempt=attempt + 1)
+            time.sleep(delay)
+
+    if key is not None and finish_reason == "stop":
+        cache.put(key, {
+            "choices": [{"index": 0, "finish_reason": finish_reason,
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": _usage_dict(usage),
+        })
+    return _response(content, finish_reason, usage)
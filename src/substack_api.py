@@ -0,0 +1,209 @@
+"""Publish a summary through Substack's JSON endpoints instead of the editor.
+
+The same calls the editor makes: upload the cover (POST /image), create a
+draft whose body is ProseMirror JSON (POST /drafts), then prepublish and
+publish it. A draft whose prepublish fails is deleted again, so the
+browser fallback does not leave it behind as a second copy. The body is built with python-substack's `Post`, and requests
+authenticate with the cookies from the Playwright session file the browser
+path already uses, so no separate login is needed.
+
+Selected per language with `"publish_backend": "api"` in
+config/languages.json; main.py falls back to the browser when a request
+fails before anything was published. `substack_mock_server.py` serves
+these endpoints locally for testing.
+"""
+
+import base64
+import json
+import mimetypes
+import os
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from substack.post import Post
+
+from post_to_substack import SESSION_FILE, SUBSTACK_NEW_POST_URL, TOP_STORIES_H3_RE, extract_title_and_body
+from substack_markup import HEADING_RE, MARKDOWN_LINK_RE
+
+# User profile lives on substack.com, drafts on the publication's own domain
+SUBSTACK_API_BASE = os.getenv("SUBSTACK_API_BASE", "https://substack.com/api/v1")
+REQUEST_TIMEOUT_S = 30
+
+
+class SubstackAPIError(RuntimeError):
+    """A publishing request failed.
+
+    `fallback_safe` is False once the publish request has been sent: the
+    post may be live, so posting it again through the browser could send
+    it twice.
+    """
+
+    def __init__(self, message, fallback_safe=True):
+        super().__init__(message)
+        self.fallback_safe = fallback_safe
+
+
+def publication_api_url(substack_url):
+    """https://x.substack.com/publish/post?... -> https://x.substack.com/api/v1"""
+    parts = urlsplit(substack_url)
+    return f"{parts.scheme}://{parts.netloc}/api/v1"
+
+
+def load_session(session_file):
+    """requests session carrying the cookies of a Playwright storage state file."""
+    path = Path(session_file)
+    if not path.exists():
+        raise SubstackAPIError(f"Substack session file not found: {path}")
+    state = json.loads(path.read_text(encoding="utf-8"))
+    session = requests.Session()
+    for cookie in state.get("cookies", []):
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                            path=cookie.get("path", "/"))
+    return session
+
+
+def inline_chunks(text):
+    """Text split into Post chunks, with link marks for markdown links."""
+    chunks = []
+    pos = 0
+    for m in MARKDOWN_LINK_RE.finditer(text):
+        if m.start() > pos:
+            chunks.append({"content": text[pos:m.start()]})
+        chunks.append({"content": m.group(1), "marks": [{"type": "link", "href": m.group(2)}]})
+        pos = m.end()
+    if pos < len(text):
+        chunks.append({"content": text[pos:]})
+    return chunks
+
+
+def build_post(title, body, user_id, cover=None, subscribe_caption=None):
+    """Post with the same layout as the editor path: cover before Top stories,
+    one block per line, bullets as "• " paragraphs, subscribe button last.
+
+    `cover` is the dict returned by the image upload.
+    """
+    post = Post(title=title, subtitle="", user_id=user_id)
+    cover_pending = cover is not None
+    for raw_line in body.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        if cover_pending and TOP_STORIES_H3_RE.match(line):
+            post.add({"type": "captionedImage", "src": cover["url"], "bytes": cover.get("bytes")})
+            cover_pending = False
+        heading = HEADING_RE.match(line)
+        if heading:
+            post.heading(content=inline_chunks(heading.group(2)), level=len(heading.group(1)))
+        elif line.startswith("- "):
+            post.paragraph(content=inline_chunks("• " + line[2:].strip()))
+        else:
+            post.paragraph(content=inline_chunks(line))
+    post.add({"type": "subscribeWidget", "message": subscribe_caption})
+    return post
+
+
+class SubstackAPI:
+    def __init__(self, session, publication_url, api_base=SUBSTACK_API_BASE):
+        self.session = session
+        self.publication_url = publication_url
+        self.api_base = api_base
+
+    def _request(self, method, url, fallback_safe=True, **kwargs):
+        try:
+            response = self.session.request(method, url, timeout=REQUEST_TIMEOUT_S, **kwargs)
+        except requests.RequestException as e:
+            raise SubstackAPIError(f"{method} {url} failed: {e}", fallback_safe) from e
+        if response.status_code in (401, 403):
+            raise SubstackAPIError(
+                f"SESSION EXPIRED: {method} {url} returned {response.status_code}. "
+                f"Re-run login_to_ss.py and copy the session file to the secrets mount.",
+                fallback_safe,
+            )
+        if not response.ok:
+            raise SubstackAPIError(f"{method} {url} returned {response.status_code}: {response.text[:200]}",
+                                   fallback_safe)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise SubstackAPIError(f"{method} {url} returned invalid JSON", fallback_safe) from e
+
+    def user_id(self):
+        return self._request("GET", f"{self.api_base}/user/profile/self")["id"]
+
+    def upload_image(self, image_path):
+        """Upload an image; returns the response (with the hosted "url") plus its size."""
+        data = Path(image_path).read_bytes()
+        mime = mimetypes.guess_type(str(image_path))[0] or "image/png"
+        data_uri = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+        uploaded = self._request("POST", f"{self.publication_url}/image", data={"image": data_uri})
+        return {**uploaded, "bytes": len(data)}
+
+    def create_draft(self, post):
+        return self._request("POST", f"{self.publication_url}/drafts", json=post.get_draft())
+
+    def delete_draft(self, draft_id):
+        return self._request("DELETE", f"{self.publication_url}/drafts/{draft_id}")
+
+    def publish_draft(self, draft_id):
+        self._request("GET", f"{self.publication_url}/drafts/{draft_id}/prepublish")
+        return self._request("POST", f"{self.publication_url}/drafts/{draft_id}/publish",
+                             fallback_safe=False, json={"send": True, "share_automatically": False})
+
+
+def discard_draft(api, draft_id):
+    """Delete a draft that will be posted through the browser instead."""
+    try:
+        api.delete_draft(draft_id)
+        print(f"SUBSTACK API: Draft {draft_id} deleted.")
+    except SubstackAPIError as e:
+        print(f"⚠️ Could not delete draft {draft_id}, remove it in the Substack dashboard: {e}")
+
+
+def publish_via_api(md_path, publish=False, cover_path=None, substack_url=None, session_file=None,
+                    api_base=SUBSTACK_API_BASE, subscribe_caption=None):
+    """Same contract as post_to_substack: True once published, False for a saved draft."""
+    md_path = Path(md_path)
+    if not md_path.exists():
+        raise FileNotFoundError(f"Markdown file not found: {md_path}")
+    title, body = extract_title_and_body(md_path.read_text(encoding="utf-8"))
+
+    api = SubstackAPI(
+        load_session(session_file or SESSION_FILE),
+        publication_api_url(substack_url or SUBSTACK_NEW_POST_URL),
+        api_base=api_base,
+    )
+    print(f"SUBSTACK API: Creating draft on {api.publication_url}")
+    cover = None
+    if cover_path and Path(cover_path).exists():
+        cover = api.upload_image(cover_path)
+        print(f"SUBSTACK API: Cover uploaded: {cover.get('url')}")
+    post = build_post(title, body, api.user_id(), cover=cover, subscribe_caption=subscribe_caption)
+    draft = api.create_draft(post)
+    print(f"SUBSTACK API: Draft {draft['id']} created.")
+    if not publish:
+        print("✅ Draft saved (not published).")
+        return False
+    try:
+        api.publish_draft(draft["id"])
+    except SubstackAPIError as e:
+        if e.fallback_safe:
+            discard_draft(api, draft["id"])
+        raise
+    print("✅ Post published.")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Post a markdown file to Substack through its JSON API.")
+    parser.add_argument("md_path", type=Path, help="Path to the markdown file")
+    parser.add_argument("--publish", action="store_true", help="Actually publish instead of saving as draft")
+    parser.add_argument("--cover", type=Path, help="Cover image to insert before Top stories")
+    parser.add_argument("--substack-url", help="Publication URL (defaults to the English newsletter)")
+    parser.add_argument("--session-file", help="Playwright session file with the Substack cookies")
+
+    args = parser.parse_args()
+    publish_via_api(args.md_path, publish=args.publish, cover_path=args.cover, substack_url=args.substack_url,
+                    session_file=args.session_file)
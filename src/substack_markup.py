@@ -0,0 +1,42 @@
+"""Markdown → HTML for pasting a summary into the Substack editor.
+
+The output mirrors what typing the markdown line by line produces: one
+block per line, headings for `#` lines, bullets as "• " paragraphs and
+links as <a> elements, so a pasted post looks like a typed one and passes
+the same content validation.
+"""
+
+import html
+import re
+
+MARKDOWN_LINK_RE = re.compile(r"\[([^\]]+)\]\((https?://[^\)]+)\)")
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+
+
+def inline_html(text):
+    """Escape `text`, turning markdown links into anchors."""
+    parts = []
+    pos = 0
+    for m in MARKDOWN_LINK_RE.finditer(text):
+        parts.append(html.escape(text[pos:m.start()], quote=False))
+        parts.append(f'<a href="{html.escape(m.group(2))}">{html.escape(m.group(1), quote=False)}</a>')
+        pos = m.end()
+    parts.append(html.escape(text[pos:], quote=False))
+    return "".join(parts)
+
+
+def markdown_to_html(markdown):
+    blocks = []
+    for raw_line in markdown.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{inline_html(heading.group(2))}</h{level}>")
+        elif line.startswith("- "):
+            blocks.append(f"<p>• {inline_html(line[2:].strip())}</p>")
+        else:
+            blocks.append(f"<p>{inline_html(line)}</p>")
+    return "".join(blocks)
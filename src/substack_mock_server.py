@@ -0,0 +1,174 @@
+"""Local stand-in for the Substack endpoints used by substack_api.py.
+
+Keeps uploaded images, drafts, deleted draft ids and published posts in
+memory, so the API publishing flow can be exercised offline:
+
+    python src/substack_mock_server.py --port 8765
+    SUBSTACK_API_BASE=http://127.0.0.1:8765/api/v1 \
+        python src/substack_api.py summary.txt --substack-url http://127.0.0.1:8765 --publish
+
+Tests start it on a free port with `MockSubstackServer()` as a context
+manager. Requests are not authenticated.
+"""
+
+import argparse
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MOCK_USER_ID = 1
+DRAFT_PATH_RE = re.compile(r"^/api/v1/drafts/(\d+)/(prepublish|publish)$")
+DRAFT_RE = re.compile(r"^/api/v1/drafts/(\d+)$")
+
+
+class MockSubstackState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.images = []
+        self.drafts = {}
+        self.next_draft_id = 1
+        self.deleted = []
+        self.published = []
+        # Path -> status code, to simulate failures
+        self.fail = {}
+
+
+class MockSubstackHandler(BaseHTTPRequestHandler):
+    server_version = "MockSubstack/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8")
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            return json.loads(raw or "{}")
+        return {k: v[0] for k, v in parse_qs(raw).items()}
+
+    def _failure(self):
+        status = self.state.fail.get(self.path)
+        if status:
+            self._send(status, {"error": f"mock failure for {self.path}"})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._failure():
+            return
+        if self.path == "/api/v1/user/profile/self":
+            return self._send(200, {"id": MOCK_USER_ID, "name": "Mock User"})
+        m = DRAFT_PATH_RE.match(self.path)
+        if m and m.group(2) == "prepublish":
+            draft = self.state.drafts.get(int(m.group(1)))
+            if draft is None:
+                return self._send(404, {"error": "Draft not found"})
+            return self._send(200, {"errors": []})
+        self._send(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self._failure():
+            return
+        body = self._read_body()
+        with self.state.lock:
+            if self.path == "/api/v1/image":
+                if not str(body.get("image", "")).startswith("data:image/"):
+                    return self._send(400, {"error": "Expected a data:image/... URI"})
+                self.state.images.append(body["image"])
+                url = f"https://mock-substack.local/image/{len(self.state.images)}"
+                return self._send(200, {"url": url})
+            if self.path == "/api/v1/drafts":
+                if not body.get("draft_title") or not isinstance(body.get("draft_body"), str):
+                    return self._send(400, {"error": "draft_title and draft_body are required"})
+                draft_id = self.state.next_draft_id
+                self.state.next_draft_id += 1
+                draft = {**body, "id": draft_id, "draft_body": json.loads(body["draft_body"])}
+                self.state.drafts[draft_id] = draft
+                return self._send(200, {"id": draft_id})
+            m = DRAFT_PATH_RE.match(self.path)
+            if m and m.group(2) == "publish":
+                draft_id = int(m.group(1))
+                if draft_id not in self.state.drafts:
+                    return self._send(404, {"error": "Draft not found"})
+                self.state.published.append(draft_id)
+                return self._send(200, {"id": draft_id, "is_published": True, "send": body.get("send")})
+        self._send(404, {"error": "Not found"})
+
+    def do_DELETE(self):
+        if self._failure():
+            return
+        m = DRAFT_RE.match(self.path)
+        with self.state.lock:
+            if m and self.state.drafts.pop(int(m.group(1)), None) is not None:
+                self.state.deleted.append(int(m.group(1)))
+                return self._send(200, {"id": int(m.group(1))})
+        self._send(404, {"error": "Draft not found"})
+
+
+class MockSubstackServer:
+    """Mock server on a background thread; `url` is the publication root."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), MockSubstackHandler)
+        self.httpd.state = MockSubstackState()
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def api_base(self):
+        return f"{self.url}/api/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="substack-mock", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mock Substack publishing endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = MockSubstackServer(args.host, args.port)
+    print(f"Mock Substack listening on {server.url} (API base {server.api_base})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
@@ -1,6 +1,8 @@
 # summarize.py – Refactored with flexible sources and modular structure
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 import os
 import re
 import sys
@@ -9,7 +11,8 @@ import json
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 from helpers import get_text_folder_for_day
-from openai import OpenAI
+from llm_client import cached_prompt_tokens, get_client, log_prompt_cache
+from streaming import stream_completion
 from dateutil.parser import parse as parse_datetime, ParserError
 from textwrap import dedent
 import time
@@ -18,6 +21,15 @@ from timing import timing_step
 from date_heading import generate_date_heading
 from lang_config import load_language_config
 from ongoing_topics import load_ongoing_topics, build_ongoing_topics_section_entries
+from link_candidates import select_candidates, compact_articles
+from link_matcher import (
+    apply_link_assignments,
+    apply_local_links,
+    build_ambiguous_summary,
+    match_bullets,
+    merge_linked_bullets,
+    number_bullets,
+)
 
 
 # --- Configuration ---
@@ -34,6 +46,14 @@ PROMPTS_DIR = "src/prompts"
 LINK_PROMPT_FILE = "src/prompts/link_prompt.txt"
 SYSTEM_PROMPT_FILE = "src/prompts/system_prompt.txt"
 DEDUPLICATION_PROMPT_FILE = "src/prompts/deduplication_prompt.txt"
+# Candidate articles kept per source tag for each bullet (None sends everything)
+LINK_CANDIDATES_PER_BULLET = 3
+# "sections" links each ### section in its own concurrent request; "whole"
+# sends the entire summary in one request; "local" links confident bullets
+# locally and sends the rest to the LLM. Keep the LLM linker as the default
+# until evaluate_link_matcher.py has tuned the local thresholds on real days.
+LINK_MODE = "sections"
+LINK_SECTION_WORKERS = 4
 
 
 def _resolve_prompt_file(base_name, lang):
@@ -186,6 +206,50 @@ def limit_headlines(text: str, max_count: int = 10) -> str:
 
     return "\n".join(header_lines + bullet_lines)
 
+def count_tokens(text, model="gpt-4.1"):
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text))
+
+
+def chunk_transcript(transcript_text, model="gpt-4.1", chunk_separator="\n\n", max_chunk_size=3000):
+    """Split a transcript into paragraph-aligned chunks of at most max_chunk_size tokens."""
+    paragraphs = transcript_text.split(chunk_separator)
+    chunks = []
+    current_chunk = []
+
+    for para in paragraphs:
+        current_chunk.append(para)
+        if count_tokens(chunk_separator.join(current_chunk), model) > max_chunk_size:
+            chunks.append(chunk_separator.join(current_chunk[:-1]))
+            current_chunk = [para]
+    if current_chunk:
+        chunks.append(chunk_separator.join(current_chunk))
+    return chunks
+
+
+def summarize_headlines(client, first_chunk, user_prompt, headline_system_prompt, model="gpt-4.1"):
+    """Headline pass over the opening of the broadcast: the Top stories section."""
+    print(f"\n⏳ Summarizing headlines... ({count_tokens(first_chunk, model)} tokens)")
+    # Streamed for the inactivity watchdog; limit_headlines needs the whole list
+    response = stream_completion(
+        client,
+        model=model,
+        messages=[
+            {"role": "system", "content": headline_system_prompt},
+            {"role": "user", "content": user_prompt},
+            {"role": "user", "content": first_chunk}
+        ],
+        temperature=0.0
+    )
+    log_prompt_cache("llm_prompt_cache", response.usage, step="headlines", chunk=0)
+    headlines = limit_headlines(response.choices[0].message.content.strip())
+    print(f"Summarized headlines\n system_prompt:{headline_system_prompt}\nuser_prompt:{user_prompt}\n chunk:{first_chunk}\n summary{headlines}\n")
+    return headlines
+
+
 # New chunk-aware generate_summary function with different prompts for the first and remaining chunks
 def generate_chunked_summary(
     transcript_text,
@@ -200,54 +264,37 @@ def generate_chunked_summary(
     sleep_time=20,
     ongoing_topics_section="",
     ongoing_topic_names=None,
+    headlines=None,
 ):
+    """Summarize the transcript chunk by chunk and merge the results.
 
-    def count_tokens(text):
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            encoding = tiktoken.get_encoding("o200k_base")
-        return len(encoding.encode(text))
-
-    # Split into paragraphs and then chunk based on token count
-    paragraphs = transcript_text.split(chunk_separator)
-    chunks = []
-    current_chunk = []
-
-    for para in paragraphs:
-        current_chunk.append(para)
-        if count_tokens(chunk_separator.join(current_chunk)) > max_chunk_size:
-            chunks.append(chunk_separator.join(current_chunk[:-1]))
-            current_chunk = [para]
-    if current_chunk:
-        chunks.append(chunk_separator.join(current_chunk))
+    `headlines` is the output of an earlier headline pass (the headlines
+    stage); without it the headline pass runs here on the first chunk.
+    """
+    chunks = chunk_transcript(transcript_text, model, chunk_separator, max_chunk_size)
 
     # Inject ongoing topics into prompt section lists (replace placeholder)
     first_chunk_system_prompt = first_chunk_system_prompt.replace("[ONGOING_TOPIC_SECTIONS]\n", ongoing_topics_section)
     followup_chunk_system_prompt = followup_chunk_system_prompt.replace("[ONGOING_TOPIC_SECTIONS]\n", ongoing_topics_section)
 
     all_summaries = []
-    total_usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    total_usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
 
     for i, chunk in enumerate(chunks):
         is_first = (i == 0)
-        if is_first:
-            print(f"\n⏳ Summarizing headlines... ({count_tokens(chunk)} tokens)")
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": headline_system_prompt},
-                    {"role": "user", "content": user_prompt},
-                    {"role": "user", "content": chunk}
-                ],
-                temperature=0.0
-            )
-            headlines = limit_headlines(response.choices[0].message.content.strip())
-            print(f"Summarized chunk{str(i)}\n system_prompt:{headline_system_prompt}\nuser_prompt:{user_prompt}\n chunk:{chunk}\n summary{headlines}\n")
-       
-
-        previous_summary = "".join(all_summaries)
-        system_prompt = followup_chunk_system_prompt.replace("[PREVIOUS_SUMMARY]", previous_summary) if not is_first else first_chunk_system_prompt
+        if is_first and headlines is None:
+            headlines = summarize_headlines(client, chunk, user_prompt, headline_system_prompt, model)
+
+        # The system prompt and user prompt are identical for every follow-up
+        # chunk, so they form a cacheable prefix; the summary so far and the
+        # chunk itself come after them.
+        system_prompt = followup_chunk_system_prompt if not is_first else first_chunk_system_prompt
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
+        if not is_first:
+            messages.append({"role": "user", "content": "PREVIOUS SUMMARY:\n" + "".join(all_summaries)})
 
         def get_last_n_words(text, n=100):
             words = text.strip().split()
@@ -259,17 +306,19 @@ def generate_chunked_summary(
         else:
             chunk_with_overlap = chunk
 
-        print(f"\n⏳ Summarizing chunk {i + 1}/{len(chunks)}... ({count_tokens(chunk_with_overlap)} tokens)")
+        print(f"\n⏳ Summarizing chunk {i + 1}/{len(chunks)}... ({count_tokens(chunk_with_overlap, model)} tokens)")
 
-        response = client.chat.completions.create(
+        # Streamed only so a stalled request is abandoned after a gap in
+        # tokens rather than after the whole-request timeout. Sections are
+        # not handed on early: combine_summaries dedups across all chunks,
+        # and reordering, cleanup and linking work on the merged summary.
+        response = stream_completion(
+            client,
             model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-                {"role": "user", "content": chunk_with_overlap}
-            ],
+            messages=messages + [{"role": "user", "content": chunk_with_overlap}],
             temperature=0.0
         )
+        log_prompt_cache("llm_prompt_cache", response.usage, step="chunk", chunk=i)
 
         summary = response.choices[0].message.content.strip()
         print(f"Summarized chunk{str(i)}\n system_prompt:{system_prompt}\nuser_prompt:{user_prompt}\n chunk:{chunk_with_overlap}\n summary{summary}\n")
@@ -278,6 +327,7 @@ def generate_chunked_summary(
         if hasattr(response, "usage"):
             total_usage["prompt_tokens"] += response.usage.prompt_tokens
             total_usage["completion_tokens"] += response.usage.completion_tokens
+            total_usage["cached_tokens"] += cached_prompt_tokens(response.usage)
 
         if i < len(chunks) - 1:
             print(f"🕒 Sleeping {sleep_time}s before next chunk...")
@@ -332,7 +382,7 @@ def cleanup_merged_summary(client, summary_text, deduplication_prompt):
         messages=[
             {"role": "user", "content": final_prompt}
         ],
-        temperature=0.2
+        temperature=0.0
     )
     print(f"prompt:{final_prompt}\noutput{response.choices[0].message.content.strip()}")
     return response.choices[0].message.content.strip(), response.usage
@@ -346,6 +396,13 @@ def strip_summary_marker(text):
     return cleaned.strip()
 
 
+TOP_STORIES_MARKERS = ["### Top stories", "### Κύριες Ειδήσεις", "### Главные новости", "### Головні новини", "### כותרות ראשיות", "### Manşetler"]
+
+
+def is_top_stories_section(section):
+    return any(section.strip().startswith(m) for m in TOP_STORIES_MARKERS)
+
+
 def split_summary(summary):
     split_match = re.split(r'(?m)^### [^\n]+', summary)
     headers = re.findall(r'(?m)^### [^\n]+', summary)
@@ -353,8 +410,7 @@ def split_summary(summary):
     top_stories_text = ""
     main_summary_text = ""
 
-    TOP_STORIES_MARKERS = ["### Top stories", "### Κύριες Ειδήσεις", "### Главные новости", "### Головні новини", "### כותרות ראשיות", "### Manşetler"]
-    if sections and any(sections[0].strip().startswith(m) for m in TOP_STORIES_MARKERS):
+    if sections and is_top_stories_section(sections[0]):
         top_stories_text = sections[0].strip()
         main_summary_text = "\n".join(sections[1:]).strip()
     else:
@@ -363,6 +419,40 @@ def split_summary(summary):
 
     return top_stories_text, main_summary_text
 
+def split_sections(summary):
+    """Split markdown into `### ` sections, keeping any text before the first header.
+
+    Same parsing as split_summary, but returns every part so the sections
+    can be processed independently and joined back in order.
+    """
+    split_match = re.split(r'(?m)^### [^\n]+', summary)
+    headers = re.findall(r'(?m)^### [^\n]+', summary)
+    parts = []
+    preamble = split_match[0].strip()
+    if preamble:
+        parts.append(preamble)
+    parts.extend(h.strip() + "\n" + b.strip() for h, b in zip(headers, split_match[1:]))
+    return parts
+
+
+def summary_structure(summary):
+    """(section headers, bullet count) used to check that linking kept the layout."""
+    headers = re.findall(r'(?m)^### [^\n]+', summary)
+    bullets = [line for line in summary.splitlines() if line.strip().startswith("- ")]
+    return [h.strip() for h in headers], len(bullets)
+
+
+def sum_usage(usages):
+    """Add up prompt/completion tokens from several responses."""
+    total = SimpleNamespace(prompt_tokens=0, completion_tokens=0)
+    for usage in usages:
+        if usage is None:
+            continue
+        total.prompt_tokens += usage.prompt_tokens
+        total.completion_tokens += usage.completion_tokens
+    return total
+
+
 # --- Linking Logic ---
 def build_tag_examples(article_sources):
     """Build tag format examples from article sources config."""
@@ -377,12 +467,22 @@ def build_tag_examples(article_sources):
     return "\n".join(examples)
 
 
-def link_articles_to_summary(client, summary_text, filtered_articles, link_prompt, article_sources=None):
+def link_articles_to_summary(client, summary_text, filtered_articles, link_prompt, article_sources=None,
+                             top_k=LINK_CANDIDATES_PER_BULLET):
 
     if not filtered_articles:
         print("No article metadata found, skipping link injection.")
         return summary_text, None
 
+    if top_k:
+        candidates = select_candidates(summary_text, filtered_articles, top_k=top_k)
+        print(f"🔎 Link candidates: {len(candidates)}/{len(filtered_articles)} articles")
+        if not candidates:
+            print("No candidate articles matched the summary, skipping link injection.")
+            return summary_text, None
+    else:
+        candidates = filtered_articles
+
     # Build tag examples and fill in the prompt template
     if article_sources:
         tag_examples = build_tag_examples(article_sources)
@@ -390,18 +490,17 @@ def link_articles_to_summary(client, summary_text, filtered_articles, link_promp
         tag_examples = "- [(CM)](url) for Cyprus Mail\n- [(IC)](url) for In-Cyprus"
     prompt_with_tags = link_prompt.replace("[TAG_EXAMPLES]", tag_examples)
 
-    # Build dynamic system prompt with actual tag names
-    tags = [s["tag"] for s in article_sources] if article_sources else ["CM", "IC"]
-    tag_list = " or ".join(f"({t})" for t in dict.fromkeys(tags))
-    system_msg = f"You are a careful editor helping link summaries to matching newspaper articles. Do not alter text except to add a {tag_list} link. Preserve all ### section headers, bullet points, and markdown structure exactly as they appear in the input."
+    system_msg = ("You are a careful editor matching newsletter bullets to newspaper articles. "
+                  "Reply only with the JSON object described in the instructions.")
+    numbered_summary, _ = number_bullets(summary_text)
 
     linking_prompt = f"""{prompt_with_tags}
 
     SUMMARY:
-    {summary_text}
+    {numbered_summary}
 
     ARTICLES:
-    {json.dumps(filtered_articles, ensure_ascii=False)}
+    {json.dumps(compact_articles(candidates), ensure_ascii=False, separators=(",", ":"))}
     """
 
     print("Sending to OpenAI for article-linking...")
@@ -411,27 +510,143 @@ def link_articles_to_summary(client, summary_text, filtered_articles, link_promp
             {"role": "system", "content": system_msg},
             {"role": "user", "content": linking_prompt}
         ],
-        temperature=0.3
+        temperature=0,
+        response_format={"type": "json_object"},
     )
-    return response.choices[0].message.content.strip(), response.usage
+    try:
+        assignments = json.loads(response.choices[0].message.content).get("links", [])
+    except (json.JSONDecodeError, AttributeError):
+        print("⚠️ Linker did not return valid JSON, leaving summary unlinked.")
+        return summary_text, response.usage
+    if not isinstance(assignments, list):
+        print("⚠️ Linker returned no link list, leaving summary unlinked.")
+        return summary_text, response.usage
+
+    linked_text, applied, rejected = apply_link_assignments(summary_text, assignments, candidates)
+    print(f"🔗 Applied {applied} links" + (f", rejected {rejected} invalid assignments" if rejected else ""))
+    return linked_text, response.usage
+
+
+def link_sections_concurrently(client, summary_text, filtered_articles, link_prompt, article_sources=None,
+                               max_workers=LINK_SECTION_WORKERS):
+    """Link each ### section in its own request and reassemble in order.
+
+    Every section gets its own candidate list (via link_articles_to_summary's
+    prefilter). A section whose linked output lost a header or bullet is
+    replaced by its unlinked text.
+    """
+    sections = split_sections(summary_text)
+    if len(sections) <= 1:
+        return link_articles_to_summary(client, summary_text, filtered_articles, link_prompt, article_sources)
 
-def summarize_for_day(day, lang="en"):
+    def link_one(section):
+        linked, usage = link_articles_to_summary(client, section, filtered_articles, link_prompt, article_sources)
+        linked = strip_summary_marker(linked)
+        if summary_structure(linked) != summary_structure(section):
+            header = section.splitlines()[0]
+            print(f"⚠️ Linking changed the structure of '{header}', keeping it unlinked.")
+            return section, usage
+        return linked, usage
+
+    print(f"Linking {len(sections)} sections concurrently...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(link_one, sections))
+
+    linked_text = "\n\n".join(linked for linked, _ in results)
+    return linked_text, sum_usage(usage for _, usage in results)
 
-    # --- Load required files ---
+
+def link_with_local_matcher(client, summary_text, filtered_articles, link_prompt, article_sources=None):
+    """Insert high-confidence links locally; send only ambiguous bullets to the LLM."""
+    if not filtered_articles:
+        print("No article metadata found, skipping link injection.")
+        return summary_text, None
+
+    matches = match_bullets(summary_text, filtered_articles)
+    linked_text = apply_local_links(summary_text, matches)
+    ambiguous = [m for m in matches if m["ambiguous"]]
+    print(f"🔗 Local matcher linked {len(matches) - len(ambiguous)}/{len(matches)} bullets, "
+          f"{len(ambiguous)} left for the LLM")
+    if not ambiguous:
+        return linked_text, None
+
+    reduced_text, line_indices = build_ambiguous_summary(linked_text, matches)
+    llm_linked, usage = link_articles_to_summary(client, reduced_text, filtered_articles, link_prompt, article_sources)
+    return merge_linked_bullets(linked_text, line_indices, strip_summary_marker(llm_linked)), usage
+
+
+def link_summary(client, summary_text, filtered_articles, link_prompt, article_sources=None):
+    """Link a summary using the configured LINK_MODE."""
+    if LINK_MODE == "local":
+        return link_with_local_matcher(client, summary_text, filtered_articles, link_prompt, article_sources)
+    if LINK_MODE == "sections":
+        return link_sections_concurrently(client, summary_text, filtered_articles, link_prompt, article_sources)
+    return link_articles_to_summary(client, summary_text, filtered_articles, link_prompt, article_sources)
+
+
+def _summary_paths(day, lang):
     output_folder = get_text_folder_for_day(day)
+    config = load_language_config()
+    lang_cfg = config.get(lang, config["en"])
+    return (
+        output_folder,
+        output_folder / lang_cfg["summary_without_links_filename"],
+        output_folder / lang_cfg["summary_filename"],
+    )
+
+
+def _read_prompt(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def headlines_path(day, lang="en"):
+    name = "headlines.txt" if lang == "en" else f"headlines_{lang}.txt"
+    return get_text_folder_for_day(day) / name
+
+
+def generate_headlines_for_day(day, lang="en", client=None):
+    """Run the headline pass on the start of the transcript and save it.
+
+    The headlines are ready minutes before the full summary, so topic
+    detection (and the cover) can start from them; the summary reuses
+    the saved file instead of repeating the pass.
+    """
+    path = headlines_path(day, lang)
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+
+    transcript_text = (get_text_folder_for_day(day) / "transcript_gr.txt").read_text(encoding="utf-8")
+    user_prompt = _read_prompt(_resolve_prompt_file("prompt", lang)).replace("[DATE]", day.strftime('%A, %d %B %Y'))
+    headline_system_prompt = _read_prompt(_resolve_prompt_file("headline_system_prompt", lang))
+    client = client or get_client("summarize")
+
+    with timing_step("summarize_headlines", date=day.isoformat(), lang=lang):
+        headlines = summarize_headlines(client, chunk_transcript(transcript_text)[0], user_prompt, headline_system_prompt)
+    path.write_text(headlines, encoding="utf-8")
+    print(f"✅ Headlines saved to {path}")
+    return headlines
+
+
+def generate_summary_for_day(day, lang="en", client=None, sleep_time=20):
+    """Summarize the transcript into the summary_without_links file.
+
+    Needs only the transcript, so it can run while article sources are
+    still being refreshed. Returns the token usage (None if the file
+    already existed). `sleep_time` is the pause between chunk requests.
+    """
+    output_folder, summary_file, _ = _summary_paths(day, lang)
     log_context = {
         "date": day.isoformat(),
         "output_folder": output_folder,
         "lang": lang,
     }
 
-    config = load_language_config()
-    lang_cfg = config.get(lang, config["en"])
+    if os.path.exists(summary_file):
+        print(f"📄 Found existing summary: {summary_file}, skipping summarization.")
+        return None
 
     date_heading = generate_date_heading(day, lang)
-
-    summary_file = output_folder / lang_cfg["summary_without_links_filename"]
-    output_file = output_folder / lang_cfg["summary_filename"]
     transcript_file = output_folder / "transcript_gr.txt"
 
     # Resolve prompt files with language-specific fallback
@@ -444,23 +659,12 @@ def summarize_for_day(day, lang="en"):
         with open(transcript_file, "r", encoding="utf-8") as f:
             transcript_text = f.read()
     with timing_step("summarize_load_prompts", **log_context):
-        with open(prompt_file, "r", encoding="utf-8") as f:
-            prompt_text = f.read().strip().replace("[DATE]", day.strftime('%A, %d %B %Y'))
-        with open(LINK_PROMPT_FILE, "r", encoding="utf-8") as f:
-            link_prompt = f.read().strip()
-        with open(DEDUPLICATION_PROMPT_FILE, "r", encoding="utf-8") as f:
-            deduplication_prompt = f.read().strip()
-
-        with open(first_chunk_file, "r", encoding="utf-8") as f:
-            first_chunk_system_prompt = f.read().strip()
-        with open(followup_chunk_file, "r", encoding="utf-8") as f:
-            followup_chunk_system_prompt = f.read().strip()
-        with open(headline_file, "r", encoding="utf-8") as f:
-            headline_system_prompt = f.read().strip()
+        prompt_text = _read_prompt(prompt_file).replace("[DATE]", day.strftime('%A, %d %B %Y'))
+        first_chunk_system_prompt = _read_prompt(first_chunk_file)
+        followup_chunk_system_prompt = _read_prompt(followup_chunk_file)
+        headline_system_prompt = _read_prompt(headline_file)
 
-
-    client = OpenAI()
-    # --- Main Logic ---
+    client = client or get_client("summarize")
 
     # Load ongoing topics for prompt injection
     topics_data = load_ongoing_topics()
@@ -473,28 +677,55 @@ def summarize_for_day(day, lang="en"):
     name_key = f"name_{lang}" if lang != "en" else "name_en"
     ongoing_topic_names = [t.get(name_key, t["name_en"]) for t in active_topics]
 
-    summary_exists = os.path.exists(summary_file)
-    if summary_exists:
-        print(f"📄 Found existing summary: {summary_file}, skipping summarization.")
-        with open(summary_file, "r", encoding="utf-8") as f:
-            summary = f.read().replace(date_heading + "\n\n", "", 1)
-        usage1 = None
-    else:
-        with timing_step("summarize_generate_chunked", **log_context, summary_path=summary_file):
-            summary, usage1 =  generate_chunked_summary(
-                transcript_text,
-                client,
-                prompt_text,
-                first_chunk_system_prompt,
-                followup_chunk_system_prompt,
-                headline_system_prompt,
-                ongoing_topics_section=ongoing_topics_section,
-                ongoing_topic_names=ongoing_topic_names,
-            )
-
-            with open(summary_file, "w", encoding="utf-8") as f:
-                f.write(date_heading + "\n\n" + summary)
-            print(f"✅ Summary saved to {summary_file}")
+    headlines_file = headlines_path(day, lang)
+    headlines = headlines_file.read_text(encoding="utf-8") if headlines_file.exists() else None
+
+    with timing_step("summarize_generate_chunked", **log_context, summary_path=summary_file):
+        summary, usage = generate_chunked_summary(
+            transcript_text,
+            client,
+            prompt_text,
+            first_chunk_system_prompt,
+            followup_chunk_system_prompt,
+            headline_system_prompt,
+            ongoing_topics_section=ongoing_topics_section,
+            ongoing_topic_names=ongoing_topic_names,
+            sleep_time=sleep_time,
+            headlines=headlines,
+        )
+
+        with open(summary_file, "w", encoding="utf-8") as f:
+            f.write(date_heading + "\n\n" + summary)
+        print(f"✅ Summary saved to {summary_file}")
+
+    if usage:
+        print(f"📊 Summarization tokens: ~{usage['prompt_tokens'] + usage['completion_tokens']} "
+              f"({usage['cached_tokens']} prompt tokens from cache)")
+    return usage
+
+
+def finalize_summary_for_day(day, lang="en", client=None):
+    """Clean up the generated summary and link it to articles.
+
+    Reads the summary_without_links file and writes the final summary file.
+    Run this once article sources are refreshed.
+    """
+    output_folder, summary_file, output_file = _summary_paths(day, lang)
+    log_context = {
+        "date": day.isoformat(),
+        "output_folder": output_folder,
+        "lang": lang,
+    }
+    date_heading = generate_date_heading(day, lang)
+
+    with timing_step("summarize_load_prompts", **log_context):
+        link_prompt = _read_prompt(LINK_PROMPT_FILE)
+        deduplication_prompt = _read_prompt(DEDUPLICATION_PROMPT_FILE)
+
+    with open(summary_file, "r", encoding="utf-8") as f:
+        summary = f.read().replace(date_heading + "\n\n", "", 1)
+
+    client = client or get_client("finalize")
 
     start_date = day - timedelta(days=1)
     end_date = day + timedelta(days=1)
@@ -507,7 +738,7 @@ def summarize_for_day(day, lang="en"):
         cleaned_main_summary, usage2 = cleanup_merged_summary(client, main_summary, deduplication_prompt)
 
     with timing_step("summarize_link_articles", **log_context):
-        linked_main_summary, usage3 = link_articles_to_summary(client, cleaned_main_summary, filtered_articles, link_prompt, article_sources)
+        linked_main_summary, usage3 = link_summary(client, cleaned_main_summary, filtered_articles, link_prompt, article_sources)
 
     final_output = date_heading + "\n\n" + top_stories + "\n\n" + linked_main_summary
     final_output = strip_summary_marker(final_output)
@@ -518,8 +749,6 @@ def summarize_for_day(day, lang="en"):
 
     # --- Token usage & cost ---
     total_tokens = 0
-    if usage1:
-        total_tokens += usage1["prompt_tokens"] + usage1["completion_tokens"]
     if usage2:
         total_tokens += usage2.prompt_tokens + usage2.completion_tokens
     if usage3:
@@ -530,5 +759,11 @@ def summarize_for_day(day, lang="en"):
     estimated_cost = (total_tokens / 1000) * ((COST_PER_1K_PROMPT + COST_PER_1K_COMPLETION) / 2)
 
     print(f"\n✅ Final {lang} summary with links saved to {output_file}")
-    print(f"📊 Token usage: ~{total_tokens} total")
+    print(f"📊 Token usage (cleanup + linking): ~{total_tokens} total")
     print(f"💰 Estimated cost: ${estimated_cost:.4f} USD")
+
+
+def summarize_for_day(day, lang="en"):
+    """Generate the summary and then clean up and link it, in one go."""
+    generate_summary_for_day(day, lang=lang)
+    finalize_summary_for_day(day, lang=lang)
@@ -37,6 +37,21 @@ def log_timing(label: str, start_time: float, end_time: float, **context) -> Non
         log_file.write(json.dumps(payload, ensure_ascii=False) + "\n")
 
 
+def log_metric(label: str, **context) -> None:
+    """Append a non-timing measurement (counts, bytes) to the timings log."""
+    payload = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "label": label,
+    }
+    if context:
+        payload.update(_coerce_json_value(context))
+
+    log_path = get_timings_log_path()
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("a", encoding="utf-8") as log_file:
+        log_file.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
 @contextmanager
 def timing_step(label: str, **context):
     start = time.perf_counter()
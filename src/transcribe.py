@@ -4,7 +4,7 @@ import json
 from datetime import datetime
 from datetime import date
 from helpers import get_media_folder_for_day, get_text_folder_for_day
-from openai import OpenAI
+from llm_client import get_client
 from timing import timing_step
 
 MAX_RETRIES = 3
@@ -38,7 +38,7 @@ def transcribe_with_retry(client, audio_file, retries=3, min_chars=200):
     return best_result
 
 def transcribe_for_day(day : date):
-    client = OpenAI()
+    client = get_client("transcribe")
     combined_text = []
     combined_json = []
 
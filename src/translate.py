@@ -1,9 +1,19 @@
+import argparse
+import json
+import time
 from pathlib import Path
-from openai import OpenAI
+from llm_client import get_client
+from streaming import stream_completion
 from timing import timing_step
 
 PROMPTS_DIR = Path(__file__).parent / "prompts"
 
+# GPT-4.1 list prices, used for the batch/per-language comparison
+COST_PER_1K_PROMPT = 0.002
+COST_PER_1K_COMPLETION = 0.008
+# Room for every language's translation in one response
+BATCH_MAX_TOKENS = 32000
+
 
 def load_translate_prompt(target_lang="el"):
     """Load language-specific translate prompt, falling back to generic."""
@@ -14,11 +24,17 @@ def load_translate_prompt(target_lang="el"):
         return f.read().strip()
 
 
-def translate_summary(client, english_summary, target_lang="el", model="gpt-4.1"):
-    """Translate an English summary to the target language."""
+def translate_summary(client, english_summary, target_lang="el", model="gpt-4.1", on_section=None):
+    """Translate an English summary to the target language.
+
+    The reply is streamed; `on_section(text)` is called with each translated
+    `### ` section as soon as it is complete.
+    """
     prompt = load_translate_prompt(target_lang)
 
-    response = client.chat.completions.create(
+    response = stream_completion(
+        client,
+        on_section=on_section,
         model=model,
         messages=[
             {"role": "system", "content": prompt},
@@ -30,3 +46,116 @@ def translate_summary(client, english_summary, target_lang="el", model="gpt-4.1"
     translated = response.choices[0].message.content.strip()
     usage = response.usage
     return translated, usage
+
+
+def build_batch_prompt(target_langs):
+    """System prompt asking for every language at once, each with its own rules."""
+    parts = [
+        "Translate the English news summary you are given into each of these languages: "
+        + ", ".join(target_langs) + ".",
+        "Reply with a JSON object whose keys are exactly these language codes and whose values are "
+        "the complete translated Markdown for that language. Inside each value, output only the "
+        "translated text. Follow the instructions for each language below.",
+    ]
+    for lang in target_langs:
+        parts.append(f"=== Instructions for \"{lang}\" ===\n{load_translate_prompt(lang)}")
+    return "\n\n".join(parts)
+
+
+def _bullet_count(text):
+    return sum(1 for line in text.splitlines() if line.strip().startswith("- "))
+
+
+def translate_summary_batch(client, english_summary, target_langs, model="gpt-4.1"):
+    """Translate into several languages with one request.
+
+    Returns ({lang: translated}, [usage, ...]). Languages missing from the
+    reply, or whose bullet count differs from the source, are retried one by
+    one with translate_summary; so is everything if the reply is truncated
+    or not valid JSON.
+    """
+    target_langs = list(target_langs)
+    usages = []
+    translations = {}
+
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": build_batch_prompt(target_langs)},
+            {"role": "user", "content": english_summary}
+        ],
+        temperature=0.2,
+        max_tokens=BATCH_MAX_TOKENS,
+        response_format={"type": "json_object"},
+    )
+    usages.append(response.usage)
+    choice = response.choices[0]
+
+    if choice.finish_reason == "length":
+        print("⚠️ Batch translation was truncated, falling back to per-language requests.")
+    else:
+        try:
+            payload = json.loads(choice.message.content)
+        except (json.JSONDecodeError, TypeError):
+            print("⚠️ Batch translation was not valid JSON, falling back to per-language requests.")
+            payload = {}
+        expected_bullets = _bullet_count(english_summary)
+        for lang in target_langs:
+            text = payload.get(lang) if isinstance(payload, dict) else None
+            if not isinstance(text, str) or not text.strip():
+                print(f"⚠️ Batch translation is missing '{lang}'.")
+            elif _bullet_count(text) != expected_bullets:
+                print(f"⚠️ Batch translation for '{lang}' has {_bullet_count(text)} bullets, "
+                      f"expected {expected_bullets}.")
+            else:
+                translations[lang] = text.strip()
+
+    for lang in target_langs:
+        if lang in translations:
+            continue
+        print(f"↩️ Translating '{lang}' on its own...")
+        translations[lang], usage = translate_summary(client, english_summary, target_lang=lang, model=model)
+        usages.append(usage)
+
+    return translations, usages
+
+
+def estimate_cost(usages):
+    prompt_tokens = sum(u.prompt_tokens for u in usages if u)
+    completion_tokens = sum(u.completion_tokens for u in usages if u)
+    cost = prompt_tokens / 1000 * COST_PER_1K_PROMPT + completion_tokens / 1000 * COST_PER_1K_COMPLETION
+    return prompt_tokens, completion_tokens, cost
+
+
+def compare_modes(client, english_summary, target_langs, model="gpt-4.1"):
+    """Run per-language and batched translation on the same input and print both."""
+    results = {}
+
+    start = time.perf_counter()
+    with timing_step("translate_compare_per_language", langs=list(target_langs)):
+        usages = [translate_summary(client, english_summary, lang, model)[1] for lang in target_langs]
+    results["per-language"] = (time.perf_counter() - start, estimate_cost(usages))
+
+    start = time.perf_counter()
+    with timing_step("translate_compare_batch", langs=list(target_langs)):
+        _, usages = translate_summary_batch(client, english_summary, target_langs, model)
+    results["batch"] = (time.perf_counter() - start, estimate_cost(usages))
+
+    print(f"{'mode':<13} {'wall s':>7} {'prompt':>8} {'completion':>10} {'cost $':>8}")
+    for mode, (wall, (prompt_tokens, completion_tokens, cost)) in results.items():
+        print(f"{mode:<13} {wall:>7.1f} {prompt_tokens:>8} {completion_tokens:>10} {cost:>8.4f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare batched and per-language summary translation.")
+    parser.add_argument("summary", type=Path, help="English summary file (e.g. summaries/<date>/txt/summary_without_links.txt)")
+    parser.add_argument("--langs", nargs="+", default=["ru", "uk", "tr", "he"], help="Target languages")
+    parser.add_argument("--model", default="gpt-4.1")
+    args = parser.parse_args()
+
+    compare_modes(get_client("translate"), args.summary.read_text(encoding="utf-8"), args.langs, args.model)
+
+
+if __name__ == "__main__":
+    main()
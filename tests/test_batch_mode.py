@@ -0,0 +1,112 @@
+import json
+import sys
+import tempfile
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import batch_mode
+import helpers
+import timing
+
+DAY = date(2025, 6, 1)
+
+
+class FakeBatchAPI:
+    """In-process stand-in for the Files and Batches endpoints.
+
+    `respond(body)` returns the assistant message content for one request.
+    Batches complete as soon as they are retrieved.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self._files = {}
+        self._batches = {}
+        self.submitted = []
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    def _create_file(self, file, purpose):
+        name, handle = file
+        file_id = f"file-{len(self._files) + 1}"
+        self._files[file_id] = handle.read().decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    def _file_content(self, file_id):
+        return SimpleNamespace(text=self._files[file_id])
+
+    def _create_batch(self, input_file_id, endpoint, completion_window):
+        batch_id = f"batch-{len(self._batches) + 1}"
+        requests = [json.loads(line) for line in self._files[input_file_id].splitlines() if line.strip()]
+        self.submitted.append(requests)
+        output = []
+        for request in requests:
+            content = self.respond(request["body"])
+            output.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": {
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                }},
+                "error": None,
+            }, ensure_ascii=False))
+        output_id = f"file-{len(self._files) + 1}"
+        self._files[output_id] = "\n".join(output) + "\n"
+        self._batches[batch_id] = SimpleNamespace(id=batch_id, status="completed", output_file_id=output_id)
+        return SimpleNamespace(id=batch_id, status="validating")
+
+    def _retrieve_batch(self, batch_id):
+        return self._batches[batch_id]
+
+
+class BatchModeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        root = Path(self.tmp.name)
+        for module in (helpers, timing):
+            patcher = patch.object(module, "SUMMARIES_ROOT", root)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.txt = helpers.get_text_folder_for_day(DAY)
+        self.txt.mkdir(parents=True)
+
+    def test_collecting_client_replays_stored_responses(self):
+        store = batch_mode.ResponseStore(DAY)
+        client = batch_mode.CollectingClient(DAY, store)
+        body = {"model": "gpt-4.1", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+        with self.assertRaises(batch_mode.BatchPending):
+            client.chat.completions.create(**body)
+        key = batch_mode.request_key(body)
+        self.assertEqual(list(client.pending), [key])
+
+        store.add(key, {"choices": [{"message": {"content": "hello"}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1}})
+        reloaded = batch_mode.CollectingClient(DAY, batch_mode.ResponseStore(DAY))
+        response = reloaded.chat.completions.create(**body)
+        self.assertEqual(response.choices[0].message.content, "hello")
+
+    def test_run_batches_translates_from_fake_batch(self):
+        (self.txt / "transcript_gr.txt").write_text("transcript", encoding="utf-8")
+        (self.txt / "summary_without_links.txt").write_text(
+            "Heading\n\n### Economy\n- Bank profits rise", encoding="utf-8")
+        api = FakeBatchAPI(lambda body: "### Экономика\n- Прибыль банков растёт")
+
+        with patch("main.load_articles", return_value=[]):
+            batch_mode.run_batches([DAY], {"ru"}, api=api, poll_interval=0)
+
+        self.assertEqual(len(api.submitted), 1)
+        self.assertTrue(api.submitted[0][0]["custom_id"].startswith("2025-06-01:"))
+        self.assertIn("Прибыль банков растёт", (self.txt / "summary_ru.txt").read_text(encoding="utf-8"))
+        self.assertTrue(batch_mode.responses_path(DAY).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import sys
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import browser_policy
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.outcome = None
+
+    def abort(self):
+        self.outcome = "abort"
+
+    def continue_(self):
+        self.outcome = "continue"
+
+
+class FakePage:
+    def __init__(self):
+        self.handler = None
+
+    def route(self, pattern, handler):
+        self.handler = handler
+
+
+class BrowserPolicyTestCase(unittest.TestCase):
+    def test_blocks_heavy_resources_for_loaders(self):
+        policy = browser_policy.get_policy("philenews")
+        self.assertTrue(browser_policy.should_block("image", "https://www.philenews.com/a.jpg", policy))
+        self.assertTrue(browser_policy.should_block("font", "https://www.philenews.com/a.woff2", policy))
+        self.assertFalse(browser_policy.should_block("document", "https://www.philenews.com/kipros/", policy))
+
+    def test_blocks_tracker_subdomains(self):
+        policy = browser_policy.get_policy("sigmalive")
+        self.assertTrue(browser_policy.should_block(
+            "script", "https://www.googletagmanager.com/gtm.js?id=X", policy))
+        self.assertTrue(browser_policy.should_block(
+            "script", "https://securepubads.g.doubleclick.net/tag/js/gpt.js", policy))
+        self.assertFalse(browser_policy.should_block(
+            "script", "https://www.sigmalive.com/app.js", policy))
+
+    def test_substack_keeps_images(self):
+        policy = browser_policy.get_policy("substack")
+        self.assertFalse(browser_policy.should_block("image", "https://substackcdn.com/image.png", policy))
+        self.assertTrue(browser_policy.should_block("font", "https://substackcdn.com/font.woff2", policy))
+
+    def test_install_records_stats(self):
+        page = FakePage()
+        stats = browser_policy.install_request_policy(page, "in_cyprus")
+        blocked = FakeRoute("https://in-cyprus.philenews.com/thumb.jpg", "image")
+        allowed = FakeRoute("https://in-cyprus.philenews.com/category/local/", "document")
+        page.handler(blocked)
+        page.handler(allowed)
+        self.assertEqual(blocked.outcome, "abort")
+        self.assertEqual(allowed.outcome, "continue")
+        self.assertEqual(stats.blocked, 1)
+        self.assertEqual(stats.allowed, 1)
+        self.assertEqual(stats.est_bytes_saved, browser_policy.ESTIMATED_BYTES["image"])
+
+    def test_resolve_headless_prefers_argument_then_env_then_policy(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("BROWSER_HEADLESS", None)
+            self.assertTrue(browser_policy.resolve_headless("philenews"))
+            self.assertFalse(browser_policy.resolve_headless("substack"))
+            os.environ["BROWSER_HEADLESS"] = "0"
+            self.assertFalse(browser_policy.resolve_headless("philenews"))
+            self.assertTrue(browser_policy.resolve_headless("philenews", headless=True))
+
+    def test_fallback_retries_headed_when_headless_is_empty(self):
+        calls = []
+
+        def attempt(headless):
+            calls.append(headless)
+            return [] if headless else [{"url": "https://example.com/a"}]
+
+        with patch.object(browser_policy, "can_run_headed", return_value=True), \
+                patch.object(browser_policy, "log_metric"), \
+                patch.dict(os.environ, {"BROWSER_HEADLESS": ""}):
+            result = browser_policy.run_with_headless_fallback("politis", attempt)
+        self.assertEqual(calls, [True, False])
+        self.assertEqual(len(result), 1)
+
+    def test_no_fallback_without_display(self):
+        calls = []
+
+        def attempt(headless):
+            calls.append(headless)
+            return []
+
+        with patch.object(browser_policy, "can_run_headed", return_value=False), \
+                patch.dict(os.environ, {"BROWSER_HEADLESS": ""}):
+            browser_policy.run_with_headless_fallback("politis", attempt)
+        self.assertEqual(calls, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
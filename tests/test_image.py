@@ -1,6 +1,9 @@
+import os
 import sys
+import tempfile
 from pathlib import Path
 import unittest
+from unittest.mock import patch
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "src"))
@@ -29,6 +32,23 @@ class ImageTestCase(unittest.TestCase):
         self.assertIn("Lead subject: Budget talks.", prompt)
         self.assertIn("Avoid faces", prompt)
 
+    def test_optimize_cover_writes_smaller_metadata_free_variants(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            png = os.path.join(tmp, "cover.png")
+            src = image.Image.effect_noise((1536, 1024), 40).convert("RGB")
+            src.save(png, exif=b"Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x00")
+            with patch.object(image, "log_metric") as metric:
+                chosen = image.optimize_cover(png)
+
+            self.assertNotEqual(chosen, png)
+            self.assertLess(os.path.getsize(chosen), os.path.getsize(png))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "cover.webp")))
+            self.assertTrue(os.path.exists(os.path.join(tmp, "cover.jpg")))
+            with image.Image.open(chosen) as out:
+                self.assertEqual(out.width, image.COVER_VARIANT_WIDTH)
+                self.assertNotIn("exif", out.info)
+            metric.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
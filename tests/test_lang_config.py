@@ -5,7 +5,7 @@ import unittest
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "src"))
 
-from lang_config import load_language_config
+from lang_config import get_publish_backend, load_language_config
 
 class LangConfigTestCase(unittest.TestCase):
     def test_load_returns_all_languages(self):
@@ -30,5 +30,13 @@ class LangConfigTestCase(unittest.TestCase):
             for key in required:
                 self.assertIn(key, lc, f"{lang} missing key {key}")
 
+    def test_publish_backend_defaults_to_browser(self):
+        config = load_language_config()
+        for lang, lc in config.items():
+            self.assertIn(get_publish_backend(lc), ("browser", "api"), lang)
+        self.assertEqual(get_publish_backend({}), "browser")
+        with self.assertRaises(ValueError):
+            get_publish_backend({"publish_backend": "email"})
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import link_candidates
+
+
+ARTICLES = [
+    {"t": "Christodoulides meets UN envoy on Cyprus talks", "a": None, "u": "https://cm/1", "tag": "CM"},
+    {"t": "Forest fire in Limassol district brought under control", "a": "Firefighters battled", "u": "https://cm/2", "tag": "CM"},
+    {"t": "Hot weather expected this weekend", "a": None, "u": "https://ic/3", "tag": "IC"},
+    {"t": "Bank of Cyprus posts record profit", "a": None, "u": "https://ic/4", "tag": "IC"},
+]
+
+
+class LinkCandidatesTestCase(unittest.TestCase):
+    def test_keys_match_across_scripts(self):
+        self.assertEqual(link_candidates.tokenize("Christodoulides"),
+                         link_candidates.tokenize("Χριστοδουλίδης"))
+        self.assertEqual(link_candidates.tokenize("Христодулидис"),
+                         link_candidates.tokenize("Christodoulides"))
+
+    def test_lexicon_maps_local_place_names(self):
+        self.assertEqual(link_candidates.tokenize("Λευκωσία"), link_candidates.tokenize("Nicosia"))
+        self.assertEqual(link_candidates.tokenize("Lefkoşa"), link_candidates.tokenize("Nicosia"))
+        self.assertEqual(link_candidates.tokenize("Λεμεσό"), link_candidates.tokenize("Limassol"))
+
+    def test_extract_bullets_strips_links(self):
+        summary = "### Economy\n- Bank profits rise [(CM)](https://cm/x)\n- Second item"
+        self.assertEqual(link_candidates.extract_bullets(summary), ["Bank profits rise", "Second item"])
+
+    def test_select_candidates_keeps_matching_articles_only(self):
+        summary = (
+            "### Public Safety\n- Пожар в Лимассоле локализован пожарными.\n"
+            "### Government & Politics\n- Христодулидис встретился с посланником ООН."
+        )
+        candidates = link_candidates.select_candidates(summary, ARTICLES, top_k=1)
+        urls = [c["u"] for c in candidates]
+        self.assertIn("https://cm/1", urls)
+        self.assertIn("https://cm/2", urls)
+        self.assertNotIn("https://ic/3", urls)
+
+    def test_select_candidates_falls_back_when_nothing_matches(self):
+        summary = "### Other\n- Completely unrelated bullet text here\n- Another bullet altogether"
+        candidates = link_candidates.select_candidates(summary, ARTICLES)
+        self.assertEqual(len(candidates), len(ARTICLES))
+
+    def test_compact_articles_drops_empty_abstract(self):
+        compact = link_candidates.compact_articles(ARTICLES[:2], max_abstract_chars=5)
+        self.assertNotIn("a", compact[0])
+        self.assertEqual(compact[1]["a"], "Firef")
+
+
+if __name__ == "__main__":
+    unittest.main()
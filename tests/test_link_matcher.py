@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import link_matcher
+
+
+ARTICLES = [
+    {"t": "Christodoulides meets UN envoy Holguín on Cyprus talks", "a": None, "u": "https://cm/1", "tag": "CM"},
+    {"t": "Forest fire in Limassol district brought under control", "a": "Firefighters battled", "u": "https://cm/2", "tag": "CM"},
+    {"t": "Hot weather expected this weekend", "a": None, "u": "https://cm/3", "tag": "CM"},
+    {"t": "Bank of Cyprus posts record profit of 2025 first half", "a": None, "u": "https://ic/4", "tag": "IC"},
+    {"t": "Bank of Cyprus first half profit at record 2025 high", "a": None, "u": "https://ic/5", "tag": "IC"},
+]
+
+SUMMARY = (
+    "### Government & Politics\n"
+    "- President Christodoulides met UN envoy Holguín to discuss the Cyprus talks.\n"
+    "\n"
+    "### Economy\n"
+    "- Bank of Cyprus reported record profit for the first half of 2025."
+)
+
+
+class LinkMatcherTestCase(unittest.TestCase):
+    def test_entities_skip_sentence_start(self):
+        entities = link_matcher.extract_entities("Police arrested Georgiou in Paphos.")
+        self.assertIn(link_matcher.tokenize("Georgiou")[0], entities)
+        self.assertNotIn(link_matcher.tokenize("Police")[0], entities)
+
+    def test_numbers_ignore_single_digits(self):
+        self.assertEqual(link_matcher.extract_numbers("3 people, €1,500 and 2025"), {"1500", "2025"})
+
+    def test_clear_match_is_linked_locally(self):
+        matches = link_matcher.match_bullets(SUMMARY, ARTICLES)
+        self.assertFalse(matches[0]["ambiguous"])
+        self.assertEqual(matches[0]["links"], {"CM": "https://cm/1"})
+        linked = link_matcher.apply_local_links(SUMMARY, matches)
+        self.assertIn("Cyprus talks. [(CM)](https://cm/1)", linked)
+
+    def test_close_runner_up_is_ambiguous(self):
+        matches = link_matcher.match_bullets(SUMMARY, ARTICLES)
+        self.assertTrue(matches[1]["ambiguous"])
+
+    def test_ambiguous_bullets_round_trip_through_reduced_summary(self):
+        matches = link_matcher.match_bullets(SUMMARY, ARTICLES)
+        linked = link_matcher.apply_local_links(SUMMARY, matches)
+        reduced, lines = link_matcher.build_ambiguous_summary(linked, matches)
+        self.assertEqual(reduced, "### Economy\n- Bank of Cyprus reported record profit for the first half of 2025.")
+        llm_output = reduced.replace("2025.", "2025. [(IC)](https://ic/4)")
+        merged = link_matcher.merge_linked_bullets(linked, lines, llm_output)
+        self.assertIn("[(CM)](https://cm/1)", merged)
+        self.assertIn("2025. [(IC)](https://ic/4)", merged)
+        self.assertEqual(merged.count("###"), 2)
+
+    def test_merge_keeps_summary_when_bullet_count_differs(self):
+        merged = link_matcher.merge_linked_bullets(SUMMARY, [4], "- one\n- two")
+        self.assertEqual(merged, SUMMARY)
+
+    def test_apply_link_assignments_validates_each_assignment(self):
+        assignments = [
+            {"bullet": 1, "tag": "CM", "url": "https://cm/1"},
+            {"bullet": 1, "tag": "CM", "url": "https://cm/2"},  # second CM link
+            {"bullet": 2, "tag": "CM", "url": "https://ic/4"},  # wrong tag
+            {"bullet": 2, "tag": "IC", "url": "https://ic/9"},  # not a candidate
+            {"bullet": 7, "tag": "IC", "url": "https://ic/4"},  # no such bullet
+            {"bullet": 2, "tag": "IC", "url": "https://ic/4"},
+        ]
+        linked, applied, rejected = link_matcher.apply_link_assignments(SUMMARY, assignments, ARTICLES)
+        self.assertEqual((applied, rejected), (2, 4))
+        self.assertIn("Cyprus talks. [(CM)](https://cm/1)", linked)
+        self.assertIn("2025. [(IC)](https://ic/4)", linked)
+        self.assertEqual(link_matcher.number_bullets(SUMMARY)[1], [1, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
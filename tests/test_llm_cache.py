@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import llm_cache
+
+
+class FakeResponse:
+    def __init__(self, content):
+        self.content = content
+
+    def model_dump(self):
+        return {"choices": [{"message": {"content": self.content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1}}
+
+
+class CountingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **body):
+        self.calls += 1
+        return FakeResponse(f"reply {self.calls}")
+
+
+class LLMCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.completions = CountingCompletions()
+        raw = SimpleNamespace(chat=SimpleNamespace(completions=self.completions), images="images-api")
+        self.client = llm_cache.CachedClient(raw, llm_cache.ResponseCache(self.tmp.name))
+        self.body = {"model": "gpt-4.1", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+
+    def test_identical_temperature_zero_requests_hit_cache(self):
+        first = self.client.chat.completions.create(**self.body)
+        second = self.client.chat.completions.create(**self.body)
+        self.assertEqual(self.completions.calls, 1)
+        self.assertEqual(second.choices[0].message.content, first.content)
+
+    def test_sampled_requests_are_not_cached(self):
+        body = dict(self.body, temperature=0.2)
+        self.client.chat.completions.create(**body)
+        self.client.chat.completions.create(**body)
+        self.assertEqual(self.completions.calls, 2)
+
+    def test_bypass_env(self):
+        self.client.chat.completions.create(**self.body)
+        with patch.dict(os.environ, {"LLM_CACHE_BYPASS": "1"}):
+            self.client.chat.completions.create(**self.body)
+        self.assertEqual(self.completions.calls, 2)
+
+    def test_other_attributes_pass_through(self):
+        self.assertEqual(self.client.images, "images-api")
+
+    def test_eviction_drops_least_recently_used(self):
+        cache = llm_cache.ResponseCache(self.tmp.name, max_bytes=10**9)
+        for key in ("a", "b", "c"):
+            cache.put(key, {"x": "y" * 100})
+            past = time.time() - {"a": 300, "b": 200, "c": 100}[key]
+            os.utime(cache._path(key), (past, past))
+        cache.get("a")
+        cache.max_bytes = 2 * cache._path("a").stat().st_size
+        cache.evict()
+        self.assertTrue(cache._path("a").exists())
+        self.assertFalse(cache._path("b").exists())
+        self.assertTrue(cache._path("c").exists())
+
+    def test_hit_survives_eviction_between_read_and_touch(self):
+        cache = llm_cache.ResponseCache(self.tmp.name)
+        cache.put("a", {"x": "y"})
+        real_load = json.load
+
+        def load_then_evict(f):
+            body = real_load(f)
+            cache._path("a").unlink()
+            return body
+
+        with patch.object(llm_cache.json, "load", load_then_evict):
+            self.assertEqual(cache.get("a"), {"x": "y"})
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
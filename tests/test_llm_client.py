@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+import httpx
+import openai
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import llm_client
+
+
+def timeout_error():
+    return openai.APITimeoutError(request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+class FakeAsyncStream:
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(self.delay)
+        self.delay = 0.0
+        if not self.chunks:
+            raise StopAsyncIteration
+        return self.chunks.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeAsyncCompletions:
+    """Scripted replies: each entry is an exception to raise, a stream or a response."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def create(self, **body):
+        self.calls.append(body)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+class LLMClientTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = patch.dict(os.environ, {"SUMMARIES_ROOT": tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        # Keep retry/hedge metrics out of the real timings log
+        metric = patch("llm_client.log_metric")
+        metric.start()
+        self.addCleanup(metric.stop)
+        delay = patch("llm_client.RETRY_BASE_DELAY_S", 0.001)
+        delay.start()
+        self.addCleanup(delay.stop)
+
+    def make_client(self, replies, operation="summarize"):
+        completions = FakeAsyncCompletions(replies)
+        pool = llm_client.ClientPool(
+            async_client=SimpleNamespace(chat=SimpleNamespace(completions=completions)),
+            sync_client=SimpleNamespace(),
+        )
+        return llm_client.OperationClient(pool, operation), completions
+
+    def test_request_uses_operation_timeout_and_retries_transient_errors(self):
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+        client, completions = self.make_client([timeout_error(), response], operation="link")
+
+        result = client.chat.completions.create(model="m", messages=[])
+
+        self.assertIs(result, response)
+        self.assertEqual(len(completions.calls), 2)
+        self.assertEqual(completions.calls[0]["timeout"], llm_client.OPERATION_TIMEOUTS["link"])
+
+    def test_retries_give_up_after_max_retries(self):
+        client, completions = self.make_client([timeout_error() for _ in range(llm_client.MAX_RETRIES + 1)])
+
+        with self.assertRaises(openai.APITimeoutError):
+            client.chat.completions.create(model="m", messages=[])
+        self.assertEqual(len(completions.calls), llm_client.MAX_RETRIES + 1)
+
+    def test_stream_is_iterable_from_sync_code(self):
+        client, _ = self.make_client([FakeAsyncStream(["a", "b", "c"])], operation="link")
+
+        stream = client.chat.completions.create(model="m", messages=[], stream=True)
+
+        self.assertEqual(list(stream), ["a", "b", "c"])
+
+    def test_slow_stream_is_hedged_and_loser_closed(self):
+        slow = FakeAsyncStream(["slow"], delay=1.0)
+        fast = FakeAsyncStream(["fast", "done"])
+        client, completions = self.make_client([slow, fast], operation="translate")
+
+        with patch.dict(llm_client.HEDGE_AFTER_S, {"translate": 0.05}):
+            stream = client.chat.completions.create(model="m", messages=[], stream=True)
+
+        self.assertEqual(list(stream), ["fast", "done"])
+        self.assertEqual(len(completions.calls), 2)
+        for _ in range(100):
+            if slow.closed:
+                break
+            time.sleep(0.01)
+        self.assertTrue(slow.closed)
+
+    def test_hedged_returns_first_result_without_hedging_when_fast(self):
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            return "first"
+
+        result = asyncio.run(llm_client.hedged(attempt, 1.0, "translate"))
+
+        self.assertEqual(result, "first")
+        self.assertEqual(len(calls), 1)
+
+    def test_retry_delay_is_capped(self):
+        with patch("llm_client.RETRY_BASE_DELAY_S", 1.0):
+            delays = [llm_client.retry_delay(10) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= llm_client.RETRY_MAX_DELAY_S for d in delays))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import sys
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import main
+
+
+class WaitForCoverTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cover = Path(tmp.name) / "cover.png"
+
+    def test_waits_for_the_cover_stage_even_if_the_file_exists(self):
+        # The stage may still be writing or encoding the file
+        self.cover.write_bytes(b"partial")
+        handoff = main.CoverHandoff()
+        threading.Timer(0.05, handoff.finish, args=["cover.webp"]).start()
+        self.assertEqual(main.wait_for_cover(self.cover, handoff, timeout=5), "cover.webp")
+
+    def test_failed_cover_stops_the_wait(self):
+        handoff = main.CoverHandoff()
+        handoff.finish(None)
+        self.assertIsNone(main.wait_for_cover(self.cover, handoff, timeout=5))
+
+    def test_timeout_posts_without_cover(self):
+        self.assertIsNone(main.wait_for_cover(self.cover, main.CoverHandoff(), timeout=0.05))
+
+    def test_without_cover_stage_an_existing_cover_is_used(self):
+        self.cover.write_bytes(b"png")
+        self.assertEqual(main.wait_for_cover(self.cover), str(self.cover))
+        self.assertIsNone(main.wait_for_cover(self.cover.with_name("missing.png")))
+
+
+class CoverStageTestCase(unittest.TestCase):
+    def test_failed_generation_is_marked_and_handed_off(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        txt = Path(tmp.name)
+        (txt / "headlines.txt").write_text("### Top stories\n- Fire in Limassol", encoding="utf-8")
+        handoff = main.CoverHandoff()
+
+        with patch.object(main, "day_paths", return_value={"cover": txt / "cover.png",
+                                                           "cover_failed": txt / "cover_failed.txt"}), \
+                patch.object(main, "headlines_path", return_value=txt / "headlines.txt"), \
+                patch.object(main, "get_client"), \
+                patch.object(main, "generate_cover_from_md", return_value=None), \
+                patch.object(main, "timing_step"):
+            self.assertIsNone(main.cover_stage(date(2025, 8, 2), handoff))
+
+        self.assertTrue((txt / "cover_failed.txt").exists())
+        self.assertTrue(handoff.wait(0))
+        self.assertIsNone(handoff.path)
+
+
+class TranslateStageTestCase(unittest.TestCase):
+    def test_failed_streamed_linking_keeps_the_translation(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        txt = Path(tmp.name)
+        lang_config = {"summary_source": "translate_from:en", "article_sources": [{"tag": "EK", "file": "x"}],
+                       "summary_filename": "summary_ru.txt", "summary_without_links_filename": "raw_ru.txt"}
+
+        def translate(client, body, target_lang, on_section):
+            on_section("### Экономика\n- Бюджет")
+            return "### Экономика\n- Бюджет", None
+
+        with patch.object(main, "read_source_body", return_value="### Economy\n- Budget"), \
+                patch.object(main, "load_articles", return_value=[]), \
+                patch.object(main, "translate_summary", translate), \
+                patch.object(main, "link_summary", side_effect=RuntimeError("bad JSON")), \
+                patch.object(main, "get_text_folder_for_day", return_value=txt), \
+                patch.object(main, "timing_step"):
+            main.translate_stage(date(2025, 8, 2), "ru", lang_config, {}, client=object(), link_as_streamed=True)
+
+        self.assertIn("- Бюджет", (txt / "raw_ru.txt").read_text(encoding="utf-8"))
+        self.assertFalse((txt / "summary_ru.txt").exists())
+
+    def test_streamed_linking_waits_for_the_refresh_not_the_translation(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        txt = Path(tmp.name)
+        lang_config = {"summary_source": "translate_from:en", "article_sources": [{"tag": "EK", "file": "x"}],
+                       "summary_filename": "summary_ru.txt", "summary_without_links_filename": "raw_ru.txt"}
+        refreshed = threading.Event()
+        events = []
+
+        def translate(client, body, target_lang, on_section):
+            on_section("### Экономика\n- Бюджет")
+            events.append("translated")
+            # The refresh finishes only after the translation
+            refreshed.set()
+            return "### Экономика\n- Бюджет", None
+
+        def wait_for_articles():
+            self.assertTrue(refreshed.wait(5))
+            events.append("refreshed")
+
+        def load_articles(*args):
+            events.append("loaded")
+            return ["article"]
+
+        def link_summary(client, section, articles, *args):
+            self.assertEqual(articles, ["article"])
+            return section + " [(EK)](https://ek/1)", None
+
+        with patch.object(main, "read_source_body", return_value="### Economy\n- Budget"), \
+                patch.object(main, "load_articles", load_articles), \
+                patch.object(main, "translate_summary", translate), \
+                patch.object(main, "link_summary", link_summary), \
+                patch.object(main, "get_text_folder_for_day", return_value=txt), \
+                patch.object(main, "timing_step"):
+            main.translate_stage(date(2025, 8, 2), "ru", lang_config, {}, client=object(),
+                                 link_as_streamed=True, wait_for_articles=wait_for_articles)
+
+        self.assertEqual(events, ["translated", "refreshed", "loaded"])
+        self.assertIn("- Бюджет [(EK)](https://ek/1)", (txt / "summary_ru.txt").read_text(encoding="utf-8"))
+
+    def test_translate_stages_do_not_depend_on_the_refresh(self):
+        config = {
+            "en": {"summary_filename": "summary.txt", "summary_without_links_filename": "raw.txt"},
+            "ru": {"enabled": True, "summary_source": "translate_from:en", "summary_filename": "summary_ru.txt",
+                   "summary_without_links_filename": "raw_ru.txt", "article_sources": []},
+        }
+        with patch.object(main, "get_text_folder_for_day", return_value=Path("txt")), \
+                patch.object(main, "day_paths", return_value={k: Path(k) for k in (
+                    "video", "audio", "transcript", "cover", "cover_failed", "early_topics_flag", "topics_flag")}):
+            stages = {s.name: s for s in main.build_stages(date(2025, 8, 2), config, no_post=True)}
+
+        self.assertEqual(stages["translate_ru"].deps, ["detect_topics"])
+        self.assertEqual(set(stages["link_ru"].deps), {"translate_ru", "refresh_en", "refresh_ru"})
+
+
+if __name__ == "__main__":
+    unittest.main()
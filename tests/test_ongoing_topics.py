@@ -0,0 +1,192 @@
+import json
+import sys
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import ongoing_topics
+from link_candidates import strip_links
+
+TOPICS = [{"name_en": "Wildfires", "name_el": "Πυρκαγιές", "description": "Fires across Limassol district"}]
+
+UNLINKED = """# Saturday, 2 August 2025
+
+### Top stories
+- Fire in Limassol villages
+- Budget approved
+
+### Public Safety
+- Firefighters battle blaze near Limassol villages
+- Road closed after crash
+
+### Politics
+- Budget approved by parliament
+- Evacuations ordered as Limassol fire spreads
+"""
+
+LINKED = """# Saturday, 2 August 2025
+
+### Top stories
+- Fire in Limassol villages
+- Budget approved
+
+### Public Safety
+- Firefighters battle blaze near Limassol villages [(CM)](https://cm/1)
+- Road closed after crash
+
+### Politics
+- Budget approved by parliament [(IC)](https://ic/2)
+- Evacuations ordered as Limassol fire spreads [(CM)](https://cm/3), [(IC)](https://ic/4)
+"""
+
+
+class AssignmentClient:
+    def __init__(self, assignments):
+        self.assignments = assignments
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = json.dumps({"assignments": self.assignments})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class OngoingTopicsTestCase(unittest.TestCase):
+    def test_assignments_apply_to_linked_and_unlinked_summaries(self):
+        client = AssignmentClient([
+            {"bullet": 3, "topic": "Wildfires"},
+            {"bullet": 6, "topic": "Wildfires"},
+        ])
+
+        assignments = ongoing_topics.assign_bullets_to_topics(client, UNLINKED, TOPICS)
+        unlinked = ongoing_topics.apply_topic_assignments(UNLINKED, assignments, TOPICS)
+        linked = ongoing_topics.apply_topic_assignments(LINKED, assignments, TOPICS)
+
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(
+            unlinked.split("\n\n")[2],
+            "### Wildfires\n- Firefighters battle blaze near Limassol villages\n"
+            "- Evacuations ordered as Limassol fire spreads",
+        )
+        self.assertTrue(unlinked.startswith("# Saturday, 2 August 2025\n\n### Top stories"))
+        self.assertIn("[(CM)](https://cm/3), [(IC)](https://ic/4)", linked)
+        self.assertEqual(
+            "\n".join(strip_links(line) for line in linked.splitlines()),
+            "\n".join(strip_links(line) for line in unlinked.splitlines()),
+        )
+
+    def test_invalid_assignments_are_ignored_and_existing_topic_section_merged(self):
+        summary = UNLINKED + "\n### Wildfires\n- Aerial means deployed\n"
+        client = AssignmentClient([
+            {"bullet": 99, "topic": "Wildfires"},
+            {"bullet": 4, "topic": "Floods"},
+            {"bullet": 3, "topic": "Wildfires"},
+        ])
+
+        assignments = ongoing_topics.assign_bullets_to_topics(client, summary, TOPICS)
+        result = ongoing_topics.apply_topic_assignments(summary, assignments, TOPICS)
+
+        self.assertEqual([topic for topic in assignments.values() if topic], ["Wildfires"])
+        self.assertIn(
+            "### Wildfires\n- Firefighters battle blaze near Limassol villages\n- Aerial means deployed", result
+        )
+        self.assertIn("### Public Safety\n- Road closed after crash", result)
+        self.assertEqual(result.count("### Wildfires"), 1)
+
+    def test_assignments_follow_bullets_reworded_by_cleanup(self):
+        client = AssignmentClient([
+            {"bullet": 3, "topic": "Wildfires"},
+            {"bullet": 6, "topic": "Wildfires"},
+        ])
+        cleaned = LINKED.replace(
+            "- Firefighters battle blaze near Limassol villages [(CM)](https://cm/1)",
+            "- Firefighters battle a blaze near several Limassol villages [(CM)](https://cm/1)",
+        ).replace(
+            "- Budget approved by parliament [(IC)](https://ic/2)",
+            "- Parliament approved the budget [(IC)](https://ic/2)",
+        )
+
+        assignments = ongoing_topics.assign_bullets_to_topics(client, UNLINKED, TOPICS)
+        result = ongoing_topics.apply_topic_assignments(cleaned, assignments, TOPICS)
+
+        self.assertIn(
+            "### Wildfires\n- Firefighters battle a blaze near several Limassol villages [(CM)](https://cm/1)\n"
+            "- Evacuations ordered as Limassol fire spreads", result
+        )
+        self.assertIn("### Politics\n- Parliament approved the budget [(IC)](https://ic/2)", result)
+        self.assertIn("### Public Safety\n- Road closed after crash", result)
+
+    def existing_topics(self):
+        return {"topics": [
+            {"name_en": "Iran-Israel-US Conflict", "name_el": "Σύγκρουση Ιράν-Ισραήλ-ΗΠΑ",
+             "description": "Regional military conflict involving Iran, Israel and the US, with missile "
+                            "threats, diplomatic responses and security measures in Cyprus",
+             "first_seen": "2026-02-28", "last_seen": "2026-03-01"},
+            {"name_en": "Foot-and-Mouth Disease Outbreak", "name_el": "Επιδημία Αφθώδους Πυρετού",
+             "description": "Livestock disease outbreak in Larnaca district requiring culling and vaccination",
+             "first_seen": "2026-02-25", "last_seen": "2026-03-01"},
+        ], "config": {"expiry_days": 7}}
+
+    def test_renamed_topic_matches_by_description(self):
+        data = self.existing_topics()
+        detected = [{"name_en": "Middle East War", "name_el": "Πόλεμος στη Μέση Ανατολή",
+                     "description": "War between Israel, the US and Iran with missile threats and "
+                                    "security measures affecting Cyprus"}]
+
+        data, changed = ongoing_topics.update_topics(data, detected, date(2026, 3, 2))
+
+        self.assertFalse(changed)
+        self.assertEqual(len(data["topics"]), 2)
+        self.assertEqual(data["topics"][0]["last_seen"], "2026-03-02")
+        self.assertEqual(data["topics"][0]["history"], ["2026-03-01", "2026-03-02"])
+        self.assertIn("vector", data["topics"][0])
+
+    def test_unrelated_topic_sharing_a_word_is_new(self):
+        data = self.existing_topics()
+        detected = [{"name_en": "Israel Gas Deal", "name_el": "Συμφωνία φυσικού αερίου με Ισραήλ",
+                     "description": "Cyprus and Israel negotiate a natural gas pipeline agreement"}]
+
+        data, changed = ongoing_topics.update_topics(data, detected, date(2026, 3, 2))
+
+        self.assertTrue(changed)
+        self.assertEqual(data["topics"][-1]["name_en"], "Israel Gas Deal")
+        self.assertEqual(data["topics"][-1]["history"], ["2026-03-02"])
+
+    def test_distinct_topics_sharing_generic_words_stay_separate(self):
+        for name, description in [
+            ("Lumpy Skin Disease Outbreak",
+             "Lumpy skin disease detected in cattle in Nicosia district, with movement restrictions "
+             "and vaccination"),
+            ("Measles Outbreak", "Rising measles cases prompt vaccination campaign by health authorities"),
+            ("Turkish Cypriot Elections", "Elections in the north for the Turkish Cypriot leader"),
+        ]:
+            with self.subTest(name):
+                data = self.existing_topics()
+                detected = [{"name_en": name, "name_el": name, "description": description}]
+
+                data, changed = ongoing_topics.update_topics(data, detected, date(2026, 3, 2))
+
+                self.assertTrue(changed)
+                self.assertEqual(len(data["topics"]), 3)
+                self.assertEqual(data["topics"][1]["last_seen"], "2026-03-01")
+
+    def test_renamed_topic_matches_on_shared_name_word(self):
+        data = {"topics": [dict(TOPICS[0], first_seen="2025-08-01", last_seen="2025-08-01")],
+                "config": {"expiry_days": 7}}
+        detected = [{"name_en": "Paphos Fires", "name_el": "Πυρκαγιές στην Πάφο",
+                     "description": "Large fires in Paphos district forcing evacuations of villages as "
+                                    "firefighting aircraft are deployed"}]
+
+        data, changed = ongoing_topics.update_topics(data, detected, date(2025, 8, 2))
+
+        self.assertFalse(changed)
+        self.assertEqual(data["topics"][0]["history"], ["2025-08-01", "2025-08-02"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import persistence
+
+
+class PersistenceTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def test_atomic_write_replaces_file_and_leaves_no_temp_files(self):
+        path = self.dir / "topics.json"
+        persistence.atomic_write_json(path, {"topics": [1]})
+        persistence.atomic_write_json(path, {"topics": [1, 2]})
+
+        self.assertEqual(json.loads(path.read_text(encoding="utf-8")), {"topics": [1, 2]})
+        self.assertEqual([p.name for p in self.dir.iterdir()], ["topics.json"])
+
+    def test_merge_keeps_articles_saved_by_another_run(self):
+        path = self.dir / "articles.json"
+        persistence.atomic_write_json(path, [{"url": "https://a/1"}])
+        # Another run saved a newer article while this one was scraping
+        persistence.atomic_write_json(path, [{"url": "https://a/2"}, {"url": "https://a/1"}])
+
+        saved = persistence.merge_new_articles(path, [{"url": "https://a/3"}, {"url": "https://a/2"}])
+
+        self.assertEqual([a["url"] for a in saved], ["https://a/3", "https://a/2", "https://a/1"])
+        self.assertEqual(json.loads(path.read_text(encoding="utf-8")), saved)
+
+    def test_merge_applies_prepare_to_stored_articles(self):
+        path = self.dir / "articles.json"
+        persistence.atomic_write_json(path, [{"url": "/old"}])
+
+        def absolute(articles):
+            for a in articles:
+                a["url"] = "https://site" + a["url"]
+
+        saved = persistence.merge_new_articles(path, [{"url": "https://site/old"}], prepare=absolute)
+
+        self.assertEqual(saved, [{"url": "https://site/old"}])
+
+    def test_lock_is_exclusive(self):
+        path = self.dir / "topics.json"
+        with persistence.file_lock(path):
+            with self.assertRaises(BlockingIOError):
+                with persistence.file_lock(path, blocking=False):
+                    pass
+        with persistence.file_lock(path, blocking=False):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import pipeline
+from pipeline import Pipeline, Stage
+
+
+class PipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        patcher = patch.object(pipeline, "timing_step")
+        patcher.start().return_value.__enter__.return_value = None
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def writer(self, name, log, delay=0.0):
+        def run():
+            time.sleep(delay)
+            log.append(name)
+            (self.dir / f"{name}.txt").write_text(name)
+        return run
+
+    def stage(self, name, log, deps=(), delay=0.0, **kwargs):
+        return Stage(name, self.writer(name, log, delay), outputs=[self.dir / f"{name}.txt"], deps=deps, **kwargs)
+
+    def test_plan_skips_upstream_of_existing_outputs(self):
+        log = []
+        (self.dir / "transcript.txt").write_text("x")
+        p = Pipeline([
+            self.stage("download", log),
+            self.stage("transcript", log, deps=["download"]),
+            self.stage("summary", log, deps=["transcript"]),
+        ])
+        self.assertEqual(p.plan(), {"download": "not needed", "transcript": "done", "summary": "run"})
+        p.run()
+        self.assertEqual(log, ["summary"])
+
+    def test_dependencies_run_first(self):
+        log = []
+        p = Pipeline([
+            self.stage("c", log, deps=["a", "b"]),
+            self.stage("a", log, delay=0.02),
+            self.stage("b", log),
+        ])
+        outcome = p.run()
+        self.assertEqual(log[-1], "c")
+        self.assertEqual(set(outcome.values()), {"ok"})
+
+    def test_failure_skips_dependents_only(self):
+        log = []
+
+        def boom():
+            raise RuntimeError("no video")
+
+        p = Pipeline([
+            Stage("download", boom, outputs=[self.dir / "video.mp4"]),
+            self.stage("transcript", log, deps=["download"]),
+            self.stage("refresh", log),
+        ])
+        outcome = p.run()
+        self.assertEqual(outcome["download"], "failed")
+        self.assertEqual(outcome["transcript"], "skipped")
+        self.assertEqual(outcome["refresh"], "ok")
+
+    def test_lock_serializes_stages(self):
+        active = []
+        overlap = []
+        guard = threading.Lock()
+
+        def post():
+            with guard:
+                active.append(1)
+                overlap.append(len(active))
+            time.sleep(0.02)
+            with guard:
+                active.pop()
+
+        p = Pipeline([Stage(f"post_{i}", post, lock="substack") for i in range(3)])
+        p.run()
+        self.assertEqual(max(overlap), 1)
+
+    def test_failure_marker_counts_as_done(self):
+        log = []
+        (self.dir / "cover_failed.txt").write_text("refused")
+        p = Pipeline([self.stage("cover", log, failure_markers=[self.dir / "cover_failed.txt"])])
+        self.assertEqual(p.plan(), {"cover": "done"})
+        p.run()
+        self.assertEqual(log, [])
+
+    def test_cycle_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Pipeline([Stage("a", lambda: None, deps=["b"]), Stage("b", lambda: None, deps=["a"])])
+
+    def test_critical_path(self):
+        p = Pipeline([
+            Stage("download", lambda: None),
+            Stage("refresh", lambda: None),
+            Stage("summary", lambda: None, deps=["download", "refresh"]),
+            Stage("cover", lambda: None, deps=["summary"]),
+        ])
+        names, total = p.critical_path({"download": 60, "refresh": 90, "summary": 30, "cover": 20})
+        self.assertEqual(names, ["refresh", "summary", "cover"])
+        self.assertEqual(total, 140)
+
+    def test_journal_adopts_existing_outputs_on_first_run(self):
+        log = []
+        (self.dir / "download.txt").write_text("x")
+        journal = pipeline.Journal(self.dir / "journal.jsonl")
+        Pipeline([
+            self.stage("download", log),
+            self.stage("summary", log, deps=["download"]),
+        ], journal=journal).run()
+
+        self.assertEqual(log, ["summary"])
+        reloaded = pipeline.Journal(self.dir / "journal.jsonl")
+        self.assertTrue(reloaded.entries["download"]["adopted"])
+        self.assertEqual(
+            reloaded.entries["summary"]["outputs"],
+            {str(self.dir / "summary.txt"): pipeline.file_sha256(self.dir / "summary.txt")},
+        )
+
+    def test_outputs_without_journal_entry_are_redone(self):
+        log = []
+        journal_path = self.dir / "journal.jsonl"
+        Pipeline([self.stage("download", log)], journal=pipeline.Journal(journal_path)).run()
+        # A crashed run left a partial extract output behind
+        (self.dir / "extract.txt").write_text("partial")
+
+        p = Pipeline([
+            self.stage("download", log),
+            self.stage("extract", log, deps=["download"]),
+        ], journal=pipeline.Journal(journal_path))
+        self.assertEqual(p.plan(), {"download": "done", "extract": "run"})
+        p.run()
+        self.assertEqual(log, ["download", "extract"])
+        self.assertEqual((self.dir / "extract.txt").read_text(), "extract")
+
+
+if __name__ == "__main__":
+    unittest.main()
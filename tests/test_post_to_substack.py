@@ -0,0 +1,76 @@
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import post_to_substack
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class SubstackPosterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.launched = []
+
+        @contextmanager
+        def fake_playwright():
+            yield SimpleNamespace()
+
+        def launch(p, source, headless):
+            self.launched.append(FakeBrowser())
+            return self.launched[-1]
+
+        for name, value in (("sync_playwright", fake_playwright), ("launch_browser", launch)):
+            patcher = patch.object(post_to_substack, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_posts_share_one_browser_on_the_worker_thread(self):
+        threads = []
+
+        def post(browser):
+            threads.append(threading.current_thread().name)
+            return browser
+
+        with post_to_substack.SubstackPoster() as poster:
+            first = poster.run(post)
+            second = poster.run(post)
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.launched), 1)
+        self.assertEqual(threads, ["substack-poster", "substack-poster"])
+        self.assertTrue(first.closed)
+
+    def test_failed_post_raises_in_caller_and_worker_keeps_going(self):
+        def boom(browser):
+            raise RuntimeError("editor did not load")
+
+        with post_to_substack.SubstackPoster() as poster:
+            with self.assertRaises(RuntimeError):
+                poster.run(boom)
+            self.assertTrue(poster.run(lambda browser: True))
+        self.assertEqual(len(self.launched), 1)
+
+    def test_unused_poster_never_launches(self):
+        with post_to_substack.SubstackPoster():
+            pass
+        self.assertEqual(self.launched, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
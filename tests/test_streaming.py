@@ -0,0 +1,150 @@
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+import unittest
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import llm_cache
+import llm_client
+import streaming
+
+
+def chunk(content=None, finish_reason=None, usage=None):
+    choices = [] if content is None and finish_reason is None else [
+        SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)
+    ]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeStream:
+    """Yields the given chunks; blocks forever after them when `stall` is set."""
+
+    def __init__(self, chunks, stall=False):
+        self.chunks = chunks
+        self.stall = stall
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        yield from self.chunks
+        if self.stall:
+            self.closed.wait()
+
+    def close(self):
+        self.closed.set()
+
+
+class StreamingCompletions:
+    def __init__(self, pieces, stall=False):
+        self.pieces = pieces
+        self.stall = stall
+        self.calls = []
+        self.stream = None
+
+    def create(self, **body):
+        self.calls.append(body)
+        chunks = [chunk(p) for p in self.pieces] + [chunk(finish_reason="stop")]
+        if not self.stall:
+            chunks.append(chunk(usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3)))
+        self.stream = FakeStream(chunks, stall=self.stall)
+        return self.stream
+
+
+SUMMARY_PIECES = ["### Pol", "itics\n- A\n- ", "B\n### Eco", "nomy\n- C", "\n"]
+
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        # Fast restarts, and keep restart metrics out of the real timings log
+        delay = patch("llm_client.RETRY_BASE_DELAY_S", 0.001)
+        delay.start()
+        self.addCleanup(delay.stop)
+        metric = patch("streaming.log_metric")
+        metric.start()
+        self.addCleanup(metric.stop)
+
+    def test_section_parser_emits_sections_as_they_complete(self):
+        seen = []
+        parser = streaming.SectionParser(seen.append)
+        parser.feed("### Politics\n- A\n")
+        self.assertEqual(seen, [])
+        parser.feed("### Economy\n- B")
+        self.assertEqual(seen, ["### Politics\n- A"])
+        parser.finish()
+        self.assertEqual(seen, ["### Politics\n- A", "### Economy\n- B"])
+
+    def test_stream_completion_returns_response_and_sections(self):
+        completions = StreamingCompletions(SUMMARY_PIECES)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        seen = []
+
+        response = streaming.stream_completion(client, on_section=seen.append, model="m", temperature=0.2)
+
+        self.assertEqual(response.choices[0].message.content, "".join(SUMMARY_PIECES))
+        self.assertEqual(response.choices[0].finish_reason, "stop")
+        self.assertEqual(response.usage.prompt_tokens, 7)
+        self.assertEqual(seen, ["### Politics\n- A\n- B", "### Economy\n- C"])
+        self.assertTrue(completions.calls[0]["stream"])
+
+
+    def test_inactivity_raises_after_restarts_and_closes_stream(self):
+        completions = StreamingCompletions(["### Politics\n- A\n"], stall=True)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        with self.assertRaises(streaming.StreamTimeout):
+            streaming.stream_completion(client, inactivity_timeout=0.05, model="m", temperature=0.2)
+        self.assertEqual(len(completions.calls), llm_client.MAX_RETRIES + 1)
+        self.assertTrue(completions.stream.closed.is_set())
+
+    def test_stalled_stream_is_restarted_without_repeating_sections(self):
+        stalled = StreamingCompletions(SUMMARY_PIECES[:3], stall=True)
+        completions = StreamingCompletions(SUMMARY_PIECES)
+
+        def create(**body):
+            return (stalled if not stalled.calls else completions).create(**body)
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        seen = []
+
+        response = streaming.stream_completion(client, on_section=seen.append, inactivity_timeout=0.05,
+                                               model="m", temperature=0.2)
+
+        self.assertEqual(response.choices[0].message.content, "".join(SUMMARY_PIECES))
+        self.assertEqual(seen, ["### Politics\n- A\n- B", "### Economy\n- C"])
+        self.assertTrue(stalled.stream.closed.is_set())
+
+    def test_temperature_zero_stream_is_cached_and_replayed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            completions = StreamingCompletions(SUMMARY_PIECES)
+            raw = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+            client = llm_cache.CachedClient(raw, llm_cache.ResponseCache(tmp))
+
+            streaming.stream_completion(client, model="m", temperature=0)
+            seen = []
+            response = streaming.stream_completion(client, on_section=seen.append, model="m", temperature=0)
+
+        self.assertEqual(len(completions.calls), 1)
+        self.assertEqual(response.choices[0].message.content, "".join(SUMMARY_PIECES))
+        self.assertEqual(len(seen), 2)
+
+    def test_non_streaming_client_gets_plain_request(self):
+        calls = []
+
+        def create(**body):
+            calls.append(body)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="### A\n- x"))])
+
+        client = SimpleNamespace(supports_streaming=False, chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        seen = []
+        streaming.stream_completion(client, on_section=seen.append, model="m", temperature=0)
+
+        self.assertNotIn("stream", calls[0])
+        self.assertEqual(seen, ["### A\n- x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import substack_api
+from substack_mock_server import MockSubstackServer
+
+SUMMARY = """# Saturday, 2 August 2025
+
+## Cyprus News
+
+Daily summary of the RIK evening news.
+
+### Top stories
+- Fire in Limassol villages [(CM)](https://cm/1)
+
+### Economy
+- Budget approved [(IC)](https://ic/2)
+"""
+
+
+class SubstackAPITestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.summary = self.dir / "summary.txt"
+        self.summary.write_text(SUMMARY, encoding="utf-8")
+        self.cover = self.dir / "cover.webp"
+        self.cover.write_bytes(b"RIFF0000WEBP")
+        self.session = self.dir / "session.json"
+        self.session.write_text(json.dumps({"cookies": [
+            {"name": "substack.sid", "value": "abc", "domain": ".substack.com", "path": "/"},
+        ], "origins": []}))
+        self.server = MockSubstackServer().start()
+        self.addCleanup(self.server.stop)
+
+    def post(self, publish=True):
+        return substack_api.publish_via_api(
+            self.summary, publish=publish, cover_path=self.cover, substack_url=f"{self.server.url}/publish/post",
+            session_file=self.session, api_base=self.server.api_base,
+        )
+
+    def test_publishes_draft_with_cover_before_top_stories(self):
+        self.assertTrue(self.post())
+
+        state = self.server.state
+        self.assertEqual(state.published, [1])
+        self.assertTrue(state.images[0].startswith("data:image/webp;base64,"))
+        draft = state.drafts[1]
+        self.assertEqual(draft["draft_title"], "Saturday, 2 August 2025")
+        blocks = draft["draft_body"]["content"]
+        self.assertEqual([b["type"] for b in blocks],
+                         ["paragraph", "captionedImage", "heading", "paragraph", "heading", "paragraph",
+                          "subscribeWidget"])
+        self.assertEqual(blocks[1]["content"][0]["attrs"]["src"], "https://mock-substack.local/image/1")
+        self.assertEqual(blocks[2]["attrs"]["level"], 3)
+        link = blocks[3]["content"][1]
+        self.assertEqual(link["text"], "(CM)")
+        self.assertEqual(link["marks"], [{"type": "link", "attrs": {"href": "https://cm/1"}}])
+
+    def test_draft_mode_does_not_publish(self):
+        self.assertFalse(self.post(publish=False))
+        self.assertEqual(len(self.server.state.drafts), 1)
+        self.assertEqual(self.server.state.published, [])
+
+    def test_failure_before_publish_allows_browser_fallback(self):
+        self.server.state.fail["/api/v1/drafts"] = 500
+        with self.assertRaises(substack_api.SubstackAPIError) as ctx:
+            self.post()
+        self.assertTrue(ctx.exception.fallback_safe)
+
+    def test_failed_prepublish_deletes_the_draft_before_fallback(self):
+        self.server.state.fail["/api/v1/drafts/1/prepublish"] = 500
+        with self.assertRaises(substack_api.SubstackAPIError) as ctx:
+            self.post()
+        self.assertTrue(ctx.exception.fallback_safe)
+        self.assertEqual(self.server.state.deleted, [1])
+        self.assertEqual(self.server.state.drafts, {})
+        self.assertEqual(self.server.state.published, [])
+
+    def test_undeletable_draft_still_allows_fallback(self):
+        self.server.state.fail["/api/v1/drafts/1/prepublish"] = 500
+        self.server.state.fail["/api/v1/drafts/1"] = 500
+        with self.assertRaises(substack_api.SubstackAPIError) as ctx:
+            self.post()
+        self.assertTrue(ctx.exception.fallback_safe)
+        self.assertEqual(list(self.server.state.drafts), [1])
+
+    def test_failed_publish_request_is_not_retried_elsewhere(self):
+        self.server.state.fail["/api/v1/drafts/1/publish"] = 502
+        with self.assertRaises(substack_api.SubstackAPIError) as ctx:
+            self.post()
+        self.assertFalse(ctx.exception.fallback_safe)
+        self.assertEqual(self.server.state.deleted, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
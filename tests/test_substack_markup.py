@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT / "src"))
+
+import substack_markup
+
+
+class SubstackMarkupTestCase(unittest.TestCase):
+    def test_lines_become_blocks_like_typed_posts(self):
+        markdown = "Intro line\n\n### Top stories\n- Fire in Limassol\n\n### Economy\n- Budget approved"
+        self.assertEqual(
+            substack_markup.markdown_to_html(markdown),
+            "<p>Intro line</p><h3>Top stories</h3><p>• Fire in Limassol</p>"
+            "<h3>Economy</h3><p>• Budget approved</p>",
+        )
+
+    def test_links_become_anchors_and_text_is_escaped(self):
+        line = "- Tom & Jerry <show> returns [(CM)](https://cm/1?a=1&b=2), [(IC)](https://ic/2)"
+        self.assertEqual(
+            substack_markup.markdown_to_html(line),
+            '<p>• Tom &amp; Jerry &lt;show&gt; returns <a href="https://cm/1?a=1&amp;b=2">(CM)</a>, '
+            '<a href="https://ic/2">(IC)</a></p>',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
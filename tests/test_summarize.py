@@ -1,6 +1,10 @@
+import json
+import re
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 import unittest
+from unittest.mock import patch
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "src"))
@@ -8,6 +12,38 @@ sys.path.append(str(ROOT / "src"))
 import summarize
 
 
+class LinkAssignmentClient:
+    """Fake OpenAI client that assigns one article to every numbered bullet.
+
+    Without a fixed `url`, the first candidate article in the prompt is used.
+    """
+
+    def __init__(self, url=None, tag="CM"):
+        self.url = url
+        self.tag = tag
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        prompt = kwargs["messages"][-1]["content"]
+        summary = re.search(r"SUMMARY:\n(.*?)\n\s*ARTICLES:", prompt, re.DOTALL).group(1)
+        articles = json.loads(prompt.split("ARTICLES:", 1)[1])
+        url = self.url or articles[0]["u"]
+        ids = [int(n) for n in re.findall(r"^\s*\[(\d+)\] ", summary, re.MULTILINE)]
+        content = json.dumps({"links": [{"bullet": i, "tag": self.tag, "url": url} for i in ids]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+        )
+
+
+ARTICLES = [
+    {"t": "Bank of Cyprus profit rises", "a": None, "u": "https://cm/1", "tag": "CM"},
+    {"t": "Storm warning for Limassol", "a": None, "u": "https://cm/2", "tag": "CM"},
+]
+
+
 class SummarizeTestCase(unittest.TestCase):
     def test_combine_summaries_merges_and_orders_sections(self):
         chunk_one = """### Top stories\n- Item A\n\n### Culture\n- Item C"""
@@ -54,5 +90,73 @@ class SummarizeTestCase(unittest.TestCase):
         self.assertIn("(IC)", examples)
 
 
+    def test_split_sections_keeps_order_and_preamble(self):
+        text = "Intro line\n\n### Economy\n- A\n\n### Weather\n- B"
+        parts = summarize.split_sections(text)
+        self.assertEqual(parts, ["Intro line", "### Economy\n- A", "### Weather\n- B"])
+
+    def test_link_sections_concurrently_reassembles_in_order(self):
+        text = "### Economy\n- Bank of Cyprus profit rises\n\n### Weather\n- Storm warning in Limassol"
+        client = LinkAssignmentClient()
+        linked, usage = summarize.link_sections_concurrently(client, text, ARTICLES, "Link [TAG_EXAMPLES]")
+        self.assertEqual(client.calls, 2)
+        self.assertLess(linked.index("### Economy"), linked.index("### Weather"))
+        self.assertEqual(linked.count("[(CM)]"), 2)
+        self.assertEqual(usage.prompt_tokens, 20)
+
+    def test_link_articles_ignores_urls_outside_candidates(self):
+        text = "### Economy\n- Bank of Cyprus profit rises"
+        client = LinkAssignmentClient(url="https://cm/made-up")
+        linked, _ = summarize.link_articles_to_summary(client, text, ARTICLES, "Link [TAG_EXAMPLES]")
+        self.assertEqual(linked, text)
+
+    def test_followup_chunks_share_a_static_prefix(self):
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs["messages"])
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="### Economy\n- item"))],
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+            )
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        encoding = SimpleNamespace(encode=lambda text: text.split())
+        transcript = "\n\n".join(f"paragraph {i} " + "word " * 40 for i in range(6))
+        with patch.object(summarize.tiktoken, "encoding_for_model", return_value=encoding), \
+                patch.object(summarize, "log_prompt_cache"):
+            summarize.generate_chunked_summary(
+                transcript, client, "USER", "FIRST", "FOLLOWUP [ONGOING_TOPIC_SECTIONS]\n", "HEADLINES",
+                max_chunk_size=100, sleep_time=0,
+            )
+        followups = [m for m in calls if m[0]["content"].startswith("FOLLOWUP")]
+        self.assertGreaterEqual(len(followups), 2)
+        self.assertEqual({m[0]["content"] for m in followups}, {"FOLLOWUP "})
+        for messages in followups:
+            self.assertEqual(messages[1]["content"], "USER")
+            self.assertTrue(messages[2]["content"].startswith("PREVIOUS SUMMARY:"))
+
+    def test_saved_headlines_skip_the_headline_pass(self):
+        calls = []
+
+        def create(**kwargs):
+            calls.append(kwargs["messages"])
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content="### Economy\n- item"))],
+                usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5),
+            )
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        encoding = SimpleNamespace(encode=lambda text: text.split())
+        with patch.object(summarize.tiktoken, "encoding_for_model", return_value=encoding), \
+                patch.object(summarize, "log_prompt_cache"):
+            summary, _ = summarize.generate_chunked_summary(
+                "paragraph one", client, "USER", "FIRST", "FOLLOWUP", "HEADLINES",
+                sleep_time=0, headlines="### Top stories\n- Saved headline",
+            )
+        self.assertNotIn("HEADLINES", [m[0]["content"] for m in calls])
+        self.assertIn("- Saved headline", summary)
+
+
 if __name__ == "__main__":
     unittest.main()
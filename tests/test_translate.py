@@ -1,13 +1,43 @@
 # tests/test_translate.py
+import json
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 import unittest
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT / "src"))
 
+import translate
 from translate import load_translate_prompt
 
+SOURCE = "### Economy\n- Bank profits rise\n- Fuel prices fall"
+LANG_NAMES = {"ru": "Russian", "uk": "Ukrainian", "tr": "Turkish", "he": "Hebrew"}
+
+
+class ScriptedClient:
+    """Fake OpenAI client: the JSON-mode request gets `batch_reply`, single ones a canned translation."""
+
+    def __init__(self, batch_reply, finish_reason="stop"):
+        self.batch_reply = batch_reply
+        self.finish_reason = finish_reason
+        self.single_calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        if "response_format" in kwargs:
+            content, finish_reason = self.batch_reply, self.finish_reason
+        else:
+            system = kwargs["messages"][0]["content"]
+            lang = next(code for code, name in LANG_NAMES.items() if f"into {name}" in system)
+            self.single_calls.append(lang)
+            content, finish_reason = f"### {lang}\n- one\n- two", "stop"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=50),
+        )
+
+
 class TranslateTestCase(unittest.TestCase):
     def test_translate_prompt_loads(self):
         prompt = load_translate_prompt()
@@ -19,5 +49,32 @@ class TranslateTestCase(unittest.TestCase):
         self.assertIn("Κύριες Ειδήσεις", prompt)
         self.assertIn("Κυπριακό", prompt)
 
+    def test_batch_prompt_includes_each_language_prompt(self):
+        prompt = translate.build_batch_prompt(["ru", "tr"])
+        self.assertIn("Главные новости", prompt)
+        self.assertIn("Turkish", prompt)
+
+    def test_batch_translation_uses_one_request(self):
+        reply = json.dumps({"ru": "### Экономика\n- а\n- б", "uk": "### Економіка\n- а\n- б"})
+        client = ScriptedClient(reply)
+        translations, usages = translate.translate_summary_batch(client, SOURCE, ["ru", "uk"])
+        self.assertEqual(client.single_calls, [])
+        self.assertEqual(len(usages), 1)
+        self.assertTrue(translations["uk"].startswith("### Економіка"))
+
+    def test_batch_falls_back_for_missing_or_broken_languages(self):
+        reply = json.dumps({"ru": "### Экономика\n- а\n- б", "uk": "### Економіка\n- а"})
+        client = ScriptedClient(reply)
+        translations, usages = translate.translate_summary_batch(client, SOURCE, ["ru", "uk", "tr"])
+        self.assertEqual(client.single_calls, ["uk", "tr"])
+        self.assertEqual(set(translations), {"ru", "uk", "tr"})
+
+    def test_batch_falls_back_when_truncated(self):
+        client = ScriptedClient('{"ru": "### Экон', finish_reason="length")
+        translations, _ = translate.translate_summary_batch(client, SOURCE, ["ru", "he"])
+        self.assertEqual(client.single_calls, ["ru", "he"])
+        self.assertEqual(translations["he"], "### he\n- one\n- two")
+
+
 if __name__ == "__main__":
     unittest.main()